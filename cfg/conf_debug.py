@@ -11,7 +11,7 @@ DEBUG_DATA_TRANS = {
     "asgn_speaker": False,
 
 	# 🔽 Main Data Trans Assignments
-	
+	"save_trans_input": False,
 
     # 🗂️ Output path for all exports
     "output_dir": "C:/demo/debug_dumps/"
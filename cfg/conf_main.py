@@ -18,6 +18,59 @@ MODEL_VRAM_REQUIREMENTS = {
     "turbo": 6
 }
 
+# Whisper model cache budget (in GB) used for LRU eviction of resident models.
+# None = auto: total VRAM when CUDA is available, otherwise half of system RAM.
+MODEL_CACHE_BUDGET_GB = None
+
+# Frame-level feature extraction for speaker diarization (run_librosa_identification)
+DIARIZATION_FEATURE_OPTIONS = {
+    "voiced_only": False,   # True = analyse only padded VAD speech spans, not silences (opt-in)
+    "pad_frames": 10,       # 10 ms frames of padding per span (Δ/ΔΔ context)
+    "pitch_backend": "yin", # 'yin' | 'yin_decimated' | 'autocorr' (see `utils_benchmark pitch`)
+    "extra_features": False,  # + zcr, centroid, bandwidth, flatness, rolloff, rms, chroma
+    "feature_workers": 1,   # 1 = threads; >1 = worker processes with shared-memory output
+    "shard_seconds": 60.0,  # longest waveform shard per worker process (feature_workers > 1 only)
+}
+
+# Streaming (block-wise) diarization for very long recordings: features are folded
+# into 1 s bins block by block, so memory tracks the number of bins, not frames
+DIARIZATION_STREAMING = {
+    "min_duration_s": 2 * 3600,  # stream recordings longer than this (None = never)
+    "block_seconds": 600,        # audio per block
+}
+
+# Clustering of the 1 s diarization bins (cluster_full_features). 'auto' picks the
+# backend by bin count; see `python -m services.utils_benchmark clustering`
+DIARIZATION_CLUSTERING = {
+    "backend": "auto",               # 'auto' | 'umap' | 'umap_sampled' | 'pca' | 'kmeans' | 'agglomerative'
+    "umap_max_intervals": 20_000,    # auto: full UMAP + HDBSCAN up to this many bins (~5.5 h)
+    "sampled_max_intervals": 100_000,  # auto: sampled UMAP up to here, mini-batch k-means beyond
+    "sample_size": 10_000,           # rows UMAP / agglomerative are fitted on in sampled modes
+    "n_speakers": None,              # k-means / agglomerative cluster count (None = estimate)
+    "max_speakers": 8,               # upper bound for the speaker-count estimate
+    "umap_low_memory": False,        # UMAP low-memory neighbour search (slower)
+    "umap_n_jobs": 1,                # UMAP threads; > 1 gives up the fixed random_state
+}
+
+# Most bins kept for the cluster plot (evenly spaced); the 2D projection is made at view time
+CLUSTER_PLOT_MAX_POINTS = 5000
+
+# Persistent per-file artifact cache (services/utils_cache.py): Whisper segments,
+# diarization features / VAD timestamps and cluster labels, keyed by audio content
+# hash + the parameters that produced them. Cleared with `services.batch --clear-cache`
+# or the 🧹 button in the app
+ARTIFACT_CACHE = {
+    "enabled": True,  # default for the pipeline's 'artifact_cache' setting
+    "dir": None,      # None = <repo>/artifact_cache
+    "max_gb": 2.0,    # size budget; least recently used artifacts are evicted (None = unbounded)
+}
+
+# Canonical transcript records (text + segments + speakers + metadata) written next to
+# the outputs as <output_dir>/.transcripts/<stem>.json; any output format is rendered
+# from them without re-transcribing
+TRANSCRIPT_RECORD_DIR = ".transcripts"
+TRANSCRIPT_RECORD_VERSION = 1
+
 # Recommended batch size thresholds based on available VRAM (in GB)
 BATCH_SIZE_THRESHOLDS = {
     "high": {
@@ -321,8 +321,9 @@ class QueueFrame(ttk.LabelFrame):
         import matplotlib.pyplot as plt
         from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
         import pandas as pd
+        from services.utils_output import project_cluster_plot
 
-        df = pd.read_feather(cluster_path)
+        df = project_cluster_plot(pd.read_feather(cluster_path))
         fig, ax = plt.subplots(figsize=(5, 4), dpi=100)
         fig.patch.set_facecolor("#191919")
         ax.set_facecolor("#191919")
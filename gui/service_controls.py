@@ -4,7 +4,7 @@ import ttkbootstrap as ttk
 import time
 
 class ServiceControlsFrame(ttk.Frame):
-    def __init__(self, parent, on_start, on_stop, styles, **kwargs):
+    def __init__(self, parent, on_start, on_stop, styles, on_export=None, on_clear_cache=None, **kwargs):
         super().__init__(parent, **kwargs)
         self.styles = styles
 
@@ -30,6 +30,26 @@ class ServiceControlsFrame(ttk.Frame):
         )
         btn_stop.pack(side="left", padx=(0, 10))
 
+        # Export All Button (re-render every transcript in the selected format)
+        if on_export:
+            btn_export = ttk.Button(
+                self.button_row,
+                text="⇪",
+                command=on_export,
+                style="IconInfo.TButton"
+            )
+            btn_export.pack(side="left", padx=(0, 10))
+
+        # Clear Cache Button (drop cached Whisper / diarization artifacts)
+        if on_clear_cache:
+            btn_clear_cache = ttk.Button(
+                self.button_row,
+                text="🧹",
+                command=on_clear_cache,
+                style="IconWarning.TButton"
+            )
+            btn_clear_cache.pack(side="left", padx=(0, 10))
+
         # Status Label
         self.status_label = ttk.Label(
             self.button_row,
@@ -1,7 +1,7 @@
 # File: gui/settings_model.py
 
 import ttkbootstrap as ttk
-import torch
+from services.utils_device import get_gpu_info
 from cfg.conf_main import WHISPER_MODELS, MODEL_VRAM_REQUIREMENTS
 
 
@@ -115,9 +115,10 @@ class SettingsModelFrame(ttk.LabelFrame):
 
 
     def _get_available_vram(self):
-        if torch.cuda.is_available():
-            props = torch.cuda.get_device_properties(0)
-            return round(props.total_memory / (1024 ** 3), 1)
+        # NVML (already initialised for the splash) avoids importing torch on the UI thread
+        gpu_available, gpu_info = get_gpu_info()
+        if gpu_available and "total_memory_MB" in gpu_info:
+            return round(gpu_info["total_memory_MB"] / 1024, 1)
         return 0
 
     def set_state(self, state):
@@ -6,29 +6,23 @@ import tkinter as tk
 import time
 from tkinter import filedialog, messagebox
 import ttkbootstrap as ttk
-import shutil
 from gui.settings_input import SettingsInputFrame
 from gui.settings_output import SettingsOutputFrame
 from gui.settings_model import SettingsModelFrame
 from gui.queue_display import QueueFrame
 from gui.service_controls import ServiceControlsFrame
 from gui.device_monitor import DeviceMonitorFrame
-import pandas as pd
 from pathlib import Path
 from cfg.conf_style import get_theme_style, get_bootstyles
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import matplotlib.pyplot as plt
-import tempfile
-from services.utils_models import find_new_seg_id
-from services.utils_audio import list_audio_files, prep_whisper_audio
-from services.utils_device import  get_device_status, get_optimal_batch_size
-from services.utils_transcribe import save_transcript, get_lang_name, qualifies_for_batch_processing,transcribe_file
-from services.utils_diarize import run_diarization_pipeline
-from services.utils_output import load_output_file, save_cluster_data
+from services.utils_audio import list_audio_files
+from services.utils_device import  get_device_status
+from services.utils_models import warm_up_model_async
+from services.utils_pipeline import (
+    make_pipeline_settings, warm_up_pipeline, run_pipelined_batch, build_record_path, export_transcripts
+)
+from services.utils_output import load_output_file
 from services.version import __version__
 from services.template_manager import TemplateManager
-import re
-from copy import deepcopy
 
 
 
@@ -150,6 +144,8 @@ class TranscribeApp:
             self.root,
             self.start_transcription,
             self.stop_transcription,
+            on_export=self.export_all,
+            on_clear_cache=self.clear_cache,
             styles=self.styles
         )
         self.service_controls.grid(row=3, column=0, columnspan=2, padx=5, pady=10, sticky="w")
@@ -165,6 +161,10 @@ class TranscribeApp:
     def initialize_ui(self):
         self._build_ui()
 
+    def start_model_warmup(self):
+        """Preloads the currently selected Whisper model in the background."""
+        self.model_warmup_thread = warm_up_model_async(self.model)
+
     def set_ui_inputs_state(self, enabled: bool):
         # Prevent enabling the UI if we are in idle monitoring mode
         if enabled and getattr(self, "idle_mode", False):
@@ -250,10 +250,55 @@ class TranscribeApp:
         # Re-populate queue
         self.populate_queue(self.input_dir, self.output_dir)
 
+    def export_all(self):
+        """
+        Renders every transcribed file in the currently selected output format from
+        its transcript record (writers only — no Whisper or diarization).
+        """
+        if not self.input_dir:
+            messagebox.showerror("Error", "Please select a directory first.")
+            return
+        if self.transcribe_thread and self.transcribe_thread.is_alive():
+            messagebox.showerror("Error", "Cannot export while transcription is running.")
+            return
+
+        start_time = time.time()
+        statuses = export_transcripts(self.input_dir, self.output_dir, self.output_extension, overwrite=True)
+        elapsed = time.time() - start_time
+
+        exported = list(statuses.values()).count("Completed")
+        missing = list(statuses.values()).count("Missing")
+        failed = list(statuses.values()).count("Error")
+        messagebox.showinfo(
+            "Export All",
+            f"Exported {exported} file(s) as .{self.output_extension} in {elapsed:.2f} sec."
+            + (f"\n\n{missing} file(s) have not been transcribed yet." if missing else "")
+            + (f"\n{failed} file(s) failed — see the console." if failed else "")
+        )
+        self.refresh_directory()
+
+    def clear_cache(self):
+        """
+        Deletes the persistent artifact cache (Whisper results, diarization features,
+        VAD timestamps, cluster labels); the next run recomputes every stage.
+        """
+        if self.transcribe_thread and self.transcribe_thread.is_alive():
+            messagebox.showerror("Error", "Cannot clear the cache while transcription is running.")
+            return
+        if not messagebox.askyesno("Clear Cache", "Delete all cached transcription and diarization artifacts?"):
+            return
+
+        from services.utils_cache import clear_artifact_cache
+        removed = clear_artifact_cache()
+        messagebox.showinfo("Clear Cache", f"Removed {removed} cached artifact(s).")
+
     def que_reset(self):
         """
         Deletes output files in the output directory that match the base names of 
-        input audio files and use the currently selected output extension only.
+        input audio files and use the currently selected output extension only,
+        together with their transcript records so the files are queued again.
+        The artifact cache is kept: with unchanged settings, a reset file is rebuilt
+        from its cached Whisper / diarization results (🧹 clears them to recompute).
         """
 
         if not self.input_dir:
@@ -287,6 +332,13 @@ class TranscribeApp:
                 except Exception as e:
                     print(f"Failed to delete {file_name}: {e}")
 
+                record_path = build_record_path(self.output_dir, file_name)
+                if os.path.exists(record_path):
+                    try:
+                        os.remove(record_path)
+                    except Exception as e:
+                        print(f"Failed to delete {record_path}: {e}")
+
         # Show results
         msg = f"Deleted {len(deleted_files)} directory output file(s)."
         if deleted_files:
@@ -308,10 +360,15 @@ class TranscribeApp:
         for file in self.audio_files:
             
             transcript_path = os.path.join(output_directory, f"{os.path.splitext(file)[0]}.{self.output_extension}")
-            status = "Completed" if os.path.exists(transcript_path) else "In Queue"
+            if os.path.exists(transcript_path):
+                status = "Completed"
+            elif os.path.exists(build_record_path(output_directory, file)):
+                status = "Transcribed"  # record on disk → rendered without re-transcribing
+            else:
+                status = "In Queue"
 
-            #Feather cleanup logic (only for non-complete entries)
-            if status != "Completed":
+            #Feather cleanup logic (only for entries that will be transcribed again)
+            if status == "In Queue":
                 stem = Path(file).stem
                 cluster_file = cluster_dir / f"{stem}_umap.feather"
                 if cluster_file.exists():
@@ -343,7 +400,7 @@ class TranscribeApp:
 
         for i in range(self.status_queue.size()):
             status = self.status_queue.get(i)
-            if status in ("In Queue", "Error"):
+            if status in ("In Queue", "Transcribed", "Error"):
                 all_completed = False
                 any_retriable = True
                 break
@@ -373,142 +430,78 @@ class TranscribeApp:
         self.transcribe_thread.start()
 
     def run_transcription(self):
-        any_transcribed = False
-
         # Start Service Timer
         self.service_controls.start_time = time.time()
         self.service_controls.update_service_timer()
 
-        for i in range(self.listbox_queue.size()):
-            if self.stop_requested:
-                self.status_animation_running = False
-                self.service_status.config(text="Service is currently Stopped")
-                self.set_ui_inputs_state(True)
-                messagebox.showinfo("Stopped", "The Active Transcriber Service has been stopped.")
+        settings = make_pipeline_settings(
+            model_name=self.model,
+            language=self.language,
+            translate_to_english=self.translate_to_english,
+            use_diarization=self.use_diarization,
+            output_format=self.output_extension,
+            diagnostics=self.diagnostics_enabled,
+        )
+        warm_up_pipeline(settings)
+
+        rows = {self.listbox_queue.get(i): i for i in range(self.listbox_queue.size())}
+        pending = [
+            filename for filename, i in rows.items()
+            if self.status_queue.get(i) in ("In Queue", "Transcribed")
+        ]
+        transcribed = []
+
+        def is_selected(filename):
+            selection = self.listbox_queue.curselection()
+            return selection and self.listbox_queue.get(selection[0]) == filename
+
+        def get_ui_callback(job):
+            # Only trigger cluster Animation status if this file is selected in UI
+            return self.queue_frame.set_cluster_status if is_selected(job["filename"]) else None
+
+        def on_status(filename, status, job):
+            i = rows.get(filename)
+            if i is None or status == "Skipped":
                 return
 
-            filename = self.listbox_queue.get(i)
-            status = self.status_queue.get(i)
-            if status != "In Queue":
-                continue
-
-            file_path = os.path.join(self.input_dir, filename)
-            output_path = os.path.join(self.output_dir, f"{os.path.splitext(filename)[0]}.{self.output_extension}")
-
-            # Batch size qualifier
-            qualifies_for_batch = qualifies_for_batch_processing(file_path, self.use_diarization)
-            if qualifies_for_batch:
-                vram_gb = self.model_settings._get_available_vram()
-                batch_size = get_optimal_batch_size(vram_gb, self.gpu_available)
-            else:
-                batch_size = 1
-
-            self.status_queue.delete(i)
-            self.status_queue.insert(i, "Processing...")
-            self.root.update_idletasks()
-            self.start_processing_animation(i)
-
-            temp_dir = tempfile.mkdtemp(prefix="transcribe_job_")
-            audio_mp3_path = prep_whisper_audio(file_path, temp_dir)
-
-            try:
-                result = transcribe_file(
-                    audio_mp3_path,
-                    model_name=self.model,
-                    language=self.language,
-                    translate_to_english=self.translate_to_english
-                )
-                
-                # Merge segments *before* passing to diarization pipeline
-                segments = result.get("segments", [])
-                #  dump segments for debug
-                #pd.DataFrame(segments).to_csv(r"C:\demo\get_whisper_segments.csv", index=False, float_format="%.8f")
-
-                if segments:
-                    merged_segments = find_new_seg_id(segments)
-                    result["segments"] = merged_segments  # overwrite with cleaned segments
-                    
-                    
-                if self.use_diarization:
-
-                    # Only trigger cluster Animation status if this file is selected in UI
-                    selection = self.listbox_queue.curselection()
-                    is_selected = selection and self.listbox_queue.get(selection[0]) == filename
-                    ui_callback = self.queue_frame.set_cluster_status if is_selected else None
-
-                    diarization_result = run_diarization_pipeline(
-                        audio_mp3_path,
-                        result["segments"],
-                        diagnostics=True,
-                        ui_callback = ui_callback
-                    )
-    
-                   # Step 1: Overwrite final speaker-labeled segments
-                    result["segments"] = diarization_result["segments"]
-                    #pd.DataFrame(result["segments"]).to_csv(r"C:\demo\get_post_diarize_segments.csv", index=False, float_format="%.8f")
-
-                   # Step 1.5: Handle Speaker Overlap 
-                    result["segments"] = self.resolve_speaker_overlap(result["segments"])
-                    #pd.DataFrame(result["segments"]).to_csv(r"C:\demo\get_post_diarize_segments_Overlap.csv", index=False, float_format="%.8f")
-                    
-                    # Step 2: Save cluster data to file (for UI scatter plot)
-                    cluster_df = diarization_result.get("cluster_data")
-                    if cluster_df is not None:
-                        
-                        save_cluster_data(
-                            df=cluster_df,
-                            filename=filename        # must be the original input file, not temp mp3
-                                
-                        )
-
-                    # Step 3: Optional diagnostic printout (for dev mode)
-                    if self.diagnostics_enabled:
-                        diagnostics = diarization_result.get("diagnostics", {})
-                        for stage, summary_df in diagnostics.items():
-                            print(f"\n📊 Speaker Summary at stage: {stage}")
-                            print(summary_df)
-
-                                            
-            except Exception as e:
-                print(f"❌ Transcription or Librosa Diarization failed: {e}")
+            if status == "Processing...":
                 self.status_queue.delete(i)
-                self.status_queue.insert(i, "Error")
-
-            finally:
-                if os.path.exists(temp_dir):
-                    shutil.rmtree(temp_dir)
-
-            try:
-
-                save_transcript(
-                    output_path,
-                    result,
-                    self.active_template,
-                    input_file=file_path,
-                    input_language=get_lang_name(self.language),
-                    output_language="English" if self.translate_to_english else get_lang_name(self.language),
-                    model_used=self.model,
-                    processing_device="GPU" if self.gpu_available else "CPU",
-                    batch_size=batch_size,
-                    use_diarization=self.use_diarization,
-                    output_format=self.output_extension,
-                )
+                self.status_queue.insert(i, status)
+                self.root.update_idletasks()
+                self.start_processing_animation(i)
+                return
 
+            # Writes finish while the next file is already being transcribed
+            if getattr(self, "processing_row_index", None) == i:
                 self.stop_processing_animation()
-                self.status_queue.delete(i)
-                self.status_queue.insert(i, "Completed")
-                any_transcribed = True
+            self.status_queue.delete(i)
+            self.status_queue.insert(i, status)
+
+            if status == "Error":
+                error = job["error"] if job else "unknown error"
+                print(f"❌ Transcription failed: {error}")
+                self.error_messages[filename] = f"Failed to transcribe: {error}"
+                return
 
-                # 🧠 Check if this is the currently selected file
-                current_selection = self.listbox_queue.curselection()
-                if current_selection and self.listbox_queue.get(current_selection[0]) == filename:
-                    self.queue_frame.display_cluster_plot(filename)
+            transcribed.append(filename)
+            # 🧠 Check if this is the currently selected file
+            if is_selected(filename):
+                self.queue_frame.display_cluster_plot(filename)
 
-            except Exception as e:
-                self.stop_processing_animation()
-                self.status_queue.delete(i)
-                self.status_queue.insert(i, "Error")
-                self.error_messages[filename] = f"Failed to save transcript: {str(e)}"
+        # Audio prep and output writing overlap Whisper/diarization (see run_pipelined_batch)
+        try:
+            run_pipelined_batch(
+                self.input_dir,
+                self.output_dir,
+                settings,
+                on_status=on_status,
+                should_stop=lambda: self.stop_requested,
+                filenames=pending,
+                get_ui_callback=get_ui_callback
+            )
+        except Exception as e:
+            print(f"❌ Transcription service failed: {e}")
+            self.stop_processing_animation()
 
         # End Service Timer
         self.service_controls.stop_service_timer()
@@ -519,9 +512,10 @@ class TranscribeApp:
         if self.stop_requested:
             self.service_status.config(text="Service is currently Stopped")
             self.stop_requested = False
+            messagebox.showinfo("Stopped", "The Active Transcriber Service has been stopped.")
         elif self.monitoring_enabled:
             self.continuous_monitoring()
-        elif any_transcribed:
+        elif transcribed:
             messagebox.showinfo("Success", "All audio files have been transcribed.")
             self.service_status.config(text="Service is currently Stopped")
         else:
@@ -697,73 +691,6 @@ class TranscribeApp:
             messagebox.showerror("Error Opening Directory", str(e))
 
 
-    def resolve_speaker_overlap(self, segments):
-        """
-        Detects when a speaker shift occurs between consecutive segments that share the same
-        new_segment_id. If the next row contains multiple sentences, splits off the last sentence.
-        """
-        resolved = []
-        i = 0
-
-        while i < len(segments):
-            current = deepcopy(segments[i])
-            next_row = segments[i + 1] if i + 1 < len(segments) else None
-
-            # Default: just keep current as-is
-            resolved.append(current)
-
-            if (
-                next_row and
-                current["new_segment_id"] == next_row["new_segment_id"] and
-                current["speaker"] != next_row["speaker"]
-            ):
-                text = next_row["text"].strip()
-                # Split into sentences (keep punctuation)
-                sentences = re.split(r'(?<=[.!?])\s+(?=[A-Z])', text)
-
-                if len(sentences) > 1:
-                    total_chars = sum(len(s) for s in sentences)
-                    first_chars = sum(len(s) for s in sentences[:-1])
-                    duration = next_row["end"] - next_row["start"]
-                    split_point = next_row["start"] + duration * (first_chars / total_chars)
-
-                    # First part stays with original new_segment_id and previous speaker
-                    main_row = deepcopy(next_row)
-                    main_row["id"] = f"{next_row['id']}_a"
-                    main_row["text"] = " ".join(sentences[:-1])
-                    main_row["end"] = round(split_point, 3)
-                    main_row["speaker"] = current["speaker"]  # Carry over previous speaker
-
-                    # Second part goes to a new segment id and next speaker
-                    split_row = {
-                        "id": f"{next_row['id']}_b",
-                        "seek": next_row.get("seek"),
-                        "start": round(split_point, 3),
-                        "end": next_row["end"],
-                        "text": sentences[-1].strip(),
-                        "tokens": [],
-                        "temperature": next_row.get("temperature"),
-                        "avg_logprob": next_row.get("avg_logprob"),
-                        "compression_ratio": next_row.get("compression_ratio"),
-                        "no_speech_prob": next_row.get("no_speech_prob"),
-                        "new_segment_id": next_row["new_segment_id"] + 1,  # bump segment
-                        "speaker": next_row["speaker"]
-                    }
-
-                    resolved.append(main_row)
-                    resolved.append(split_row)
-                    i += 2  # Skip next_row since we handled it
-                    continue
-
-            i += 1
-
-        return resolved
-
-
-
-
-        
-
     # ────────────────────────────────────────────────
     # UI Property Accessors
     # ────────────────────────────────────────────────
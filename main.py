@@ -2,6 +2,7 @@
 from ttkbootstrap import Window
 from gui.ui_splash import SplashScreen
 from services.version import __version__
+from services.utils_debug import stage_timer
 
 if __name__ == "__main__":
     from services.dependency_check import check_dependencies
@@ -24,13 +25,18 @@ if __name__ == "__main__":
     def finish_loading():
        
         splash.set_progress(25)
-        from gui.ui_main import TranscribeApp
+        with stage_timer("Startup: import UI"):
+            from gui.ui_main import TranscribeApp
         splash.set_progress(50)
         from gui.app import launch_app
         
         splash.set_progress(75)
-        app = launch_app(root)
-        app.initialize_ui()
+        with stage_timer("Startup: build UI"):
+            app = launch_app(root)
+            app.initialize_ui()
+
+        # 🔥 Load the selected Whisper model while the user is still looking at the UI
+        app.start_model_warmup()
 
         splash.set_progress(100)
         splash.close()  # ✅ This shows the main window
@@ -0,0 +1,175 @@
+# File: transcribe_audio_service/services/batch.py
+"""
+Headless batch transcription entry point.
+
+Usage:
+    python -m services.batch --input DIR --output DIR --model medium --diarize
+"""
+
+import argparse
+import os
+import sys
+import time
+from cfg.conf_main import WHISPER_MODELS, LANGUAGE_MAP, SUPPORTED_OUTPUT_EXTENSIONS
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m services.batch",
+        description="Transcribe every supported audio file in a directory without the GUI."
+    )
+    parser.add_argument("--input", required=True, help="Directory containing audio files.")
+    parser.add_argument("--output", help="Directory for transcripts (defaults to --input).")
+    parser.add_argument("--model", default="medium", choices=list(WHISPER_MODELS), help="Whisper model.")
+    parser.add_argument("--language", default="en", choices=list(LANGUAGE_MAP.values()), help="Audio language code.")
+    parser.add_argument("--format", default="txt", choices=list(SUPPORTED_OUTPUT_EXTENSIONS), help="Output format.")
+    parser.add_argument("--diarize", action="store_true", help="Enable speaker identification.")
+    parser.add_argument("--translate", action="store_true", help="Translate non-English audio to English.")
+    parser.add_argument("--force", action="store_true", help="Re-transcribe (with --export-only: re-render) files that already have an output.")
+    parser.add_argument("--cluster-data", action="store_true", help="With --diarize, also write cluster_data/ plot files (GUI cluster view).")
+    parser.add_argument("--no-cluster-data", action="store_true", help=argparse.SUPPRESS)  # default since --cluster-data
+    parser.add_argument("--diagnostics", action="store_true", help="Print diarization speaker summaries.")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes, each with its own model (CPU nodes).")
+    parser.add_argument("--decode", default="pcm", choices=["pcm", "mp3"], help="pcm = decode once in memory, mp3 = legacy temp MP3.")
+    # Both replace the single Whisper pass; only one decoding mode can apply
+    decoding = parser.add_mutually_exclusive_group()
+    decoding.add_argument("--chunk-minutes", type=float, help="Split long audio at VAD silences into chunks of at most N minutes.")
+    decoding.add_argument("--batched", action="store_true", help="Batched Whisper decoding of 30 s windows (size from BATCH_SIZE_THRESHOLDS).")
+    parser.add_argument("--chunk-workers", type=int, default=1, help="Concurrent chunk workers (processes) in chunked mode.")
+    parser.add_argument("--pipelined", action="store_true", help="Overlap audio prep and output writing with inference.")
+    parser.add_argument("--threads-per-worker", type=int, help="Torch threads per worker (default: cores // workers).")
+    parser.add_argument("--no-cache", action="store_true", help="Do not read or write the per-file artifact cache (artifact_cache/).")
+    parser.add_argument("--clear-cache", action="store_true", help="Delete the artifact cache before the run.")
+    parser.add_argument("--export-only", action="store_true", help="Only render --format from saved transcript records (no transcription).")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    if args.clear_cache:
+        from services.utils_cache import clear_artifact_cache
+        clear_artifact_cache()
+
+    if args.export_only:
+        return export_only(args)
+
+    from services.dependency_check import is_ffmpeg_available
+    if not is_ffmpeg_available():
+        print("❌ FFmpeg is not installed or not in PATH — https://ffmpeg.org/download.html", file=sys.stderr)
+        return 2
+
+    if not os.path.isdir(args.input):
+        print(f"❌ Input directory not found: {args.input}", file=sys.stderr)
+        return 2
+
+    # Imported after argument parsing so --help stays fast
+    from services.utils_models import resolve_model_name
+    from services.utils_pipeline import make_pipeline_settings, run_batch, run_pipelined_batch, warm_up_pipeline
+
+    output_dir = args.output or args.input
+    settings = make_pipeline_settings(
+        model_name=resolve_model_name(args.model, args.language),
+        language=args.language,
+        translate_to_english=args.translate and args.language != "en",
+        use_diarization=args.diarize,
+        output_format=args.format,
+        save_cluster_data=args.diarize and args.cluster_data and not args.no_cluster_data,
+        diagnostics=args.diagnostics,
+        decode_mode=args.decode,
+        chunk_seconds=args.chunk_minutes * 60 if args.chunk_minutes else None,
+        chunk_workers=args.chunk_workers,
+        batched_decoding=args.batched,
+        artifact_cache=not args.no_cache,
+    )
+
+    def on_status(filename, status, job):
+        print(f"[{status}] {filename}")
+
+    start_time = time.time()
+    if args.workers > 1:
+        from services.utils_workers import run_parallel_batch
+        statuses = run_parallel_batch(
+            args.input,
+            output_dir,
+            settings,
+            workers=args.workers,
+            threads_per_worker=args.threads_per_worker,
+            skip_completed=not args.force,
+            on_status=on_status
+        )
+    else:
+        if args.threads_per_worker:
+            import torch
+            torch.set_num_threads(args.threads_per_worker)
+        warm_up_pipeline(settings)
+        batch_fn = run_pipelined_batch if args.pipelined else run_batch
+        statuses = batch_fn(
+            args.input,
+            output_dir,
+            settings,
+            skip_completed=not args.force,
+            on_status=on_status
+        )
+    elapsed = time.time() - start_time
+
+    counts = {s: list(statuses.values()).count(s) for s in ("Completed", "Skipped", "Error")}
+    print(
+        f"✅ Batch finished in {elapsed:.2f} sec — "
+        f"{counts['Completed']} completed, {counts['Skipped']} skipped, {counts['Error']} failed"
+    )
+    if args.workers <= 1:
+        from services.utils_models import get_model_cache_stats
+        cache = get_model_cache_stats()
+        print(
+            f"🧠 Model cache: {cache['hits']} hit(s), {cache['misses']} miss(es), "
+            f"{cache['evictions']} eviction(s), load time {cache['load_time_sec']:.2f} sec"
+        )
+
+    if not args.no_cache and args.workers <= 1:
+        from services.utils_cache import get_cache_stats
+        artifacts = get_cache_stats()
+        print(
+            f"🗄️ Artifact cache: {artifacts['hits']} hit(s), {artifacts['misses']} miss(es), "
+            f"{artifacts['writes']} write(s), {artifacts['evictions']} eviction(s), "
+            f"hashing {artifacts['hash_time_sec']:.2f} sec"
+        )
+
+    if args.diarize and args.workers <= 1:
+        from services.utils_diarize import get_vad_stats
+        vad = get_vad_stats()
+        print(
+            f"🗣️ VAD: {vad['loads']} load(s) in {vad['load_time_sec']:.2f} sec, "
+            f"{vad['inference_calls']} inference call(s) in {vad['inference_time_sec']:.2f} sec"
+        )
+    return 1 if counts["Error"] else 0
+
+
+def export_only(args):
+    """Re-renders outputs from transcript records; needs neither FFmpeg nor a model."""
+    if not os.path.isdir(args.input):
+        print(f"❌ Input directory not found: {args.input}", file=sys.stderr)
+        return 2
+
+    from services.utils_pipeline import export_transcripts
+
+    start_time = time.time()
+    statuses = export_transcripts(
+        args.input,
+        args.output or args.input,
+        args.format,
+        overwrite=args.force,
+        on_status=lambda filename, status, job: print(f"[{status}] {filename}")
+    )
+    elapsed = time.time() - start_time
+
+    counts = {s: list(statuses.values()).count(s) for s in ("Completed", "Skipped", "Missing", "Error")}
+    print(
+        f"✅ Export finished in {elapsed:.2f} sec — {counts['Completed']} exported, "
+        f"{counts['Skipped']} skipped, {counts['Missing']} without a transcript record, {counts['Error']} failed"
+    )
+    return 1 if counts["Error"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,11 +1,18 @@
 # File: transcribe_audio_service/services/dependency_check.py
 
 import shutil
-from tkinter import messagebox
+
+
+def is_ffmpeg_available():
+    """Return True if ffmpeg is available in system PATH (no UI side effects)."""
+    return shutil.which("ffmpeg") is not None
+
 
 def check_ffmpeg():
     """Check if ffmpeg is available in system PATH."""
-    if not shutil.which("ffmpeg"):
+    if not is_ffmpeg_available():
+        from tkinter import messagebox
+
         messagebox.showerror(
             title="Missing Dependency",
             message=(
@@ -20,4 +27,4 @@ def check_ffmpeg():
 
 def check_dependencies():
     """Run all startup dependency checks. Return True if all pass."""
-    return check_ffmpeg()  
\ No newline at end of file
+    return check_ffmpeg()
@@ -3,6 +3,7 @@
 import subprocess
 import tempfile
 import os
+import numpy as np
 from cfg.conf_main import SUPPORTED_AUDIO_EXTENSIONS
 
 
@@ -30,6 +31,120 @@ def prep_whisper_audio(path, temp_dir, target_sr=16000, bitrate="32k"):
     return compressed_mp3_path
 
 
+def load_whisper_pcm(path, target_sr=16000, sample_format="f32"):
+    """
+    Decode audio straight into memory as 16 kHz mono PCM using an FFmpeg pipe.
+
+    This is the decode-once path: the returned buffer can be handed to both
+    Whisper (model.transcribe accepts arrays) and the diarization pipeline,
+    so no temp file, MP3 re-encode or second/third decode is needed.
+
+    Parameters:
+        path (str): Source audio file.
+        target_sr (int): Output sample rate (Whisper expects 16 kHz).
+        sample_format (str): 'f32' (float32 from FFmpeg) or 's16' (int16, scaled to float32).
+
+    Returns:
+        np.ndarray: Writable float32 waveform in [-1, 1].
+    """
+    pcm_formats = {
+        "f32": ("f32le", "pcm_f32le"),
+        "s16": ("s16le", "pcm_s16le"),
+    }
+    if sample_format not in pcm_formats:
+        raise ValueError(f"Unsupported PCM sample format: {sample_format}")
+    container, codec = pcm_formats[sample_format]
+
+    command = [
+        "ffmpeg", "-nostdin",
+        "-threads", "0",
+        "-i", path,
+        "-ac", "1",                    # mono
+        "-ar", str(target_sr),        # 16 kHz
+        "-f", container,
+        "-acodec", codec,
+        "-"
+    ]
+
+    try:
+        raw = subprocess.run(command, capture_output=True, check=True).stdout
+    except subprocess.CalledProcessError as e:
+        raise RuntimeError(f"Failed to decode audio {path}: {e.stderr.decode(errors='ignore')[-500:]}") from e
+
+    if sample_format == "s16":
+        return np.frombuffer(raw, np.int16).astype(np.float32) / 32768.0
+
+    # bytearray keeps the array writable so torch.from_numpy can share it without warnings
+    return np.frombuffer(bytearray(raw), np.float32)
+
+
+def iter_audio_blocks(audio, block_samples, overlap_samples=0, target_sr=16000):
+    """
+    Yields a long recording as overlapping mono float32 blocks, so callers can
+    process it with memory bounded by the block size.
+
+    Parameters:
+        audio (str | np.ndarray): File path (streamed through an FFmpeg pipe) or a
+            16 kHz waveform (blocks are views, nothing is copied).
+        block_samples (int): Samples owned by each block.
+        overlap_samples (int): Extra context samples on both sides of each block.
+        target_sr (int): Decode sample rate for file paths.
+
+    Yields:
+        (int, np.ndarray, Tuple[int, int]): global index of block[0], the block, and
+            the [start, end) global sample range the block owns (no overlap).
+    """
+    if isinstance(audio, np.ndarray):
+        for start in range(0, len(audio), block_samples):
+            lo = max(0, start - overlap_samples)
+            hi = min(len(audio), start + block_samples + overlap_samples)
+            yield lo, audio[lo:hi], (start, min(len(audio), start + block_samples))
+        return
+
+    command = [
+        "ffmpeg", "-nostdin",
+        "-i", audio,
+        "-ac", "1",
+        "-ar", str(target_sr),
+        "-f", "f32le",
+        "-acodec", "pcm_f32le",
+        "-"
+    ]
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+
+    buffer = np.zeros(0, dtype=np.float32)
+    buffer_offset = 0
+    owned_start = 0
+    at_end = False
+    try:
+        while True:
+            # Read until the buffer covers this block plus its trailing overlap
+            needed = owned_start + block_samples + overlap_samples - (buffer_offset + len(buffer))
+            if needed > 0 and not at_end:
+                raw = process.stdout.read(needed * 4)
+                buffer = np.concatenate([buffer, np.frombuffer(raw, np.float32)])
+                at_end = len(raw) < needed * 4
+
+            available = buffer_offset + len(buffer)
+            owned_end = min(owned_start + block_samples, available)
+            if owned_end > owned_start:
+                yield buffer_offset, buffer, (owned_start, owned_end)
+            if at_end and owned_end >= available:
+                break
+
+            # Keep only the overlap the next block needs as leading context
+            keep_from = max(buffer_offset, owned_end - overlap_samples)
+            buffer = buffer[keep_from - buffer_offset:].copy()
+            buffer_offset = keep_from
+            owned_start = owned_end
+    finally:
+        process.stdout.close()
+        return_code = process.wait()
+
+    if return_code != 0:
+        raise RuntimeError(f"Failed to decode audio {audio} (ffmpeg exit code {return_code})")
+
+
 def list_audio_files(directory, extensions=SUPPORTED_AUDIO_EXTENSIONS):
     """
     Returns a list of audio filenames in the directory matching supported extensions.
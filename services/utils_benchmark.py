@@ -0,0 +1,581 @@
+# File: transcribe_audio_service/services/utils_benchmark.py
+"""
+Micro-benchmarks for pipeline hot spots, runnable without the GUI.
+
+Usage:
+    python -m services.utils_benchmark --list
+    python -m services.utils_benchmark whisper-batch --model tiny --windows 16
+"""
+
+import argparse
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+# name -> {"fn": callable, "args": [(flag, kwargs), ...], "help": str}
+BENCHMARKS = {}
+
+
+def register_benchmark(name, help_text, args=()):
+    """Decorator that exposes a benchmark function on the CLI."""
+    def decorator(fn):
+        BENCHMARKS[name] = {"fn": fn, "args": list(args), "help": help_text}
+        return fn
+    return decorator
+
+
+# ────────────────────────────────────────────────
+# Helper Methods
+# ────────────────────────────────────────────────
+
+def time_call(fn, *args, repeat=3, **kwargs):
+    """Returns (best wall time in seconds, last result) over `repeat` runs."""
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn(*args, **kwargs)
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def peak_memory_call(fn, *args, **kwargs):
+    """
+    Returns (wall time in seconds, peak traced allocation in MB, result) for one run.
+    tracemalloc sees numpy/scipy buffers but not numba-internal allocations.
+    """
+    import tracemalloc
+
+    tracemalloc.start()
+    try:
+        t0 = time.perf_counter()
+        result = fn(*args, **kwargs)
+        seconds = time.perf_counter() - t0
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return seconds, peak / 2**20, result
+
+
+def synthetic_speaker_bins(minutes, speakers=4, features=48, seed=0):
+    """
+    1 s bin table (zscore-like features) for `speakers` alternating speakers with
+    2–20 s turns, plus the true speaker per bin.
+    """
+    from services.utils_diarize import make_feature_table
+
+    rng = np.random.default_rng(seed)
+    n_bins = int(minutes * 60)
+    centers = rng.normal(scale=1.0, size=(speakers, features))
+
+    truth = np.empty(n_bins, dtype=np.int64)
+    t = 0
+    while t < n_bins:
+        length = int(rng.integers(2, 21))
+        truth[t:t + length] = rng.integers(speakers)
+        t += length
+
+    matrix = (centers[truth] + rng.normal(scale=1.2, size=(n_bins, features))).astype(np.float32)
+    times = np.arange(n_bins, dtype=np.float64)
+    table = make_feature_table(
+        matrix, [f"f{i}" for i in range(features)], times,
+        time_midpoint=times + 0.5,
+        segment_id=np.arange(n_bins) // 4,
+        new_segment_id=np.arange(n_bins) // 12,
+    )
+    return table, truth
+
+
+def synthetic_speech_audio(seconds, sr=16000, seed=0, pause_s=(0.2, 1.0)):
+    """
+    Speech-like test signal: voiced harmonic bursts (100–250 Hz f0) separated
+    by low-level noise gaps of `pause_s` (min, max) seconds, so VAD, pitch and
+    spectral features all have something realistic to chew on.
+    """
+    rng = np.random.default_rng(seed)
+    n = int(seconds * sr)
+    y = rng.normal(0, 0.002, n).astype(np.float32)
+
+    t = 0.0
+    while t < seconds:
+        burst = rng.uniform(0.8, 3.0)
+        f0 = rng.uniform(100, 250)
+        start, end = int(t * sr), min(n, int((t + burst) * sr))
+        tt = np.arange(end - start) / sr
+        voiced = sum(np.sin(2 * np.pi * f0 * k * tt) / k for k in range(1, 6))
+        y[start:end] += (0.2 * voiced * np.hanning(end - start)).astype(np.float32)
+        t += burst + rng.uniform(*pause_s)
+
+    return y
+
+
+def synthetic_pitch_tones(seconds, sr=16000, hop_length=160, seed=0):
+    """
+    Harmonic test tones (steady and gliding, 80–400 Hz) separated by silences.
+
+    Returns:
+        (np.ndarray, np.ndarray): waveform, and the true f0 per centered frame
+            (NaN in silences and within 3 frames of a tone edge).
+    """
+    rng = np.random.default_rng(seed)
+    n = int(seconds * sr)
+    y = rng.normal(0, 0.001, n).astype(np.float32)
+    n_frames = 1 + n // hop_length
+    truth = np.full(n_frames, np.nan)
+
+    t = 0.2
+    while t < seconds - 0.5:
+        duration = min(rng.uniform(0.4, 1.5), seconds - t)
+        f_start = rng.uniform(80, 400)
+        f_end = f_start * rng.choice([1.0, rng.uniform(0.75, 1.33)])  # steady or glide
+        start = int(t * sr)
+        tt = np.arange(int(duration * sr)) / sr
+        inst_f0 = f_start + (f_end - f_start) * tt / duration
+        phase = 2 * np.pi * np.cumsum(inst_f0) / sr
+        tone = sum(np.sin(k * phase) / k for k in range(1, 6)) * np.hanning(len(tt))
+        y[start:start + len(tt)] += (0.3 * tone).astype(np.float32)
+
+        first = -(-start // hop_length) + 3
+        last = (start + len(tt)) // hop_length - 3
+        frames = np.arange(first, max(first, last))
+        truth[frames] = np.interp(frames * hop_length - start, np.arange(len(tt)), inst_f0)
+
+        t += duration + rng.uniform(0.1, 0.6)
+
+    return y, truth
+
+
+def energy_vad_mask(y, hop_length=160, threshold=0.01):
+    """Frame-level voiced mask from RMS energy — a dependency-free stand-in for Silero VAD."""
+    n_frames = int(np.ceil(len(y) / hop_length))
+    padded = np.pad(y, (0, n_frames * hop_length - len(y)))
+    rms = np.sqrt(np.mean(np.square(padded.reshape(n_frames, hop_length)), axis=1))
+    return rms > threshold
+
+
+def synthetic_frames_and_segments(seconds, segment_seconds=4.0, hop_s=0.01, seed=0):
+    """
+    10 ms frame table (with VAD-style gaps) plus Whisper-like segments with
+    small silences between them and merged new_segment_ids.
+    """
+    rng = np.random.default_rng(seed)
+    times = np.arange(0, seconds, hop_s)
+    times = times[rng.random(len(times)) > 0.3]  # drop ~30% as unvoiced
+
+    segments = []
+    t = 0.0
+    while t < seconds:
+        length = rng.uniform(0.5, 2 * segment_seconds)
+        segments.append({
+            "id": len(segments),
+            "start": round(t, 2),
+            "end": round(min(seconds, t + length), 2),
+            "new_segment_id": len(segments) // 3 + 1,
+        })
+        t += length + rng.uniform(0.0, 0.5)
+
+    frames_df = pd.DataFrame({"time": times, "feature": rng.normal(size=len(times))})
+    return frames_df, segments
+
+
+def _legacy_tag_frames_with_segments(frames_df, segments, frame_time_col="time"):
+    # Reference copy of the original O(frames × segments) implementation
+    new_segment_ids = []
+    original_segment_ids = []
+
+    for frame_time in frames_df[frame_time_col]:
+        match = next(
+            (seg for seg in segments if seg["start"] <= frame_time < seg["end"]),
+            None
+        )
+        if match:
+            new_segment_ids.append(match.get("new_segment_id"))
+            original_segment_ids.append(match.get("id"))
+        else:
+            new_segment_ids.append(None)
+            original_segment_ids.append(None)
+
+    df_out = frames_df.copy()
+    df_out["new_segment_id"] = new_segment_ids
+    df_out["segment_id"] = original_segment_ids
+
+    return df_out[df_out["new_segment_id"].notna()].copy()
+
+
+def _legacy_assign_speakers_to_segments(clustered_df, segments):
+    # Reference copy of the original per-segment mask + mode() implementation
+    labeled_segments = []
+    for segment in segments:
+        mask = (clustered_df["time"] >= segment["start"]) & (clustered_df["time"] <= segment["end"])
+        matched_speakers = clustered_df.loc[mask, "speaker_id"]
+        speaker = int(matched_speakers.mode()[0]) if not matched_speakers.empty else -1
+
+        segment_with_speaker = segment.copy()
+        segment_with_speaker["speaker"] = speaker
+        labeled_segments.append(segment_with_speaker)
+
+    return labeled_segments
+
+
+def _legacy_smooth_labels_fn(labels, window=5):
+    # Reference copy of the original per-label scipy.stats.mode loop
+    import scipy.stats
+
+    smoothed = []
+    for i in range(len(labels)):
+        start = max(0, i - window)
+        end = min(len(labels), i + window + 1)
+        smoothed.append(scipy.stats.mode(labels[start:end], keepdims=False).mode)
+    return np.array(smoothed)
+
+
+def _legacy_apply_time_agg(df, time_col="time", bin_size=1, min_bin_size=1):
+    # Reference copy of the original DataFrame groupby + per-group mode() lambdas
+    df["time_bin"] = (np.floor(df[time_col] / bin_size) * bin_size).round(6)
+
+    bin_counts = df["time_bin"].value_counts()
+    valid_bins = bin_counts[bin_counts >= min_bin_size].index
+    df = df[df["time_bin"].isin(valid_bins)].copy()
+
+    exclude_cols = {time_col, "segment_id", "new_segment_id", "is_voiced", "is_voiced_raw", "time_bin"}
+    feature_cols = [col for col in df.columns if col not in exclude_cols]
+
+    grouped = df.groupby("time_bin")
+    final_df = pd.concat([
+        grouped["segment_id"].agg(lambda x: x.mode().iloc[0] if not x.mode().empty else -1).rename("segment_id"),
+        grouped["new_segment_id"].agg(lambda x: x.mode().iloc[0] if not x.mode().empty else -1).rename("new_segment_id"),
+        grouped["time_bin"].first().rename("time"),
+        grouped[time_col].mean().rename("time_midpoint"),
+        grouped[feature_cols].mean()
+    ], axis=1).reset_index(drop=True)
+
+    return final_df.sort_values("time").reset_index(drop=True)
+
+
+# ────────────────────────────────────────────────
+# Benchmarks
+# ────────────────────────────────────────────────
+
+@register_benchmark(
+    "whisper-batch",
+    "Throughput of batched Whisper decoding per batch size (CPU by default).",
+    args=[
+        ("--model", {"default": "tiny"}),
+        ("--windows", {"type": int, "default": 16}),
+        ("--batch-sizes", {"default": "1,2,4,8,16"}),
+    ],
+)
+def bench_whisper_batch(model="tiny", windows=16, batch_sizes="1,2,4,8,16"):
+    from services.utils_transcribe import transcribe_batched
+    from services.utils_models import get_whisper_model
+
+    get_whisper_model(model)  # exclude model load from the timings
+    audios = [synthetic_speech_audio(30, seed=i) for i in range(windows)]
+
+    rows = []
+    for batch_size in [int(b) for b in str(batch_sizes).split(",")]:
+        seconds, _ = time_call(transcribe_batched, audios, model_name=model, batch_size=batch_size, repeat=1)
+        rows.append({
+            "batch_size": batch_size,
+            "seconds": seconds,
+            "windows_per_sec": windows / seconds,
+            "realtime_factor": (windows * 30) / seconds,
+        })
+
+    return pd.DataFrame(rows)
+
+
+@register_benchmark(
+    "tag-frames",
+    "Vectorized tag_frames_with_segments vs. the legacy per-frame scan.",
+    args=[
+        ("--minutes", {"type": float, "default": 10.0}),
+        ("--segment-seconds", {"type": float, "default": 4.0}),
+    ],
+)
+def bench_tag_frames(minutes=10.0, segment_seconds=4.0):
+    from services.utils_diarize import tag_frames_with_segments, make_feature_table
+
+    frames_df, segments = synthetic_frames_and_segments(minutes * 60, segment_seconds)
+    table = make_feature_table(frames_df[["feature"]].to_numpy(), ["feature"], frames_df["time"])
+
+    legacy_s, legacy = time_call(_legacy_tag_frames_with_segments, frames_df, segments, repeat=1)
+    fast_s, fast = time_call(tag_frames_with_segments, table, segments)
+
+    identical = (
+        np.array_equal(legacy["time"].to_numpy(), fast["time"])
+        and np.array_equal(legacy["new_segment_id"].to_numpy(), fast["new_segment_id"])
+        and np.array_equal(legacy["segment_id"].to_numpy(), fast["segment_id"])
+    )
+    return pd.DataFrame([
+        {"impl": "legacy", "frames": len(frames_df), "segments": len(segments), "seconds": legacy_s, "identical": True},
+        {"impl": "vectorized", "frames": len(frames_df), "segments": len(segments), "seconds": fast_s, "identical": identical},
+    ])
+
+
+@register_benchmark(
+    "assign-speakers",
+    "Prefix-count assign_speakers_to_segments vs. the legacy per-segment mode().",
+    args=[
+        ("--minutes", {"type": float, "default": 30.0}),
+        ("--speakers", {"type": int, "default": 4}),
+        ("--segment-seconds", {"type": float, "default": 4.0}),
+    ],
+)
+def bench_assign_speakers(minutes=30.0, speakers=4, segment_seconds=4.0):
+    from services.utils_diarize import assign_speakers_to_segments
+
+    frames_df, segments = synthetic_frames_and_segments(minutes * 60, segment_seconds, hop_s=0.1)
+    rng = np.random.default_rng(1)
+    clustered_df = pd.DataFrame({
+        "time": frames_df["time"].to_numpy(),
+        "speaker_id": rng.integers(-1, speakers, len(frames_df)),
+    })
+
+    legacy_s, legacy = time_call(_legacy_assign_speakers_to_segments, clustered_df, segments, repeat=1)
+    fast_s, fast = time_call(assign_speakers_to_segments, clustered_df, segments)
+
+    identical = [seg["speaker"] for seg in legacy] == [seg["speaker"] for seg in fast]
+    return pd.DataFrame([
+        {"impl": "legacy", "bins": len(clustered_df), "segments": len(segments), "seconds": legacy_s, "identical": True},
+        {"impl": "vectorized", "bins": len(clustered_df), "segments": len(segments), "seconds": fast_s, "identical": identical},
+    ])
+
+
+@register_benchmark(
+    "smooth-labels",
+    "Vectorized rolling-mode smooth_labels_fn vs. the legacy scipy.stats.mode loop.",
+    args=[
+        ("--labels", {"type": int, "default": 100_000}),
+        ("--window", {"type": int, "default": 5}),
+        ("--speakers", {"type": int, "default": 4}),
+        ("--skip-legacy", {"action": "store_true"}),
+    ],
+)
+def bench_smooth_labels(labels=100_000, window=5, speakers=4, skip_legacy=False):
+    from services.utils_diarize import smooth_labels_fn
+
+    # Speaker runs with ~20% noisy bins, -1 = HDBSCAN noise
+    rng = np.random.default_rng(0)
+    runs = np.repeat(rng.integers(-1, speakers, labels), rng.integers(5, 200, labels))[:labels]
+    noisy = np.where(rng.random(labels) < 0.2, rng.integers(-1, speakers, labels), runs)
+
+    fast_s, fast = time_call(smooth_labels_fn, noisy, window=window)
+    rows = [{"impl": "vectorized", "labels": labels, "window": window, "seconds": fast_s, "identical": True}]
+
+    if not skip_legacy:
+        legacy_s, legacy = time_call(_legacy_smooth_labels_fn, noisy, window=window, repeat=1)
+        rows[0]["identical"] = np.array_equal(legacy, fast)
+        rows.insert(0, {"impl": "legacy", "labels": labels, "window": window, "seconds": legacy_s, "identical": True})
+
+    return pd.DataFrame(rows)
+
+
+@register_benchmark(
+    "features",
+    "run_librosa_identification: whole waveform vs. voiced spans, threads vs. worker processes.",
+    args=[
+        ("--minutes", {"type": float, "default": 5.0}),
+        ("--max-pause", {"type": float, "default": 4.0, "help": "Longest silence between bursts (s)."}),
+        ("--workers", {"type": int, "default": 1, "help": "Also time N feature worker processes."}),
+        ("--extra", {"action": "store_true", "help": "Enable the extra feature families."}),
+    ],
+)
+def bench_features(minutes=5.0, max_pause=4.0, workers=1, extra=False):
+    import librosa
+    from services.utils_diarize import run_librosa_identification
+
+    sr, hop_length = 16000, 160
+    y = synthetic_speech_audio(minutes * 60, sr=sr, pause_s=(0.2, max_pause))
+    is_voiced = energy_vad_mask(y, hop_length)
+    frame_times = librosa.frames_to_time(np.arange(len(is_voiced)), sr=sr, hop_length=hop_length)
+
+    def extract(**options):
+        return run_librosa_identification(
+            y, sr=sr, hop_length=hop_length, is_voiced=is_voiced,
+            frame_times=frame_times, log_power=2, extra_features=extra, **options
+        )
+
+    modes = [
+        ("whole", {"voiced_only": False}),
+        ("voiced_only", {"voiced_only": True}),
+    ]
+    if workers > 1:
+        extract(voiced_only=True, feature_workers=workers)  # start the pool outside the timings
+        modes.append((f"voiced_only ×{workers} proc", {"voiced_only": True, "feature_workers": workers}))
+
+    base = None
+    rows = []
+    for mode, options in modes:
+        seconds, table = time_call(extract, repeat=1, **options)
+        base = base or table
+        same_grid = np.array_equal(base["time"], table["time"])
+        rows.append({
+            "mode": mode,
+            "voiced_frac": is_voiced.mean(),
+            "features": table["features"].shape[1],
+            "seconds": seconds,
+            "max_abs_diff": float(np.abs(base["features"] - table["features"]).max()) if same_grid else float("nan"),
+        })
+    return pd.DataFrame(rows)
+
+
+@register_benchmark(
+    "pitch",
+    "Pitch backends (yin, yin_decimated, autocorr) on synthetic tones: speed and accuracy.",
+    args=[
+        ("--seconds", {"type": float, "default": 60.0}),
+        ("--backends", {"default": "yin,yin_decimated,autocorr"}),
+    ],
+)
+def bench_pitch(seconds=60.0, backends="yin,yin_decimated,autocorr"):
+    from services.utils_diarize import estimate_pitch
+
+    sr, hop_length = 16000, 160
+    y, truth = synthetic_pitch_tones(seconds, sr=sr, hop_length=hop_length)
+    voiced_frames = np.flatnonzero(energy_vad_mask(y, hop_length))
+    scored = ~np.isnan(truth)
+
+    def cents(f0, ref):
+        return np.abs(1200 * np.log2(f0 / ref))
+
+    reference = None
+    rows = []
+    for backend in [b.strip() for b in backends.split(",")]:
+        seconds_taken, f0 = time_call(
+            estimate_pitch, y, sr=sr, hop_length=hop_length, backend=backend, frames=voiced_frames
+        )
+        if backend == "yin":
+            reference = f0
+        error = cents(f0[scored], truth[scored])
+        rows.append({
+            "backend": backend,
+            "seconds": seconds_taken,
+            "median_cents_err": np.median(error),
+            "gross_err_pct": 100 * np.mean(error > 1200 * np.log2(1.2)),  # > 20% off
+            "median_cents_vs_yin": np.median(cents(f0[scored], reference[scored])) if reference is not None else np.nan,
+        })
+
+    return pd.DataFrame(rows)
+
+
+@register_benchmark(
+    "time-agg",
+    "Vectorized apply_time_agg vs. the legacy groupby + mode() lambdas.",
+    args=[
+        ("--minutes", {"type": float, "default": 60.0}),
+        ("--features", {"type": int, "default": 48}),
+        ("--bin-size", {"type": float, "default": 1.0}),
+    ],
+)
+def bench_time_agg(minutes=60.0, features=48, bin_size=1.0):
+    from services.utils_diarize import apply_time_agg, make_feature_table, tag_frames_with_segments
+
+    frames_df, segments = synthetic_frames_and_segments(minutes * 60)
+    rng = np.random.default_rng(2)
+    names = [f"f{i}" for i in range(features)]
+    matrix = rng.normal(size=(len(frames_df), features)).astype(np.float32)
+    table = tag_frames_with_segments(make_feature_table(matrix, names, frames_df["time"]), segments)
+
+    def legacy_input():
+        df = pd.DataFrame(table["features"], columns=names)
+        df.insert(0, "time", table["time"])
+        df["segment_id"] = table["segment_id"]
+        df["new_segment_id"] = table["new_segment_id"]
+        return df
+
+    legacy_s, legacy = time_call(lambda: _legacy_apply_time_agg(legacy_input(), bin_size=bin_size), repeat=1)
+    fast_s, fast = time_call(apply_time_agg, table, bin_size=bin_size)
+
+    identical = (
+        np.array_equal(legacy["time"].to_numpy(), fast["time"])
+        and np.array_equal(legacy["segment_id"].to_numpy(), fast["segment_id"])
+        and np.array_equal(legacy["new_segment_id"].to_numpy(), fast["new_segment_id"])
+        and np.allclose(legacy["time_midpoint"].to_numpy(), fast["time_midpoint"])
+    )
+    max_diff = float(np.abs(legacy[names].to_numpy() - fast["features"]).max())
+    return pd.DataFrame([
+        {"impl": "legacy", "frames": len(table["time"]), "bins": len(legacy), "seconds": legacy_s, "identical": True, "max_abs_diff": 0.0},
+        {"impl": "vectorized", "frames": len(table["time"]), "bins": len(fast["time"]), "seconds": fast_s, "identical": identical, "max_abs_diff": max_diff},
+    ])
+
+
+@register_benchmark(
+    "clustering",
+    "cluster_full_features backends: runtime, peak memory and label agreement (ARI).",
+    args=[
+        ("--minutes", {"type": float, "default": 120.0}),
+        ("--speakers", {"type": int, "default": 4}),
+        ("--backends", {"default": "umap,umap_sampled,pca,kmeans,agglomerative"}),
+        ("--sample-size", {"type": int, "default": 2000}),
+    ],
+)
+def bench_clustering(minutes=120.0, speakers=4, backends="umap,umap_sampled,pca,kmeans,agglomerative", sample_size=2000):
+    from sklearn.metrics import adjusted_rand_score
+    from services.utils_diarize import cluster_full_features, select_table_rows
+
+    table, truth = synthetic_speaker_bins(minutes, speakers)
+    n_bins = len(truth)
+    backends = [b.strip() for b in backends.split(",")]
+
+    # Warm-up on a small slice so numba JIT compilation is not timed
+    warm = select_table_rows(table, np.arange(min(n_bins, 600)))
+    for backend in backends:
+        cluster_full_features(warm, min_cluster_size=10, min_samples=5, backend=backend, sample_size=300)
+
+    reference = None
+    rows = []
+    for backend in backends:
+        seconds, peak_mb, (clustered_df, _) = peak_memory_call(
+            cluster_full_features, table,
+            min_cluster_size=max(5, int(0.02 * n_bins)),
+            min_samples=max(2, int(0.01 * n_bins)),
+            backend=backend, sample_size=sample_size,
+        )
+        labels = clustered_df["speaker_id"].to_numpy()
+        if reference is None:
+            reference = labels
+        rows.append({
+            "backend": backend,
+            "bins": n_bins,
+            "seconds": seconds,
+            "peak_traced_mb": peak_mb,
+            "speakers_found": len(np.unique(labels[labels >= 0])),
+            "noise_pct": 100 * np.mean(labels < 0),
+            "ari_vs_truth": adjusted_rand_score(truth, labels),
+            "ari_vs_first": adjusted_rand_score(reference, labels),
+        })
+    return pd.DataFrame(rows)
+
+
+# ────────────────────────────────────────────────
+# CLI
+# ────────────────────────────────────────────────
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m services.utils_benchmark")
+    parser.add_argument("--list", action="store_true", help="List available benchmarks.")
+    subparsers = parser.add_subparsers(dest="name")
+
+    for name, spec in BENCHMARKS.items():
+        sub = subparsers.add_parser(name, help=spec["help"])
+        for flag, kwargs in spec["args"]:
+            sub.add_argument(flag, **kwargs)
+
+    args = parser.parse_args(argv)
+
+    if args.list or not args.name:
+        for name, spec in BENCHMARKS.items():
+            print(f"{name:<20} {spec['help']}")
+        return 0
+
+    kwargs = {k: v for k, v in vars(args).items() if k not in ("list", "name")}
+    print(f"⏱️ Running benchmark: {args.name} {kwargs}")
+    report = BENCHMARKS[args.name]["fn"](**kwargs)
+    print(report.to_string(index=False, float_format=lambda v: f"{v:.4f}"))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,253 @@
+# File: transcribe_audio_service/services/utils_cache.py
+#
+# Persistent per-file artifact cache. Expensive stage outputs (Whisper segments,
+# VAD timestamps, the time-binned diarization feature table, cluster labels)
+# are stored under keys derived from the audio content hash plus the parameters
+# that produced them, so a re-queued file, an output-format change or a
+# re-clustering run only recomputes what actually changed.
+#
+# JSON holds nested results (Whisper); compressed .npz holds arrays. Writes go
+# to a temp file and are moved into place, so concurrent workers never read a
+# half-written artifact. The directory is kept under ARTIFACT_CACHE['max_gb'] by
+# evicting the least recently used artifacts (a hit refreshes the file's mtime).
+
+import os
+import json
+import hashlib
+import tempfile
+import threading
+import numpy as np
+from pathlib import Path
+from cfg.conf_main import ARTIFACT_CACHE
+
+# Content hashes per (path, size, mtime) so a file is read once per process
+_hash_memo = {}
+_cache_lock = threading.Lock()
+_cache_stats = {"hits": 0, "misses": 0, "writes": 0, "evictions": 0, "hash_time_sec": 0.0}
+
+
+# ────────────────────────────────────────────────
+# Keys
+# ────────────────────────────────────────────────
+
+def file_content_hash(path, chunk_size=1 << 20):
+    """
+    BLAKE2b digest of the file bytes (renaming or moving a file keeps its artifacts).
+
+    Parameters:
+        path (str): Audio file path.
+        chunk_size (int): Read size in bytes.
+
+    Returns:
+        str: 32-character hex digest.
+    """
+    import time
+
+    stat = os.stat(path)
+    memo_key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    with _cache_lock:
+        if memo_key in _hash_memo:
+            return _hash_memo[memo_key]
+
+    start_time = time.perf_counter()
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            digest.update(block)
+
+    with _cache_lock:
+        _hash_memo[memo_key] = digest.hexdigest()
+        _cache_stats["hash_time_sec"] += time.perf_counter() - start_time
+    return _hash_memo[memo_key]
+
+
+def artifact_key(stage, *parts):
+    """
+    Stable key for one stage's artifact: stage name + digest of the JSON-encoded
+    parts (content hash / parent key, parameter dicts).
+
+    Returns:
+        str: e.g. 'whisper-3f2a…'
+    """
+    encoded = json.dumps(parts, sort_keys=True, default=_json_default)
+    return f"{stage}-{hashlib.blake2b(encoded.encode('utf-8'), digest_size=16).hexdigest()}"
+
+
+# ────────────────────────────────────────────────
+# Load / Save
+# ────────────────────────────────────────────────
+
+def get_cache_dir():
+    cache_dir = Path(ARTIFACT_CACHE["dir"]) if ARTIFACT_CACHE["dir"] else (
+        Path(__file__).resolve().parent.parent / "artifact_cache"
+    )
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    return cache_dir
+
+
+def load_json_artifact(key):
+    """Returns the cached object for `key`, or None (missing or unreadable)."""
+    path = get_cache_dir() / f"{key}.json"
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            obj = json.load(f)
+    except FileNotFoundError:
+        return _record(None)
+    except (OSError, ValueError) as e:
+        print(f"⚠️ Ignoring unreadable cache artifact {path.name}: {e}")
+        return _record(None)
+    _touch(path)
+    return _record(obj)
+
+
+def has_json_artifact(key):
+    """True if a JSON artifact exists for `key` (no read, not counted as a hit)."""
+    return (get_cache_dir() / f"{key}.json").exists()
+
+
+def save_json_artifact(key, obj):
+    _atomic_write(
+        get_cache_dir() / f"{key}.json",
+        lambda f: f.write(json.dumps(obj, ensure_ascii=False, default=_json_default).encode("utf-8"))
+    )
+
+
+def load_array_artifact(key):
+    """Returns {name: np.ndarray} for `key`, or None (missing or unreadable)."""
+    path = get_cache_dir() / f"{key}.npz"
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            arrays = {name: data[name] for name in data.files}
+    except FileNotFoundError:
+        return _record(None)
+    except (OSError, ValueError) as e:
+        print(f"⚠️ Ignoring unreadable cache artifact {path.name}: {e}")
+        return _record(None)
+    _touch(path)
+    return _record(arrays)
+
+
+def save_array_artifact(key, arrays):
+    _atomic_write(get_cache_dir() / f"{key}.npz", lambda f: np.savez_compressed(f, **arrays))
+
+
+def load_feature_table(key):
+    """
+    Loads a feature table (see utils_diarize.make_feature_table) saved with
+    save_feature_table.
+
+    Returns:
+        dict | None: The table, or None when not cached.
+    """
+    arrays = load_array_artifact(key)
+    if arrays is None:
+        return None
+
+    table = dict(arrays)
+    table["feature_names"] = [str(name) for name in table["feature_names"]]
+    return table
+
+
+def save_feature_table(key, table):
+    arrays = dict(table)
+    arrays["feature_names"] = np.asarray(table["feature_names"], dtype=str)
+    save_array_artifact(key, arrays)
+
+
+def clear_artifact_cache():
+    """Deletes every cached artifact. Returns the number of files removed."""
+    removed = 0
+    for path in _artifact_files():
+        path.unlink(missing_ok=True)
+        removed += 1
+    print(f"🧹 Cleared artifact cache → {removed} file(s)")
+    return removed
+
+
+def enforce_cache_budget(max_bytes=None):
+    """
+    Deletes least recently used artifacts until the cache fits in `max_bytes`
+    (default: ARTIFACT_CACHE['max_gb']; None there = unbounded).
+
+    Returns:
+        int: Number of artifacts evicted.
+    """
+    if max_bytes is None:
+        if ARTIFACT_CACHE.get("max_gb") is None:
+            return 0
+        max_bytes = int(ARTIFACT_CACHE["max_gb"] * 1024 ** 3)
+
+    entries = []
+    for path in _artifact_files():
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue  # evicted by another worker
+        entries.append((stat.st_mtime, stat.st_size, path))
+
+    total = sum(size for _, size, _ in entries)
+    evicted = 0
+    for _, size, path in sorted(entries, key=lambda entry: entry[0]):
+        if total <= max_bytes:
+            break
+        path.unlink(missing_ok=True)
+        total -= size
+        evicted += 1
+
+    if evicted:
+        with _cache_lock:
+            _cache_stats["evictions"] += evicted
+        print(f"🧹 Artifact cache over budget → evicted {evicted} least recently used file(s)")
+    return evicted
+
+
+def get_cache_stats():
+    """Returns hits/misses/writes/evictions and hashing time for this process."""
+    with _cache_lock:
+        return dict(_cache_stats)
+
+
+# ────────────────────────────────────────────────
+# Helper Methods
+# ────────────────────────────────────────────────
+
+def _artifact_files():
+    return [path for path in get_cache_dir().iterdir() if path.suffix in (".json", ".npz")]
+
+
+def _touch(path):
+    # Marks the artifact as recently used for LRU eviction
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+
+def _record(value):
+    with _cache_lock:
+        _cache_stats["hits" if value is not None else "misses"] += 1
+    return value
+
+
+def _atomic_write(path, write_fn):
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=".tmp_", suffix=path.suffix)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write_fn(f)
+        os.replace(tmp_path, path)
+    except Exception as e:
+        print(f"⚠️ Could not write cache artifact {path.name}: {e}")
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        return
+
+    with _cache_lock:
+        _cache_stats["writes"] += 1
+    enforce_cache_budget()
+
+
+def _json_default(obj):
+    # numpy scalars / arrays inside results and parameter dicts
+    if hasattr(obj, "tolist"):
+        return obj.tolist()
+    return str(obj)
@@ -1,8 +1,9 @@
 # File: transcribe_audio_service/services/utils_debug.py
 
 import os
+import sys
 import time
-import pandas as pd
+import subprocess
 from contextlib import contextmanager
 from cfg.conf_debug import DEBUG_DATA_TRANS  # Make sure this import is valid
 
@@ -25,13 +26,17 @@ def export_debug_csv(df, flag_key):
     Exports a DataFrame as a timestamped CSV file if the associated debug flag is enabled.
 
     Args:
-        df (pd.DataFrame): The data to export.
+        df (pd.DataFrame | callable): The data to export, or a zero-argument callable
+            returning it — lets callers skip building the DataFrame when the flag is off.
         flag_key (str): Also used as filename stem and config key to check in DEBUG_DATA_TRANS.
     """
     if not DEBUG_DATA_TRANS.get(flag_key, False):
         return
 
     try:
+        if callable(df):
+            df = df()
+
         timestamp = time.strftime("%Y%m%d_%H%M%S")
         filename = f"{flag_key}_{timestamp}.csv"
         output_dir = DEBUG_DATA_TRANS.get("output_dir", "./debug_dumps/")
@@ -43,3 +48,77 @@ def export_debug_csv(df, flag_key):
         print(f"📤 [DEBUG] Exported: {full_path}")
     except Exception as e:
         print(f"❌ Failed to export debug CSV for {flag_key}: {e}")
+
+
+# Modules whose cold import time dominates startup (checked by profile_imports)
+PROFILED_IMPORTS = (
+    "torch", "whisper", "librosa", "sklearn", "umap", "hdbscan", "silero_vad",
+    "pandas", "matplotlib.pyplot",
+    "services.utils_pipeline", "services.utils_diarize", "gui.ui_main",
+)
+
+
+def profile_imports(modules=PROFILED_IMPORTS):
+    """
+    Measures the cold import time of each module in a fresh interpreter, so
+    results are not skewed by modules already imported in this process.
+
+    Returns:
+        pd.DataFrame: module, seconds (NaN if the import failed), error
+    """
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    rows = []
+
+    for module in modules:
+        code = (
+            "import time; t0 = time.perf_counter(); "
+            f"import {module}; "
+            "print(time.perf_counter() - t0)"
+        )
+        proc = subprocess.run(
+            [sys.executable, "-c", code], cwd=project_root,
+            capture_output=True, text=True
+        )
+        if proc.returncode == 0:
+            rows.append({"module": module, "seconds": float(proc.stdout.strip().splitlines()[-1]), "error": ""})
+        else:
+            last_line = (proc.stderr.strip().splitlines() or ["unknown error"])[-1]
+            rows.append({"module": module, "seconds": float("nan"), "error": last_line})
+
+    import pandas as pd  # deferred: main.py imports this module before the splash
+
+    return pd.DataFrame(rows).sort_values("seconds", ascending=False, na_position="last").reset_index(drop=True)
+
+
+def heavy_startup_imports(entry="main", modules=PROFILED_IMPORTS):
+    """
+    Lists the PROFILED_IMPORTS modules already loaded after importing `entry`
+    (the code that runs before the splash screen) in a fresh interpreter.
+
+    Returns:
+        list[str] | None: Loaded heavy modules, or None if `entry` failed to import.
+    """
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    code = (
+        f"import sys, {entry}; "
+        f"print('loaded:' + ','.join(m for m in {list(modules)!r} if m in sys.modules))"
+    )
+    proc = subprocess.run([sys.executable, "-c", code], cwd=project_root, capture_output=True, text=True)
+    if proc.returncode != 0:
+        return None
+    # Last marked line: the entry module may print while importing
+    loaded = [line for line in proc.stdout.splitlines() if line.startswith("loaded:")][-1]
+    return [m for m in loaded[len("loaded:"):].split(",") if m]
+
+
+if __name__ == "__main__":
+    # python -m services.utils_debug → import-time profiling report
+    report = profile_imports()
+    print("\n📦 Cold import times (fresh interpreter per module)")
+    print(report.to_string(index=False, float_format=lambda v: f"{v:.3f}"))
+
+    preloaded = heavy_startup_imports()
+    if preloaded is None:
+        print("\n⚠️ Could not import main to check the pre-splash imports")
+    else:
+        print(f"\n🖼️ Loaded before the splash (import main): {', '.join(preloaded) or 'none'}")
@@ -1,47 +1,84 @@
 # File: transcribe_audio_service/services/utils_device.py
-import torch 
 from cfg.conf_main import BATCH_SIZE_THRESHOLDS
 import psutil
 import platform
+import threading
 
-try:
-    import pynvml
-    pynvml.nvmlInit()
-    GPU_AVAILABLE = True
-    print("✔ GPU_AVAILABLE =", GPU_AVAILABLE)
-
-    handle = pynvml.nvmlDeviceGetHandleByIndex(0)
-    name = pynvml.nvmlDeviceGetName(handle).decode("utf-8")
-    memory = pynvml.nvmlDeviceGetMemoryInfo(handle)
-    driver_version = pynvml.nvmlSystemGetDriverVersion().decode("utf-8")
-    cuda_version = pynvml.nvmlSystemGetCudaDriverVersion()
-
-    major = cuda_version // 1000
-    minor = (cuda_version % 1000) // 10
-    formatted_cuda_version = f"{major}.{minor}"
-
-    GPU_INFO = {
-        "name": name,
-        "total_memory_MB": memory.total // 1024**2,
-        "driver_version": driver_version,
-        "cuda_version": formatted_cuda_version,
-    }
+# NVML is initialised lazily on first use (see get_gpu_info) so importing this
+# module stays cheap; torch is only imported by the functions that need it.
+_gpu_info_cache = None
+_gpu_info_lock = threading.Lock()
+
+
+def get_gpu_info():
+    """
+    Initialises NVML once and returns (gpu_available, gpu_info_dict).
+    """
+    global _gpu_info_cache
+
+    with _gpu_info_lock:
+        if _gpu_info_cache is not None:
+            return _gpu_info_cache
+
+        try:
+            import pynvml
+            pynvml.nvmlInit()
+            gpu_available = True
+            print("✔ GPU_AVAILABLE =", gpu_available)
+
+            handle = pynvml.nvmlDeviceGetHandleByIndex(0)
+            name = pynvml.nvmlDeviceGetName(handle).decode("utf-8")
+            memory = pynvml.nvmlDeviceGetMemoryInfo(handle)
+            driver_version = pynvml.nvmlSystemGetDriverVersion().decode("utf-8")
+            cuda_version = pynvml.nvmlSystemGetCudaDriverVersion()
+
+            major = cuda_version // 1000
+            minor = (cuda_version % 1000) // 10
+            formatted_cuda_version = f"{major}.{minor}"
 
-    print(f"🧠 GPU Info: {GPU_INFO}")
+            gpu_info = {
+                "name": name,
+                "total_memory_MB": memory.total // 1024**2,
+                "driver_version": driver_version,
+                "cuda_version": formatted_cuda_version,
+            }
 
-except Exception as e:
-    GPU_AVAILABLE = False
-    GPU_INFO = {"error": str(e)}
-    print("❌ GPU_AVAILABLE =", GPU_AVAILABLE)
-    print("🔍 NVML Exception:", e)
+            print(f"🧠 GPU Info: {gpu_info}")
+
+        except Exception as e:
+            gpu_available = False
+            gpu_info = {"error": str(e)}
+            print("❌ GPU_AVAILABLE =", gpu_available)
+            print("🔍 NVML Exception:", e)
+
+        _gpu_info_cache = (gpu_available, gpu_info)
+        return _gpu_info_cache
+
+
+def __getattr__(name):
+    # Backwards compatible module attributes, resolved on first access
+    if name == "GPU_AVAILABLE":
+        return get_gpu_info()[0]
+    if name == "GPU_INFO":
+        return get_gpu_info()[1]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 def get_device_status():
     """Returns a tuple (device_str, cuda_available_bool)."""
+    import torch
     if torch.cuda.is_available():
         device = torch.cuda.get_device_name(0)
         return (device, True)
     return ("CPU", False)
 
+def get_available_vram():
+    """Returns total VRAM (GB) of the primary CUDA device, or 0 when running on CPU."""
+    import torch
+    if torch.cuda.is_available():
+        props = torch.cuda.get_device_properties(0)
+        return round(props.total_memory / (1024 ** 3), 1)
+    return 0
+
 def get_optimal_batch_size(vram_gb, using_gpu):
     if not using_gpu:
         return BATCH_SIZE_THRESHOLDS["low"]["batch_size"]
@@ -68,9 +105,10 @@ def get_ram_usage():
     return mem.percent, mem.used / (1024**3), mem.total / (1024**3)
 
 def get_gpu_usage():
-    if not GPU_AVAILABLE:
+    if not get_gpu_info()[0]:
         return None
     try:
+        import pynvml
         handle = pynvml.nvmlDeviceGetHandleByIndex(0)
         utilization = pynvml.nvmlDeviceGetUtilizationRates(handle)
         mem_info = pynvml.nvmlDeviceGetMemoryInfo(handle)
@@ -5,90 +5,233 @@ import torch
 from silero_vad import load_silero_vad, get_speech_timestamps
 import pandas as pd
 import numpy as np
-from sklearn.preprocessing import RobustScaler, StandardScaler, MinMaxScaler
+from sklearn.preprocessing import RobustScaler, MinMaxScaler
 from sklearn.decomposition import PCA
-from pandas.api.types import is_numeric_dtype
-import hdbscan
-import scipy.stats
 import time
+import functools
 from concurrent.futures import ThreadPoolExecutor
-import umap
 from pathlib import Path
 import os
 from services.utils_debug import stage_timer, export_debug_csv
+from cfg.conf_main import DIARIZATION_FEATURE_OPTIONS, DIARIZATION_STREAMING, DIARIZATION_CLUSTERING, CLUSTER_PLOT_MAX_POINTS
+from services.utils_audio import iter_audio_blocks
+from services.utils_cache import artifact_key, load_feature_table, save_feature_table, load_array_artifact, save_array_artifact
 from typing import Union
 import re
+import threading
+from copy import deepcopy
+
+
+# YIN analysis window (samples). It is the widest window in feature extraction,
+# so it sets how much extra audio a waveform span needs (see span_context_frames).
+YIN_FRAME_LENGTH = 2048
+
+# Optional feature families (rows per frame), enabled by extra_features
+EXTRA_FEATURE_LAYOUT = [
+    ("zcr", 1),
+    ("spectral_centroid", 1),
+    ("spectral_bandwidth", 1),
+    ("spectral_flatness", 1),
+    ("spectral_rolloff", 1),
+    ("rms", 1),
+    ("chroma", 12),
+]
+
+# Clustering backends for cluster_full_features ('auto' resolves to one of these)
+CLUSTERING_BACKENDS = ("umap", "umap_sampled", "pca", "kmeans", "agglomerative")
+
+# Pitch search range (C2–C7, as in the original librosa.yin call)
+PITCH_FMIN = 65.40639132514966
+PITCH_FMAX = 2093.004522404789
+
+# Process-wide Silero VAD cache (analogous to _model_cache in utils_models).
+# The model is stateful during inference, so calls are serialized on the same lock.
+_vad_model = None
+_vad_lock = threading.RLock()
+_vad_stats = {
+    "loads": 0,
+    "load_time_sec": 0.0,
+    "inference_calls": 0,
+    "inference_time_sec": 0.0,
+    "last_inference_sec": 0.0,
+}
+
+
+def run_diarization_pipeline(audio, whisper_segments, return_summary_only=False, diagnostics=True,ui_callback=None, sr=None, speaker_confidence=False, feature_options=None, streaming=None, clustering_options=None, cluster_data=True, cache_key=None, audio_key=None):
+    """
+    Runs the full unsupervised diarization pipeline.
 
-
-def run_diarization_pipeline(audio_path, whisper_segments, return_summary_only=False, diagnostics=True,ui_callback=None):
+    Parameters:
+        audio (str | np.ndarray): Audio file path, or an already-decoded waveform
+            (e.g. the buffer Whisper just transcribed) to skip a second decode.
+        whisper_segments (list): Whisper segments with 'start', 'end', 'id', 'new_segment_id'.
+        sr (int): Sample rate of `audio` when it is a waveform (default 16 kHz).
+        speaker_confidence (bool): Add 'speaker_confidence' (vote share) to each segment.
+        feature_options (dict): Overrides for DIARIZATION_FEATURE_OPTIONS (cfg/conf_main.py).
+        streaming (bool): Block-wise feature aggregation for very long recordings
+            (None = auto, per DIARIZATION_STREAMING in cfg/conf_main.py).
+        clustering_options (dict): Overrides for DIARIZATION_CLUSTERING (cfg/conf_main.py).
+        cluster_data (bool): Build plot data for the cluster view (False = headless,
+            nothing kept beyond the speaker labels).
+        cache_key (str): Artifact key of the Whisper result for this audio (see
+            utils_cache); enables the persistent feature / label cache. None = no cache.
+        audio_key (str): Key of the decoded audio alone (content hash + decode mode);
+            VAD timestamps are cached under it, so they survive a change of Whisper
+            model or language. None = VAD not cached.
+    """
     diagnostics_snapshots = {}
-    
-
-    with stage_timer(" Load Audio",update_callback=ui_callback):
-        #Step 1: Load original audio
-        y, sr = librosa.load(audio_path, sr=16000, mono=True)
-
-    with stage_timer(" Detect Voice Segments",update_callback=ui_callback):
-
-        #Step 2: Extract only voiced parts
-        speech_timestamps, is_voiced = detect_voice_segments(y, sr=sr, return_mask=True)
-        
-        # Get frame_times BEFORE any filtering
-        frame_times = librosa.frames_to_time(np.arange(len(is_voiced)), sr=sr, hop_length=160)
-       
-
-    with stage_timer(" Feature Extraction",update_callback=ui_callback):
-        
-        #Step 3: Extract Librosa features (frame-level)
-        identify_audio_df = run_librosa_identification(y, sr=sr, is_voiced=is_voiced, frame_times=frame_times,log_power=2)
-    export_debug_csv(identify_audio_df,"get_features")
-        
-    with stage_timer(" Feature Normalization",update_callback=ui_callback):
-       
-        # Step 4: Normalize featuers
-        identify_audio_df = normalize_audio_features(identify_audio_df, scale=True, scale_type="zscore")
-    export_debug_csv(identify_audio_df,"normalize_features")
-
-    with stage_timer(" Segment Tagging",update_callback=ui_callback):
-       
-        #Setp 5 tag_frames_with_segments
-        identify_audio_df = tag_frames_with_segments(identify_audio_df, whisper_segments)
-    export_debug_csv(identify_audio_df,"tag_frames")
-
-    with stage_timer(" Time Aggregation ",update_callback=ui_callback):    
-        #Step 6 apply time aggregation by second
-        data_for_clustering = apply_time_agg(identify_audio_df,bin_size=1)
-    export_debug_csv(identify_audio_df,"agg_time")
-        
-
-    with stage_timer(" Feature Clustering",update_callback=ui_callback):
-        # Step 7: Perform clustering via HDBSCAN & UMAP on selected data
-        clustered_df, speaker_summary = cluster_full_features(
-            data_for_clustering,
-            use_umap=True,
-            min_cluster_size=max(5, int(0.02 * len(data_for_clustering))),
-            min_samples=max(2, int(0.01 * len(data_for_clustering)))
+    options = {**DIARIZATION_FEATURE_OPTIONS, **(feature_options or {})}
+    cluster_options = {**DIARIZATION_CLUSTERING, **(clustering_options or {})}
+
+    if streaming is None:
+        streaming = should_stream_diarization(audio, sr=sr)
+
+    # 🗄️ Artifact cache: features keyed by the Whisper artifact (audio hash + model
+    # params) + feature options; labels additionally by the clustering options
+    features_key = artifact_key("diarization_features", cache_key, options, streaming) if cache_key else None
+    clusters_key = artifact_key("diarization_clusters", features_key, cluster_options) if cache_key else None
+
+    data_for_clustering = load_feature_table(features_key) if features_key else None
+    if data_for_clustering is None:
+        # VAD depends on the audio only → reused across Whisper / feature option changes
+        vad_key = artifact_key("vad", audio_key) if audio_key and not streaming else None
+        cached_vad = load_array_artifact(vad_key) if vad_key else None
+        cached_timestamps = None if cached_vad is None else [
+            {"start": float(start), "end": float(end)}
+            for start, end in zip(cached_vad["start_s"], cached_vad["end_s"])
+        ]
+
+        data_for_clustering, speech_timestamps = extract_clustering_features(
+            audio, whisper_segments, sr=sr, streaming=streaming, options=options,
+            ui_callback=ui_callback, speech_timestamps=cached_timestamps
         )
-    export_debug_csv(identify_audio_df,"get_cluser")
+        if features_key:
+            save_feature_table(features_key, data_for_clustering)
+        if vad_key and cached_vad is None:
+            save_array_artifact(vad_key, {
+                "start_s": np.array([ts["start"] for ts in speech_timestamps], dtype=np.float64),
+                "end_s": np.array([ts["end"] for ts in speech_timestamps], dtype=np.float64),
+            })
+    else:
+        print(f"🗄️ Reusing cached diarization features → {len(data_for_clustering['time'])} bins")
+
+    cached_clusters = load_array_artifact(clusters_key) if clusters_key else None
+    if cached_clusters is not None:
+        print("🗄️ Reusing cached cluster labels")
+        clustered_df, speaker_summary = label_feature_table(data_for_clustering, cached_clusters["labels"])
+        embedding = cached_clusters["embedding"]
+    else:
+        with stage_timer(" Feature Clustering",update_callback=ui_callback):
+            # Step 7: Perform clustering (backend chosen by bin count, see DIARIZATION_CLUSTERING)
+            n_bins = len(data_for_clustering["time"])
+            clustered_df, speaker_summary, embedding = cluster_full_features(
+                data_for_clustering,
+                use_umap=True,
+                min_cluster_size=max(5, int(0.02 * n_bins)),
+                min_samples=max(2, int(0.01 * n_bins)),
+                return_embedding=True,
+                **cluster_options
+            )
+        if clusters_key:
+            save_array_artifact(
+                clusters_key,
+                {"labels": clustered_df["speaker_id"].to_numpy(), "embedding": np.asarray(embedding, dtype=np.float32)}
+            )
+    export_debug_csv(clustered_df,"get_cluser")
     
    
     with stage_timer(" Post Processing",update_callback=ui_callback):
         # Step 8: Post Processing Stage
-        labeled_segments = assign_speakers_to_segments(clustered_df, whisper_segments)
-        export_debug_csv(identify_audio_df,"asgn_speaker")
+        labeled_segments = assign_speakers_to_segments(
+            clustered_df, whisper_segments, return_confidence=speaker_confidence
+        )
+        export_debug_csv(lambda: pd.DataFrame(labeled_segments),"asgn_speaker")
 
         result = {
             "segments": labeled_segments,  # speaker-labeled Whisper segments
-            "cluster_data": clustered_df[["x", "y", "speaker_id"]].copy()
+            # Embedding for the cluster plot (projected to 2D only when viewed)
+            "cluster_data": build_cluster_plot_data(embedding, clustered_df["speaker_id"]) if cluster_data else None
         }
 
         if diagnostics:
             diagnostics_snapshots["frame_level_clustering"] = speaker_summary
+            diagnostics_snapshots["vad_timing"] = pd.DataFrame([get_vad_stats()])
             result["diagnostics"] = diagnostics_snapshots
 
     return result
 
 
+def extract_clustering_features(audio, whisper_segments, sr=None, streaming=False, options=None, ui_callback=None, speech_timestamps=None):
+    """
+    Steps 1–6 of the pipeline: audio → VAD → frame features → normalization →
+    segment tagging → 1 s bins (block by block when streaming).
+
+    Parameters:
+        speech_timestamps (list): VAD speech timestamps (seconds) from an earlier
+            run on this audio; skips Silero VAD. Ignored when streaming.
+
+    Returns:
+        (dict, list | None): Time-binned feature table for clustering, and the VAD
+            speech timestamps (None in streaming mode).
+    """
+    options = options or DIARIZATION_FEATURE_OPTIONS
+
+    if streaming:
+        with stage_timer(" Streaming Feature Aggregation",update_callback=ui_callback):
+            # Steps 1–6 block by block: memory scales with time bins, not frames
+            data_for_clustering = run_streaming_features(
+                audio, whisper_segments, sr=sr, bin_size=1,
+                block_seconds=DIARIZATION_STREAMING["block_seconds"],
+                feature_options=options
+            )
+        export_debug_csv(lambda: feature_table_to_df(data_for_clustering),"agg_time")
+    else:
+        with stage_timer(" Load Audio",update_callback=ui_callback):
+            #Step 1: Load original audio (or reuse the caller's decoded buffer)
+            y, sr = load_diarization_audio(audio, sr=sr)
+
+        with stage_timer(" Detect Voice Segments",update_callback=ui_callback):
+
+            #Step 2: Extract only voiced parts
+            if speech_timestamps is None:
+                speech_timestamps, is_voiced = detect_voice_segments(y, sr=sr, return_mask=True)
+            else:
+                print(f"🗄️ Reusing cached VAD timestamps → {len(speech_timestamps)} voiced segments")
+                is_voiced = speech_frame_mask(speech_timestamps, len(y), sr=sr)
+            
+            # Get frame_times BEFORE any filtering
+            frame_times = librosa.frames_to_time(np.arange(len(is_voiced)), sr=sr, hop_length=160)
+           
+
+        with stage_timer(" Feature Extraction",update_callback=ui_callback):
+            
+            #Step 3: Extract Librosa features (frame-level float32 matrix + metadata)
+            feature_table = run_librosa_identification(
+                y, sr=sr, is_voiced=is_voiced, frame_times=frame_times, log_power=2, **options
+            )
+        export_debug_csv(lambda: feature_table_to_df(feature_table),"get_features")
+            
+        with stage_timer(" Feature Normalization",update_callback=ui_callback):
+           
+            # Step 4: Normalize featuers (in place)
+            feature_table = normalize_audio_features(feature_table, scale=True, scale_type="zscore")
+        export_debug_csv(lambda: feature_table_to_df(feature_table),"normalize_features")
+
+        with stage_timer(" Segment Tagging",update_callback=ui_callback):
+           
+            #Setp 5 tag_frames_with_segments
+            feature_table = tag_frames_with_segments(feature_table, whisper_segments)
+        export_debug_csv(lambda: feature_table_to_df(feature_table),"tag_frames")
+
+        with stage_timer(" Time Aggregation ",update_callback=ui_callback):    
+            #Step 6 apply time aggregation by second
+            data_for_clustering = apply_time_agg(feature_table,bin_size=1)
+            del feature_table  # frame-level matrix no longer needed
+        export_debug_csv(lambda: feature_table_to_df(data_for_clustering),"agg_time")
+
+    return data_for_clustering, speech_timestamps
+
+
 # ────────────────────────────────────────────────
 # Diarization Pipeline Stage Methods
 # ────────────────────────────────────────────────
@@ -102,25 +245,27 @@ def detect_voice_segments(
     max_speech_duration_s=15,
     return_mask=True
 ):
-    try:
-        model = load_silero_vad()
-        print("✅ Silero VAD model loaded (direct import)")
-    except Exception as e:
-        print("❌ ERROR: Failed to load Silero VAD model")
-        raise e
-
-    # 📡 Get VAD timestamps
-    audio_tensor = torch.FloatTensor(y)
-    speech_timestamps = get_speech_timestamps(
-        audio_tensor,
-        model,
-        sampling_rate=sr,
-        threshold=threshold,
-        min_speech_duration_ms=min_speech_duration_ms,
-        max_speech_duration_s=max_speech_duration_s,
-        return_seconds=True
-    )
-    
+    model = get_vad_model()
+
+    # 📡 Get VAD timestamps (tensor shares memory with y — no copy)
+    audio_tensor = as_vad_tensor(y)
+    with _vad_lock:
+        t0 = time.time()
+        speech_timestamps = get_speech_timestamps(
+            audio_tensor,
+            model,
+            sampling_rate=sr,
+            threshold=threshold,
+            min_speech_duration_ms=min_speech_duration_ms,
+            max_speech_duration_s=max_speech_duration_s,
+            return_seconds=True
+        )
+        inference_time = time.time() - t0
+        _vad_stats["inference_calls"] += 1
+        _vad_stats["inference_time_sec"] += inference_time
+        _vad_stats["last_inference_sec"] = inference_time
+
+    print(f"⏱️ VAD inference {inference_time:.2f}s (model load total {_vad_stats['load_time_sec']:.2f}s over {_vad_stats['loads']} load(s))")
 
     if not speech_timestamps:
         raise ValueError("VAD did not detect any voiced segments in the input audio.")
@@ -128,19 +273,22 @@ def detect_voice_segments(
     print(f"🗣️ Detected {len(speech_timestamps)} voiced segments")
 
     if return_mask:
-        n_frames = int(np.ceil(len(y) / hop_length))
-        frame_voiced = np.zeros(n_frames, dtype=bool)
-        for ts in speech_timestamps:
-            start_idx = int(np.floor(ts['start'] * sr / hop_length))
-            end_idx = int(np.ceil(ts['end'] * sr / hop_length))
-            frame_voiced[start_idx:end_idx + 1] = True
-        
-
-        return speech_timestamps, frame_voiced
+        return speech_timestamps, speech_frame_mask(speech_timestamps, len(y), sr=sr, hop_length=hop_length)
 
     return speech_timestamps
 
 
+def speech_frame_mask(speech_timestamps, n_samples, sr=16000, hop_length=160):
+    """Per-frame voiced mask from VAD timestamps in seconds."""
+    n_frames = int(np.ceil(n_samples / hop_length))
+    frame_voiced = np.zeros(n_frames, dtype=bool)
+    for ts in speech_timestamps:
+        start_idx = int(np.floor(ts['start'] * sr / hop_length))
+        end_idx = int(np.ceil(ts['end'] * sr / hop_length))
+        frame_voiced[start_idx:end_idx + 1] = True
+    return frame_voiced
+
+
 
 def run_librosa_identification(
     y,
@@ -152,231 +300,371 @@ def run_librosa_identification(
     n_mfcc=25,
     n_mels=40,
     fmax=4000,
-    log_power=1  # log power exponent (1 = normal, >1 = emphasized, <1 = disallowed)
+    log_power=1,  # log power exponent (1 = normal, >1 = emphasized, <1 = disallowed)
+    voiced_only=False,
+    pad_frames=10,
+    pitch_backend="yin",
+    extra_features=False,
+    feature_workers=1,
+    shard_seconds=60.0
 ):
+    """
+    Extracts frame-level features (MFCC, Δ, ΔΔ, pitch, spectral contrast) for the
+    voiced frames of `y` and returns them as a feature table.
+
+    Parameters:
+        voiced_only (bool): Analyse only padded VAD speech spans instead of the whole
+            waveform. Kept frames land on the same frame grid with the same values
+            (the dB floor of spectral contrast is taken per span).
+        pad_frames (int): Frames of padding around each speech span, giving the
+            Δ/ΔΔ filters (width 9) their context.
+        pitch_backend (str): "yin" | "yin_decimated" | "autocorr" (see estimate_pitch).
+        extra_features (bool): Also extract zcr, centroid, bandwidth, flatness,
+            rolloff, rms and chroma (see feature_layout).
+        feature_workers (int): 1 = thread pool; >1 = that many worker processes
+            writing into a shared-memory matrix (see utils_workers).
+        shard_seconds (float): Longest waveform shard handed to one worker process;
+            spans are cut into shards, each read with overlapping audio context.
+            Only applies when feature_workers > 1: the dB floor of spectral
+            contrast is then taken per shard. With one worker each span is
+            extracted whole, matching single-pass output.
+    """
 
     timings = {}
 
     if log_power < 1:
         raise ValueError("log_power must be >= 1 for meaningful feature extraction.")
 
-    # 🎛️ Step 1: MFCCs, Delta MFCCs, DDelta MFCCs
-    t0 = time.time()
-    mel_spec = librosa.feature.melspectrogram(
-        y=y, sr=sr, n_fft=n_fft, hop_length=hop_length,
-        n_mels=n_mels, fmax=fmax
-    )
-
-    # 🔊 Apply optional log power adjustment
-    mel_spec_powered = np.power(mel_spec, log_power)
-    mfcc = librosa.feature.mfcc(S=librosa.power_to_db(mel_spec_powered), n_mfcc=n_mfcc)
-    timings["mfcc"] = time.time() - t0
+    # ✅ Frame grid: librosa's centered frames; the VAD grid may be slightly shorter
+    grid_frames = 1 + len(y) // hop_length
+    if frame_times is None:
+        frame_times = librosa.frames_to_time(np.arange(grid_frames), sr=sr, hop_length=hop_length)
+    n_frames = min(len(frame_times), grid_frames)
 
-    # 🎚️ Δ MFCCs
-    t1 = time.time()
-    delta_mfcc = librosa.feature.delta(mfcc)
-    timings["delta_mfcc"] = time.time() - t1
+    has_mask = isinstance(is_voiced, np.ndarray) and is_voiced.ndim == 1
 
-    # 🎚️ ΔΔ MFCCs
-    t2 = time.time()
-    ddelta_mfcc = librosa.feature.delta(mfcc, order=2)
-    timings["ddelta_mfcc"] = time.time() - t2
+    # 🗺️ Frame ranges to analyse: padded speech spans, or the whole grid
+    if voiced_only and has_mask:
+        # Spans closer than two contexts would re-read the same samples → merge them
+        spans = voiced_frame_spans(
+            is_voiced[:n_frames], pad_frames, grid_frames,
+            merge_gap=2 * span_context_frames(hop_length, n_fft)
+        )
+        covered = sum(end - start for start, end in spans)
+        print(f"🗺️ Voiced-only features: {len(spans)} span(s), {covered} / {grid_frames} frames analysed")
+    else:
+        spans = [(0, grid_frames)]
 
-    # ✅ Set frame count
-    if frame_times is None:
-        print(f"mel_spec shape: {mel_spec.shape}")
-        print(f"mfcc shape: {mfcc.shape}")
+    if not spans:
+        raise ValueError("No voiced frames to extract features from.")
 
-        n_frames = mfcc.shape[1]
-        
-        if n_frames == 0:
-            raise ValueError("MFCC returned zero frames — possible issue with mel_spec or audio input.")
+    # 🧠 Step 1: Raw per-frame channels (mel, pitch, contrast, ...) for every shard
+    t0 = time.time()
+    grid_voiced = None
+    if has_mask:
+        grid_voiced = np.zeros(grid_frames, dtype=bool)
+        grid_voiced[:n_frames] = is_voiced[:n_frames]
+
+    layout = feature_layout(n_mels=n_mels, extra_features=extra_features)
+    max_frames = max(1, int(shard_seconds * sr / hop_length)) if feature_workers > 1 else grid_frames
+    shards = plan_feature_shards(spans, max_frames=max_frames)
+    n_rows = sum(end - start for start, end in spans)
+    extract_kwargs = {
+        "sr": sr, "hop_length": hop_length, "n_fft": n_fft, "n_mels": n_mels,
+        "fmax": fmax, "pitch_backend": pitch_backend, "extra_features": extra_features,
+    }
 
-        frame_times = librosa.frames_to_time(np.arange(n_frames), sr=sr, hop_length=hop_length)
+    if feature_workers > 1 and len(shards) > 1:
+        from services.utils_workers import extract_features_in_pool
+        raw = extract_features_in_pool(
+            y, shards, (n_rows, layout_width(layout)), grid_voiced, extract_kwargs, workers=feature_workers
+        )
     else:
-        n_frames = len(frame_times)
-
-    debug_df = pd.DataFrame({
-        "frame_index": np.arange(len(is_voiced)),
-        "is_voiced": is_voiced.astype(int),
-        "frame_time": frame_times[:len(is_voiced)]  # Safe slice in case mismatch
-    })
-    print("[DEBUG] VAD mask dumped to CSV")
-
-
-    # 🧠 Step 2: Run remaining features asynchronously
-    results = {}
-
-    def extract_feature(name, fn):
-        t_start = time.time()
-        result = fn()
-        timings[name] = time.time() - t_start
-        results[name] = result
-
-    with ThreadPoolExecutor(max_workers=10) as executor:
-        #executor.submit(extract_feature,"zcr",lambda: librosa.feature.zero_crossing_rate(y=y, frame_length=n_fft, hop_length=hop_length))
-        #executor.submit(extract_feature, "spectral_centroid", lambda: librosa.feature.spectral_centroid(y=y, sr=sr, hop_length=hop_length, n_fft=n_fft))
-        #executor.submit(extract_feature, "spectral_bandwidth", lambda: librosa.feature.spectral_bandwidth(y=y, sr=sr, hop_length=hop_length, n_fft=n_fft))
-        executor.submit(extract_feature, "spectral_contrast", lambda: librosa.feature.spectral_contrast(y=y, sr=sr, hop_length=hop_length, n_fft=n_fft))
-        #executor.submit(extract_feature, "spectral_flatness", lambda: librosa.feature.spectral_flatness(y=y, hop_length=hop_length, n_fft=n_fft))
-        #executor.submit(extract_feature, "spectral_rolloff", lambda: librosa.feature.spectral_rolloff(y=y, sr=sr, hop_length=hop_length, n_fft=n_fft))
-        #executor.submit(extract_feature, "rms", lambda: librosa.feature.rms(y=y, frame_length=n_fft, hop_length=hop_length))
-        executor.submit(extract_feature, "f0", lambda: librosa.yin(y=y, fmin=librosa.note_to_hz('C2'), fmax=librosa.note_to_hz('C7'), sr=sr, hop_length=hop_length))
-        #executor.submit(extract_feature, "chroma", lambda: librosa.feature.chroma_stft(y=y, sr=sr, hop_length=hop_length, n_fft=n_fft))
-
-    # 📦 Build feature DataFrame
-    df = pd.DataFrame({
-        "time": frame_times,
-        **{f"mfcc_{i+1}": mfcc[i][:n_frames] for i in range(n_mfcc)},
-        **{f"delta_mfcc_{i+1}": delta_mfcc[i][:n_frames] for i in range(n_mfcc)},
-        **{f"ddelta_mfcc_{i+1}": ddelta_mfcc[i][:n_frames] for i in range(n_mfcc)},
-        #"zcr": results["zcr"][0][:n_frames],
-        #"spectral_centroid": results["spectral_centroid"][0][:n_frames],
-        #"spectral_bandwidth": results["spectral_bandwidth"][0][:n_frames],
-        #"spectral_flatness": results["spectral_flatness"][0][:n_frames],
-        #"spectral_rolloff": results["spectral_rolloff"][0][:n_frames],
-        #"rms": results["rms"][0][:n_frames],
-        "pitch": results["f0"][:n_frames],
-        **{f"spectral_contrast_{i+1}": results["spectral_contrast"][i][:n_frames] for i in range(results["spectral_contrast"].shape[0])}
-        #**{f"chroma_{i+1}": results["chroma"][i][:n_frames] for i in range(results["chroma"].shape[0])}
-    })
- 
-
-    # 🧹 Filter by VAD mask
-    if isinstance(is_voiced, np.ndarray) and is_voiced.ndim == 1:
-        # 🔍 Add both versions for debug dump
-        df["is_voiced_raw"] = is_voiced.astype(int)  # 1 = speech, 0 = non-speech
-        df["is_voiced"] = is_voiced  # Boolean mask
-
-        # 🧠 Optional debug
-        print(f"[DEBUG] VAD mask True count: {np.sum(is_voiced)} / {len(is_voiced)}")
-
-        # ✅ Filter and return only voiced frames
-        df_filtered = df[df["is_voiced"]].reset_index(drop=True)
-
-        # 🧪 Save post-filter CSV
-        print(f"[DEBUG] VAD mask applied: {df_filtered.shape[0]} voiced frames retained")
-
-        return df_filtered
+        raw = np.empty((n_rows, layout_width(layout)), dtype=np.float32)
+        with ThreadPoolExecutor(max_workers=min(10, len(shards))) as executor:
+            list(executor.map(
+                lambda shard: extract_shard_features(
+                    y, shard, raw,
+                    None if grid_voiced is None else grid_voiced[shard[0]:shard[1]],
+                    **extract_kwargs
+                ),
+                shards
+            ))
+    timings["shard_features"] = time.time() - t0
+    channels = split_layout(raw, layout)
+
+    # 🎛️ Step 2: MFCCs on the assembled grid (one global dB reference)
+    t1 = time.time()
+    mel_spec_powered = np.power(channels["mel"], log_power)  # 🔊 optional log power adjustment
+    mfcc = librosa.feature.mfcc(S=librosa.power_to_db(mel_spec_powered), n_mfcc=n_mfcc)
+    timings["mfcc"] = time.time() - t1
 
-    return df
+    # 🎚️ Δ / ΔΔ MFCCs, per span so the filters never straddle a gap
+    t2 = time.time()
+    bounds = np.cumsum([0] + [end - start for start, end in spans])
+    mfcc_spans = [mfcc[:, a:b] for a, b in zip(bounds[:-1], bounds[1:])]
+    delta_mfcc = np.concatenate([span_delta(part, order=1) for part in mfcc_spans], axis=1)
+    ddelta_mfcc = np.concatenate([span_delta(part, order=2) for part in mfcc_spans], axis=1)
+    timings["delta_mfcc"] = time.time() - t2
+
+    # 🧹 Rows to keep: voiced frames only (all frames when no VAD mask is given)
+    frame_index = np.concatenate([np.arange(start, end) for start, end in spans])
+    in_grid = frame_index < n_frames
+    if has_mask:
+        voiced = np.zeros(len(frame_index), dtype=bool)
+        voiced[in_grid] = is_voiced[frame_index[in_grid]]
+        keep = np.flatnonzero(voiced)
+        print(f"[DEBUG] VAD mask True count: {len(keep)} / {len(is_voiced)}")
+    else:
+        keep = np.flatnonzero(in_grid)
+
+    # 📦 Assemble the (frames × features) float32 matrix, voiced rows only
+    blocks = [
+        ("mfcc", mfcc),
+        ("delta_mfcc", delta_mfcc),
+        ("ddelta_mfcc", ddelta_mfcc),
+    ] + [(name, channels[name]) for name, _ in layout if name != "mel"]
+    feature_names = []
+    for name, block in blocks:
+        feature_names += [name] if block.shape[0] == 1 else [f"{name}_{i+1}" for i in range(block.shape[0])]
+
+    features = np.empty((len(keep), len(feature_names)), dtype=np.float32)
+    col = 0
+    for _, block in blocks:
+        features[:, col:col + block.shape[0]] = block[:, keep].T
+        col += block.shape[0]
+
+    print(f"[DEBUG] Feature matrix: {features.shape[0]} frames × {features.shape[1]} features")
+
+    return make_feature_table(
+        features,
+        feature_names,
+        time=np.asarray(frame_times)[frame_index[keep]],
+        is_voiced=np.ones(len(keep), dtype=bool)
+    )
 
 
 def normalize_audio_features(
-    df,
+    table,
     scale=True,
     scale_type="zscore",  # ✅ Gemini recommendation
     zero_handling="replace",  # ✅ Gemini recommendation
-    small_constant=1e-6,
-    exclude_columns=["time", "is_voiced_raw", "is_voiced"]
+    small_constant=1e-6
 ):
-    normalized_df = df.copy()
-
-    numeric_cols = [
-        col for col in df.columns
-        if col not in exclude_columns and is_numeric_dtype(df[col])
-    ]
-
+    """
+    Scales the feature matrix of a feature table in place and returns the table.
+    Metadata arrays (time, voiced mask, segment ids) are never scaled.
+    """
     if not scale:
-        return normalized_df
+        return table
 
-    feature_matrix = normalized_df[numeric_cols].values
+    feature_matrix = table["features"]
 
     # ✅ Replace all-zero rows with a small constant to avoid distortions
     if zero_handling == "replace":
-        zero_mask = np.abs(feature_matrix).sum(axis=1) < small_constant
-        feature_matrix[zero_mask] = small_constant
+        replace_zero_rows(feature_matrix, small_constant)
 
     # ✅ Choose scaler based on type
+    if scale_type == "zscore":
+        # Same result as StandardScaler, without materializing float64 copies
+        mean, std = column_mean_std(feature_matrix)
+        feature_matrix -= mean.astype(np.float32)
+        feature_matrix /= std.astype(np.float32)
+        return table
+
     if scale_type == "robust":
         scaler = RobustScaler()
-    elif scale_type == "zscore":
-        scaler = StandardScaler()
     else:
         scaler = MinMaxScaler()
 
-    normalized_df[numeric_cols] = scaler.fit_transform(feature_matrix)
+    feature_matrix[:] = scaler.fit_transform(feature_matrix)
 
-    return normalized_df
+    return table
 
 
-def apply_time_agg(df, time_col="time", bin_size=0, min_bin_size=1):
+def apply_time_agg(table, bin_size=0, min_bin_size=1):
     """
     Aggregates frame-level audio features into time-based bins (no segment overlap constraints).
 
+    Fully vectorized: integer bin index per frame, np.add.reduceat sums over
+    the bin-sorted frames, and dominant_value_per_bin for the segment ids.
+
     Parameters:
-        df (pd.DataFrame): Frame-level data with time and features.
-        time_col (str): Column representing time in seconds.
+        table (dict): Frame-level feature table (see make_feature_table) with segment ids.
         bin_size (float): Size of each time bin (0 = return unbinned).
         min_bin_size (int): Minimum number of frames per bin to retain.
 
     Returns:
-        pd.DataFrame: Time-aggregated features with bin time and midpoint.
+        dict: Feature table of per-bin mean features, with 'time' (bin start),
+            'time_midpoint' and the dominant 'segment_id' / 'new_segment_id'.
     """
 
     if bin_size == 0:
         print('bin size 0 caught')
-        return df
+        return table
 
-    # ⏱ Create pure time bins (no segment constraint)
-    df["time_bin"] = (np.floor(df[time_col] / bin_size) * bin_size).round(6)
+    # ⏱ Integer time bins (no segment constraint), frames ordered by bin
+    bin_index = np.floor(table["time"] / bin_size).astype(np.int64)
+    order = None
+    if np.any(bin_index[1:] < bin_index[:-1]):
+        order = np.argsort(bin_index, kind="stable")
+        bin_index = bin_index[order]
 
-    # 🧼 Remove underpopulated bins
-    bin_counts = df["time_bin"].value_counts()
-    valid_bins = bin_counts[bin_counts >= min_bin_size].index
-    df = df[df["time_bin"].isin(valid_bins)].copy()
+    def rows(values):
+        return values if order is None else values[order]
 
-    if df.empty:
-        raise ValueError("Aggregation failed: all bins under min_bin_size.")
+    bins, bin_starts, bin_counts = np.unique(bin_index, return_index=True, return_counts=True)
 
-    # 🧼 Define features to aggregate (exclude control/meta columns)
-    exclude_cols = {
-        time_col, "segment_id", "new_segment_id", "is_voiced", "is_voiced_raw", "time_bin"
-    }
-    feature_cols = [col for col in df.columns if col not in exclude_cols]
+    # 🧼 Remove underpopulated bins
+    valid = bin_counts >= min_bin_size
+    if not valid.any():
+        raise ValueError("Aggregation failed: all bins under min_bin_size.")
 
-    # 🧮 Group by time_bin
-    grouped = df.groupby("time_bin")
-    features_mean_df = grouped[feature_cols].mean()
-    time_midpoint_df = grouped[time_col].mean().rename("time_midpoint")
+    # 🧮 Per-bin means (float64 accumulation, stored as float32)
+    feature_sums = np.add.reduceat(rows(table["features"]), bin_starts, axis=0, dtype=np.float64)
+    time_sums = np.add.reduceat(rows(table["time"]), bin_starts)
+    counts = bin_counts[:, np.newaxis]
 
     # 🆔 Optional: retain dominant segment IDs for metadata reference
-    segment_id_df = grouped["segment_id"].agg(lambda x: x.mode().iloc[0] if not x.mode().empty else -1)
-    new_segment_id_df = grouped["new_segment_id"].agg(lambda x: x.mode().iloc[0] if not x.mode().empty else -1)
+    _, segment_ids = dominant_value_per_bin(bin_index, rows(table["segment_id"]))
+    _, new_segment_ids = dominant_value_per_bin(bin_index, rows(table["new_segment_id"]))
+
+    return make_feature_table(
+        (feature_sums / counts)[valid],
+        table["feature_names"],
+        time=np.round(bins[valid] * bin_size, 6),
+        time_midpoint=(time_sums / bin_counts)[valid],
+        segment_id=segment_ids[valid],
+        new_segment_id=new_segment_ids[valid]
+    )
 
-    # 🧩 Combine all parts
-    final_df = pd.concat([
-        segment_id_df.rename("segment_id"),
-        new_segment_id_df.rename("new_segment_id"),
-        grouped["time_bin"].first().rename("time"),
-        time_midpoint_df,
-        features_mean_df
-    ], axis=1).reset_index(drop=True)
 
-    final_df = final_df.sort_values("time").reset_index(drop=True)
+def run_streaming_features(
+    audio,
+    whisper_segments,
+    sr=None,
+    bin_size=1,
+    min_bin_size=1,
+    block_seconds=600,
+    feature_options=None,
+    hop_length=160
+):
+    """
+    Streaming counterpart of steps 1–6 (load → VAD → features → z-score → tag →
+    bin). Audio is read in overlapping blocks; each block's frames are folded into
+    per-bin running sums and then dropped, so memory is bounded by the number of
+    time bins (plus one block), not the number of frames.
 
-    return final_df
+    Z-scoring commutes with bin means, so bins are scaled at the end from global
+    per-feature sums. Bins and segment ids match the in-memory path; features
+    match up to float rounding, except that VAD and the 80 dB floor of the MFCC
+    power_to_db are evaluated per block (visible only in Δ/ΔΔ near quiet edges).
+
+    Parameters:
+        audio (str | np.ndarray): File path (streamed via FFmpeg) or waveform.
+        whisper_segments (list): Whisper segments with 'start', 'end', 'id', 'new_segment_id'.
+        sr (int): Sample rate of `audio` when it is a waveform (default 16 kHz).
+        block_seconds (float): Audio owned by each block.
+        feature_options (dict): run_librosa_identification options.
+
+    Returns:
+        dict: Binned feature table, as apply_time_agg(normalize_audio_features(...)).
+    """
+    options = dict(feature_options or DIARIZATION_FEATURE_OPTIONS)
+    target_sr = 16000
+
+    if isinstance(audio, np.ndarray):
+        audio, _ = load_diarization_audio(audio, sr=sr, target_sr=target_sr)
+
+    # Frame grid stays aligned across blocks: block edges fall on hop boundaries
+    context_frames = 2 * span_context_frames(hop_length) + options.get("pad_frames", 10) + 8
+    block_samples = max(1, int(block_seconds * target_sr) // hop_length) * hop_length
+    overlap_samples = context_frames * hop_length
+
+    accumulator = new_bin_accumulator(bin_size)
+    n_blocks = 0
+
+    for offset, block, (owned_lo, owned_hi) in iter_audio_blocks(audio, block_samples, overlap_samples, target_sr):
+        n_blocks += 1
+        try:
+            _, is_voiced = detect_voice_segments(block, sr=target_sr, return_mask=True)
+        except ValueError:
+            print(f"🔇 Block {n_blocks}: no speech detected, skipped")
+            continue
+
+        first_frame = offset // hop_length
+        frame_times = librosa.frames_to_time(first_frame + np.arange(len(is_voiced)), sr=target_sr, hop_length=hop_length)
+
+        table = run_librosa_identification(
+            block, sr=target_sr, hop_length=hop_length, is_voiced=is_voiced,
+            frame_times=frame_times, log_power=2, **options
+        )
+
+        # Keep only frames this block owns; overlap frames belong to neighbours
+        owned = (table["time"] >= owned_lo / target_sr) & (table["time"] < owned_hi / target_sr)
+        table = select_table_rows(table, owned)
+
+        replace_zero_rows(table["features"])
+        accumulate_frame_stats(accumulator, table)
+        accumulate_bins(accumulator, tag_frames_with_segments(table, whisper_segments))
+
+    print(f"🌊 Streamed {n_blocks} block(s) → {accumulator['frames']} voiced frames folded into time bins")
+    return finalize_bins(accumulator, min_bin_size=min_bin_size)
 
 
 def cluster_full_features(
-    df,
+    table,
     min_cluster_size=None,
     min_samples=None,
     confidence_threshold=0.1,
     smooth_labels=True,
     smoothing_window=5,
     use_umap=True,
+    backend="umap",
+    umap_max_intervals=20_000,
+    sampled_max_intervals=100_000,
+    sample_size=10_000,
+    n_speakers=None,
+    max_speakers=8,
+    umap_low_memory=False,
+    umap_n_jobs=1,
+    return_embedding=False,
 ):
+    """
+    Clusters time-binned features into speaker labels.
+
+    Backends (see CLUSTERING_BACKENDS):
+        umap           full UMAP (15-D) + HDBSCAN — the original path
+        umap_sampled   UMAP fitted on a stratified sample of `sample_size` bins,
+                       `transform` for the rest + HDBSCAN (see apply_umap)
+        pca            PCA (15-D) + HDBSCAN
+        kmeans         PCA + mini-batch k-means with `n_speakers` (or an estimate)
+        agglomerative  PCA + Ward clustering of a sample, nearest centroid for the rest
+    'auto' picks umap / umap_sampled / kmeans by interval count. use_umap=False
+    keeps the legacy path: HDBSCAN directly on the features.
+
+    No plot projection is computed here: with return_embedding=True the clustering
+    embedding is returned as well, and build_cluster_plot_data turns it into plot
+    data whose 2D projection is only made when the plot is viewed.
 
-    exclude = ["time","segment_id", "new_segment_id", "time_midpoint","is_voiced_raw","is_voiced"]
-    feature_cols = [col for col in df.columns if col not in exclude]
-    
-    feature_matrix = df[feature_cols].fillna(0).values
-    export_debug_csv(pd.DataFrame(feature_matrix),"ft_matrix")
-    
-    
-    # Dimensionality reduction (UMAP or passthrough)
+    Returns:
+        (pd.DataFrame, pd.DataFrame[, np.ndarray]): Per-bin metadata with speaker_id,
+            the per-speaker bin counts and, optionally, the clustering embedding.
+    """
+
+    feature_matrix = table["features"]
+    if np.isnan(feature_matrix).any():
+        feature_matrix = np.where(np.isnan(feature_matrix), 0, feature_matrix).astype(np.float32)
+    export_debug_csv(lambda: pd.DataFrame(feature_matrix),"ft_matrix")
+
+    n_interval = len(feature_matrix)  # represents time-binned intervals 
     if use_umap:
+        backend = select_clustering_backend(n_interval, backend, umap_max_intervals, sampled_max_intervals)
+    else:
+        backend = None
+
+    # Dimensionality reduction (UMAP, PCA or passthrough)
+    if backend in ("umap", "umap_sampled"):
         umap_params = {
             "n_neighbors": 15,
             "min_dist": 0.1,
@@ -385,71 +673,231 @@ def cluster_full_features(
             "n_epochs": 200,
             "random_state": 69
         }
-        X_cluster = apply_umap(feature_matrix, umap_params)
+        sampled = backend == "umap_sampled"
+        X_cluster = apply_umap(
+            feature_matrix, umap_params,
+            sample_size=sample_size if sampled else None,
+            strata=table.get("new_segment_id") if sampled else None,
+            low_memory=umap_low_memory,
+            n_jobs=umap_n_jobs
+        )
+    elif backend is not None:
+        n_components = min(15, feature_matrix.shape[1], n_interval)
+        X_cluster = PCA(n_components=n_components, random_state=69).fit_transform(feature_matrix)
     else:
         X_cluster = feature_matrix
 
-    n_interval = len(df)  # represents time-binned intervals 
+    if backend in ("kmeans", "agglomerative"):
+        n_speakers = n_speakers or estimate_speaker_count(X_cluster, max_speakers=max_speakers)
+        print(f"🧪 Clustering {n_interval} intervals → {backend}, n_speakers={n_speakers}")
+        labels = partition_clusters(X_cluster, n_speakers, backend, sample_size=sample_size)
+    else:
+        min_cluster_size = min_cluster_size or max(30, int(0.005 * n_interval))
+        min_samples = min_samples or max(10, int(0.001 * n_interval))
 
-    min_cluster_size = min_cluster_size or max(30, int(0.005 * n_interval))
-    min_samples = min_samples or max(10, int(0.001 * n_interval))
+        print(
+            f"🧪 Clustering {n_interval} intervals → {backend or 'features'} + HDBSCAN, "
+            f"min_cluster_size={min_cluster_size}, min_samples={min_samples}"
+        )
 
-    print(f"🧪 Clustering {n_interval} intervals → min_cluster_size={min_cluster_size}, min_samples={min_samples}")
+        import hdbscan  # deferred: slow import, only needed once clustering runs
 
-    clusterer = hdbscan.HDBSCAN(
-        min_cluster_size=min_cluster_size,
-        min_samples=min_samples,
-    ).fit(X_cluster)
+        clusterer = hdbscan.HDBSCAN(
+            min_cluster_size=min_cluster_size,
+            min_samples=min_samples,
+        ).fit(X_cluster)
+        labels = clusterer.labels_
 
-    labels = clusterer.labels_
     if smooth_labels:
         labels = smooth_labels_fn(labels, window=smoothing_window)
     
-    # Add speaker IDs to output DataFrame
-    clustered_df = df.copy()
-    clustered_df["speaker_id"] = labels
-   
+    clustered_df, summary_df = label_feature_table(table, labels)
+    
+    if return_embedding:
+        return clustered_df, summary_df, X_cluster
+    return clustered_df, summary_df
 
-    # 2D projection for plotting
-    if use_umap and X_cluster.shape[1] >= 2:
-        clustered_df["x"] = X_cluster[:, 0]
-        clustered_df["y"] = X_cluster[:, 1]
-    else:
-        pca_fallback = PCA(n_components=6, random_state=69)
-        coords = pca_fallback.fit_transform(X_cluster)
-        clustered_df["x"] = coords[:, 0]
-        clustered_df["y"] = coords[:, 1]
-        print("📉 UMAP disabled — fallback PCA projection used for cluster plot.")
 
-    # Speaker summary
+def label_feature_table(table, labels):
+    """
+    Per-bin metadata (feature table row columns) with 'speaker_id', plus the
+    per-speaker bin counts.
+    """
+    clustered_df = pd.DataFrame({key: table[key] for key in table_row_keys(table)})
+    clustered_df["speaker_id"] = labels
+
     summary_df = clustered_df.groupby("speaker_id").size().reset_index(name="frame_count")
-    
     return clustered_df, summary_df
 
 
+def build_cluster_plot_data(embedding, speaker_ids, max_points=CLUSTER_PLOT_MAX_POINTS):
+    """
+    Plot data for the cluster view: speaker_id plus the clustering embedding
+    (emb_0 … emb_n), thinned to at most `max_points` evenly spaced bins.
+
+    The 2D projection is left to utils_output.project_cluster_plot, which runs
+    when a plot is actually displayed.
+
+    Parameters:
+        embedding (np.ndarray): Clustering embedding (bins × dims).
+        speaker_ids (array-like): Speaker label per bin.
+        max_points (int): Upper bound on plotted bins (None = all).
+
+    Returns:
+        pd.DataFrame: 'speaker_id' and 'emb_*' columns (float32).
+    """
+    speaker_ids = np.asarray(speaker_ids)
+    rows = np.arange(len(speaker_ids))
+    if max_points and len(rows) > max_points:
+        rows = np.unique(np.linspace(0, len(rows) - 1, max_points).astype(np.int64))
+
+    plot_df = pd.DataFrame(
+        np.asarray(embedding[rows], dtype=np.float32),
+        columns=[f"emb_{i}" for i in range(embedding.shape[1])]
+    )
+    plot_df.insert(0, "speaker_id", speaker_ids[rows])
+    return plot_df
+
+
+def select_clustering_backend(n_interval, backend="auto", umap_max_intervals=20_000, sampled_max_intervals=100_000):
+    """
+    Resolves the clustering backend. 'auto' keeps full UMAP for typical files and
+    switches to cheaper backends as the kNN graph would grow super-linearly.
+    """
+    if backend != "auto":
+        if backend not in CLUSTERING_BACKENDS:
+            raise ValueError(f"Unknown clustering backend '{backend}' (expected one of {CLUSTERING_BACKENDS})")
+        return backend
+
+    if n_interval <= umap_max_intervals:
+        return "umap"
+    if n_interval <= sampled_max_intervals:
+        return "umap_sampled"
+    return "kmeans"
+
+
+def sample_rows(n, sample_size, random_state=69):
+    """Sorted uniform sample of row indices (all rows when n <= sample_size)."""
+    if not sample_size or n <= sample_size:
+        return np.arange(n)
+    rng = np.random.default_rng(random_state)
+    return np.sort(rng.choice(n, size=sample_size, replace=False))
+
+
+def estimate_speaker_count(X, max_speakers=8, sample_size=5000, random_state=69):
+    """
+    Estimates the number of speakers as the k in [2, max_speakers] with the best
+    silhouette score of a k-means fit on a sample of the bins.
+
+    Parameters:
+        X (np.ndarray): Reduced feature matrix (bins × dims).
+        max_speakers (int): Largest k tried.
+        sample_size (int): Rows used for the k-means fits and silhouette scores.
+
+    Returns:
+        int: Estimated speaker count (1 when there are too few bins to compare).
+    """
+    from sklearn.cluster import MiniBatchKMeans
+    from sklearn.metrics import silhouette_score
+
+    X_sample = X[sample_rows(len(X), sample_size, random_state)]
+    max_k = min(max_speakers, len(X_sample) - 1)
+    if max_k < 2:
+        return 1
+
+    best_k, best_score = 2, -1.0
+    for k in range(2, max_k + 1):
+        labels = MiniBatchKMeans(n_clusters=k, n_init=3, random_state=random_state).fit_predict(X_sample)
+        if len(np.unique(labels)) < 2:
+            continue
+        score = silhouette_score(X_sample, labels)
+        if score > best_score:
+            best_k, best_score = k, score
+
+    print(f"🔢 Estimated speaker count → {best_k} (silhouette {best_score:.3f})")
+    return best_k
+
+
+def partition_clusters(X, n_clusters, backend="kmeans", sample_size=10_000, random_state=69):
+    """
+    Fixed-k clustering of the reduced bins (no noise label).
+
+    kmeans fits mini-batch k-means on all rows. agglomerative runs Ward linkage
+    (O(n²) memory) on a sample and assigns every other row to the nearest
+    cluster centroid.
+    """
+    from sklearn.cluster import MiniBatchKMeans, AgglomerativeClustering
+
+    n_clusters = max(1, min(int(n_clusters), len(X)))
+    if backend == "kmeans":
+        return MiniBatchKMeans(n_clusters=n_clusters, n_init=3, random_state=random_state).fit_predict(X)
+
+    rows = sample_rows(len(X), sample_size, random_state)
+    sample_labels = AgglomerativeClustering(n_clusters=n_clusters, linkage="ward").fit_predict(X[rows])
+    if len(rows) == len(X):
+        return sample_labels
+
+    centroids = np.stack([X[rows][sample_labels == k].mean(axis=0) for k in range(n_clusters)])
+    distances = (
+        np.einsum("ij,ij->i", X, X)[:, np.newaxis]
+        - 2 * X @ centroids.T
+        + np.einsum("ij,ij->i", centroids, centroids)
+    )
+    labels = distances.argmin(axis=1)
+    labels[rows] = sample_labels
+    return labels
+
 
 def smooth_labels_fn(labels, window=5):
     """
     Applies a rolling mode filter to stabilize speaker label assignments.
+
+    Each output is the most frequent label in [i - window, i + window]
+    (clipped at the edges), smallest label on ties — the same result as
+    scipy.stats.mode per window. Counts come from cumulative sums of one-hot
+    label codes, so the cost is O(n × n_labels) with no Python-level loop.
+
+    Parameters:
+        labels (np.ndarray): 1D integer labels (e.g. HDBSCAN output, -1 = noise).
+        window (int): Half-width of the window in bins.
+
+    Returns:
+        np.ndarray: Smoothed labels, same dtype as the input.
     """
-    smoothed = []
-    for i in range(len(labels)):
-        start = max(0, i - window)
-        end = min(len(labels), i + window + 1)
-        segment = labels[start:end]
-        mode = scipy.stats.mode(segment, keepdims=False).mode
-        smoothed.append(mode)
-    return np.array(smoothed)
+    labels = np.asarray(labels)
+    n = len(labels)
+    if n == 0 or window <= 0:
+        return labels.copy()
+
+    idx = np.arange(n)
+    lo = np.maximum(idx - window, 0)
+    hi = np.minimum(idx + window + 1, n)
 
+    alphabet, codes = np.unique(labels, return_inverse=True)
+    counts = count_labels_in_ranges(codes, lo, hi, n_labels=len(alphabet))
 
-def apply_umap(X, params=None, verbose=True):
+    # argmax returns the first maximum → smallest label wins ties
+    return alphabet[counts.argmax(axis=1)]
+
+
+def apply_umap(X, params=None, verbose=True, sample_size=None, strata=None, low_memory=False, n_jobs=1):
     """
     Applies UMAP dimensionality reduction to a feature matrix.
 
+    With `sample_size`, UMAP is fitted on a stratified sample of at most that many
+    rows and the remaining rows are projected with `transform`, so cost grows
+    roughly linearly with the number of rows instead of with the full kNN graph.
+
     Parameters:
         X (np.ndarray): Input feature matrix (scaled)
         params (dict): UMAP parameters
         verbose (bool): Whether to print shape info
+        sample_size (int): Fit on at most this many rows (None = fit_transform on all rows)
+        strata (np.ndarray): Optional group per row (e.g. new_segment_id) the sample
+            is spread across; rows are also stratified by position (time)
+        low_memory (bool): UMAP's slower, lower-memory nearest-neighbour descent
+        n_jobs (int): UMAP threads; > 1 drops the fixed random_state (UMAP only
+            parallelizes unseeded runs), so embeddings are no longer reproducible
 
     Returns:
         np.ndarray: UMAP-reduced feature matrix
@@ -457,93 +905,873 @@ def apply_umap(X, params=None, verbose=True):
     import umap
 
     params = params or {}
+    random_state = params.get("random_state", 69)
+    if n_jobs is not None and n_jobs > 0:
+        n_jobs = min(n_jobs, os.cpu_count() or 1)  # numba rejects more threads than cores
+    parallel = n_jobs is not None and n_jobs != 1
     reducer = umap.UMAP(
         n_neighbors=params.get("n_neighbors", 10),
         min_dist=params.get("min_dist", 0.3),
         n_components=params.get("n_components", 6),
         metric=params.get("metric", "cosine"),
         n_epochs=params.get("n_epochs", 100),
-        low_memory=False,
-        random_state=params.get("random_state", 69)
+        low_memory=low_memory,
+        n_jobs=n_jobs if parallel else 1,
+        random_state=None if parallel else random_state
     )
 
-    X_reduced = reducer.fit_transform(X)
+    rows = stratified_sample_rows(len(X), sample_size, strata=strata, random_state=random_state)
+    if len(rows) == len(X):
+        X_reduced = reducer.fit_transform(X)
+    else:
+        # Fit on the sample, project the remaining rows into the same embedding
+        reducer.fit(X[rows])
+        X_reduced = np.empty((len(X), reducer.embedding_.shape[1]), dtype=np.float32)
+        rest = np.ones(len(X), dtype=bool)
+        rest[rows] = False
+        X_reduced[rows] = reducer.embedding_
+        X_reduced[rest] = reducer.transform(X[rest])
 
     
     if verbose:
-        print(f"📉 UMAP applied → shape: {X_reduced.shape}")
+        print(f"📉 UMAP applied → shape: {X_reduced.shape}" + (f" (fit on {len(rows)} rows)" if len(rows) < len(X) else ""))
     return X_reduced
 
-def assign_speakers_to_segments(clustered_df, segments):
+
+def stratified_sample_rows(n, sample_size, strata=None, n_time_strata=100, random_state=69):
+    """
+    Sorted row sample spread evenly over the recording.
+
+    Rows (time-ordered bins) are split into `n_time_strata` equal runs, crossed
+    with `strata` when given; each stratum gets a share of `sample_size`
+    proportional to its size (at least one row while the budget allows),
+    drawn at random within it.
+    Long speaker turns therefore cannot crowd out short ones or whole stretches
+    of the recording.
+
+    Parameters:
+        n (int): Number of rows.
+        sample_size (int): Target sample size (all rows when n <= sample_size).
+        strata (np.ndarray): Optional group label per row.
+        n_time_strata (int): Number of equal-length position strata.
+
+    Returns:
+        np.ndarray: Sorted row indices (`sample_size` of them).
+    """
+    if not sample_size or n <= sample_size:
+        return np.arange(n)
+
+    position = np.arange(n) * min(n_time_strata, sample_size) // n
+    if strata is not None:
+        _, group = np.unique(np.asarray(strata), return_inverse=True)
+        _, stratum = np.unique(position * (group.max() + 1) + group.ravel(), return_inverse=True)
+    else:
+        stratum = position
+    stratum = stratum.ravel()
+
+    rng = np.random.default_rng(random_state)
+
+    # Proportional quotas (at least one row), leftovers to the largest remainders (random ties)
+    sizes = np.bincount(stratum)
+    share = sizes * sample_size / n
+    quota = np.maximum(1, np.floor(share)).astype(np.int64)
+    leftover = sample_size - quota.sum()
+    if leftover > 0:
+        remainder = np.where(quota < sizes, share - np.floor(share), -1.0)
+        quota[np.lexsort((rng.random(len(sizes)), -remainder))[:leftover]] += 1
+        quota = np.minimum(quota, sizes)
+    elif leftover < 0:
+        # The one-row minimum overshot (more strata than rows wanted) → trim the largest quotas
+        quota[np.lexsort((rng.random(len(sizes)), -quota))[:-leftover]] -= 1
+
+    # Random rank of each row within its stratum → keep ranks below the quota
+    order = np.lexsort((rng.random(n), stratum))
+    starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+    rank = np.arange(n) - starts[stratum[order]]
+    return np.sort(order[rank < quota[stratum[order]]])
+
+def assign_speakers_to_segments(clustered_df, segments, return_confidence=False):
     """
     Assigns a dominant speaker ID to each Whisper segment using majority vote 
     from clustered frame-level speaker labels.
+
+    Single pass: bins are sorted by time once, each segment's [start, end]
+    window becomes an index range via np.searchsorted, and per-label vote
+    counts come from prefix sums. Ties resolve to the smallest label, as
+    pandas .mode()[0] did.
     
     Parameters:
         clustered_df (pd.DataFrame): Must contain 'time' and 'speaker_id' columns.
         segments (List[Dict]): List of Whisper segments (with 'start', 'end', 'id').
+        return_confidence (bool): Also add 'speaker_confidence' (winning vote share, 0–1).
 
     Returns:
         List[Dict]: Segments with added 'speaker' label.
     """
-    labeled_segments = []
-    
-    for segment in segments:
-        start, end = segment["start"], segment["end"]
-        
-        # Select clustered frames within segment boundaries
-        mask = (clustered_df["time"] >= start) & (clustered_df["time"] <= end)
-        matched_speakers = clustered_df.loc[mask, "speaker_id"]
-        
-        # Assign most frequent speaker label
-        assigned_speaker = int(matched_speakers.mode()[0]) if not matched_speakers.empty else -1
+    if not segments:
+        return []
+
+    times = np.asarray(clustered_df["time"], dtype=np.float64)
+    speakers = np.asarray(clustered_df["speaker_id"])
+
+    order = np.argsort(times, kind="stable")
+    times, speakers = times[order], speakers[order]
+
+    starts = np.array([seg["start"] for seg in segments], dtype=np.float64)
+    ends = np.array([seg["end"] for seg in segments], dtype=np.float64)
+
+    # Frames within segment boundaries (inclusive on both ends)
+    lo = np.searchsorted(times, starts, side="left")
+    hi = np.searchsorted(times, ends, side="right")
+
+    labels, codes = np.unique(speakers, return_inverse=True)
+    votes = count_labels_in_ranges(codes, lo, hi, n_labels=len(labels))
+    totals = votes.sum(axis=1)
 
+    winners = votes.argmax(axis=1) if len(labels) else np.zeros(len(segments), dtype=np.int64)
+    has_votes = totals > 0
+
+    labeled_segments = []
+    for k, segment in enumerate(segments):
         segment_with_speaker = segment.copy()
-        segment_with_speaker["speaker"] = assigned_speaker
+        segment_with_speaker["speaker"] = int(labels[winners[k]]) if has_votes[k] else -1
+        if return_confidence:
+            share = votes[k, winners[k]] / totals[k] if has_votes[k] else 0.0
+            segment_with_speaker["speaker_confidence"] = round(float(share), 4)
         labeled_segments.append(segment_with_speaker)
 
-        assign_speaker_df = pd.DataFrame(labeled_segments) 
-
     return labeled_segments
 
 
+def count_labels_in_ranges(codes, lo, hi, n_labels):
+    """
+    Vote counts per label for each half-open index range [lo[k], hi[k]).
+
+    Prefix sums of one-hot label codes make every range an O(n_labels)
+    subtraction, so overlapping ranges are counted exactly as well.
+
+    Returns:
+        np.ndarray: (n_ranges, n_labels) int64 counts.
+    """
+    one_hot = np.zeros((len(codes) + 1, n_labels), dtype=np.int64)
+    if len(codes):
+        one_hot[np.arange(1, len(codes) + 1), codes] = 1
+    prefix = np.cumsum(one_hot, axis=0)
+    return prefix[hi] - prefix[lo]
+
+
 # ────────────────────────────────────────────────
 # Diarization Pipeline Helper Methods
 # ────────────────────────────────────────────────
 
-def tag_frames_with_segments(frames_df, segments, frame_time_col="time"):
+def get_vad_model():
+    """
+    Returns the process-wide Silero VAD model, loading it on first use (thread-safe).
+    """
+    global _vad_model
+
+    with _vad_lock:
+        if _vad_model is None:
+            t0 = time.time()
+            try:
+                _vad_model = load_silero_vad()
+            except Exception as e:
+                print("❌ ERROR: Failed to load Silero VAD model")
+                raise e
+            load_time = time.time() - t0
+            _vad_stats["loads"] += 1
+            _vad_stats["load_time_sec"] += load_time
+            print(f"✅ Silero VAD model loaded in {load_time:.2f}s (cached for this process)")
+        return _vad_model
+
+
+def warm_up_vad():
+    """Loads the VAD model ahead of the first diarized file. Returns current VAD stats."""
+    get_vad_model()
+    return get_vad_stats()
+
+
+def get_vad_stats():
+    """Returns a snapshot of VAD load vs. inference timings for this process."""
+    with _vad_lock:
+        return dict(_vad_stats)
+
+
+def load_diarization_audio(audio, sr=None, target_sr=16000):
+    """
+    Returns (y, sr) as a contiguous mono float32 waveform at target_sr.
+
+    Waveforms already at target_sr in float32 are passed through untouched,
+    so the buffer decoded for Whisper is shared rather than copied.
+    """
+    if not isinstance(audio, np.ndarray):
+        return librosa.load(audio, sr=target_sr, mono=True)
+
+    y = audio
+    if y.ndim > 1:
+        y = librosa.to_mono(y)
+
+    y = np.ascontiguousarray(y, dtype=np.float32)
+
+    sr = sr or target_sr
+    if sr != target_sr:
+        y = librosa.resample(y, orig_sr=sr, target_sr=target_sr)
+
+    return y, target_sr
+
+
+def as_vad_tensor(y):
+    """
+    Zero-copy torch view over a float32 waveform for Silero VAD.
+    Falls back to a single conversion if y is not contiguous float32.
+    """
+    y = np.ascontiguousarray(y, dtype=np.float32)
+    if not y.flags.writeable:
+        y = y.copy()  # torch.from_numpy cannot safely wrap read-only memory
+    return torch.from_numpy(y)
+
+
+def span_context_frames(hop_length=160, n_fft=512):
+    """Frames of extra audio per side so centered analysis windows never see a cut."""
+    return -(-max(n_fft, YIN_FRAME_LENGTH) // 2 // hop_length) + 1
+
+
+def voiced_frame_spans(is_voiced, pad_frames, n_frames, merge_gap=0):
+    """
+    Converts a frame-level VAD mask into sorted [start, end) frame spans, padded
+    by `pad_frames` on both sides and merged when closer than `merge_gap` frames.
+    """
+
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], is_voiced.astype(np.int8), [0]))))
+    starts = np.maximum(edges[0::2] - pad_frames, 0)
+    ends = np.minimum(edges[1::2] + pad_frames, n_frames)
+
+    spans = []
+    for start, end in zip(starts.tolist(), ends.tolist()):
+        if spans and start - spans[-1][1] < merge_gap:
+            spans[-1] = (spans[-1][0], max(spans[-1][1], end))
+        else:
+            spans.append((start, end))
+    return spans
+
+
+def extract_span_features(
+    y,
+    span,
+    sr=16000,
+    hop_length=160,
+    n_fft=512,
+    n_mels=40,
+    fmax=4000,
+    pitch_backend="yin",
+    extra_features=False,
+    frame_mask=None
+):
+    """
+    Per-frame spectral features for global frames [start, end) of `y`.
+
+    The waveform is cut with span_context_frames() of extra audio on each side, so
+    every returned frame sees exactly the samples it would in a whole-signal pass.
+
+    A single magnitude STFT feeds mel, spectral contrast and the extra spectral
+    families, so enabling extra_features costs little beyond their own reductions.
+
+    Parameters:
+        pitch_backend (str): See estimate_pitch().
+        extra_features (bool): Also compute the EXTRA_FEATURE_LAYOUT families.
+        frame_mask (np.ndarray): Optional voiced mask for [start, end); backends that
+            support it only track pitch on those frames.
+
+    Returns:
+        dict: family -> (rows × L) array, one entry per feature_layout() family
+    """
+    start, end = span
+    context = span_context_frames(hop_length, n_fft)
+    sample_lo = max(0, (start - context) * hop_length)
+    sample_hi = min(len(y), (end + context) * hop_length)
+    excerpt = y[sample_lo:sample_hi]
+
+    offset = sample_lo // hop_length
+    cols = slice(start - offset, end - offset)
+
+    # 🎛️ One magnitude STFT per span; every spectral family is derived from it
+    S = np.abs(librosa.stft(excerpt, n_fft=n_fft, hop_length=hop_length))
+    S_power = np.square(S)
+
+    features = {}
+    features["mel"] = np.einsum("...ft,mf->...mt", S_power, mel_filterbank(sr, n_fft, n_mels, fmax), optimize=True)
+
+    pitch_frames = None if frame_mask is None else cols.start + np.flatnonzero(frame_mask)
+    features["pitch"] = estimate_pitch(
+        excerpt, sr=sr, hop_length=hop_length, backend=pitch_backend, frames=pitch_frames
+    )[np.newaxis, :]
+
+    features["spectral_contrast"] = librosa.feature.spectral_contrast(S=S, sr=sr, n_fft=n_fft, hop_length=hop_length)
+
+    if extra_features:
+        # zcr and rms stay in the time domain (cheap, and rms from S would carry the window)
+        features["zcr"] = librosa.feature.zero_crossing_rate(y=excerpt, frame_length=n_fft, hop_length=hop_length)
+        features["spectral_centroid"] = librosa.feature.spectral_centroid(S=S, sr=sr, n_fft=n_fft, hop_length=hop_length)
+        features["spectral_bandwidth"] = librosa.feature.spectral_bandwidth(S=S, sr=sr, n_fft=n_fft, hop_length=hop_length)
+        features["spectral_flatness"] = librosa.feature.spectral_flatness(S=S, n_fft=n_fft, hop_length=hop_length)
+        features["spectral_rolloff"] = librosa.feature.spectral_rolloff(S=S, sr=sr, n_fft=n_fft, hop_length=hop_length)
+        features["rms"] = librosa.feature.rms(y=excerpt, frame_length=n_fft, hop_length=hop_length)
+        # Fixed A440 tuning: a per-excerpt tuning estimate would make shards disagree
+        features["chroma"] = librosa.feature.chroma_stft(S=S_power, sr=sr, n_fft=n_fft, hop_length=hop_length, tuning=0.0)
+
+    return {name: block[:, cols] for name, block in features.items()}
+
+
+@functools.lru_cache(maxsize=8)
+def mel_filterbank(sr, n_fft, n_mels, fmax):
+    """Mel filterbank (n_mels × 1 + n_fft/2), built once per parameter set instead of per span."""
+    return librosa.filters.mel(sr=sr, n_fft=n_fft, n_mels=n_mels, fmax=fmax)
+
+
+def extract_shard_features(y, shard, out, frame_mask=None, **extract_kwargs):
+    """
+    Extracts one shard (start, end, row) and writes its frames into rows
+    [row, row + end - start) of the raw channel matrix `out`.
+    """
+    start, end, row = shard
+    features = extract_span_features(y, (start, end), frame_mask=frame_mask, **extract_kwargs)
+
+    col = 0
+    for name, width in feature_layout(extract_kwargs.get("n_mels", 40), extract_kwargs.get("extra_features", False)):
+        out[row:row + end - start, col:col + width] = features[name].T
+        col += width
+    return end - start
+
+
+def feature_layout(n_mels=40, extra_features=False, n_contrast_bands=6):
+    """
+    Column layout of the raw per-frame channel matrix: [(family, rows), ...].
+    'mel' feeds the MFCCs; every other family becomes output features as-is.
+    """
+    layout = [("mel", n_mels), ("pitch", 1), ("spectral_contrast", n_contrast_bands + 1)]
+    if extra_features:
+        layout += EXTRA_FEATURE_LAYOUT
+    return layout
+
+
+def layout_width(layout):
+    return sum(width for _, width in layout)
+
+
+def split_layout(raw, layout):
+    """Views of a raw channel matrix per family, as (rows × frames) like librosa returns."""
+    channels = {}
+    col = 0
+    for name, width in layout:
+        channels[name] = raw[:, col:col + width].T
+        col += width
+    return channels
+
+
+def plan_feature_shards(spans, max_frames):
+    """
+    Cuts frame spans into shards of at most `max_frames`.
+
+    Returns:
+        List[Tuple[int, int, int]]: (start_frame, end_frame, output_row)
+    """
+    shards = []
+    row = 0
+    for start, end in spans:
+        for shard_start in range(start, end, max_frames):
+            shard_end = min(end, shard_start + max_frames)
+            shards.append((shard_start, shard_end, row))
+            row += shard_end - shard_start
+    return shards
+
+
+def estimate_pitch(
+    y,
+    sr=16000,
+    hop_length=160,
+    backend="yin",
+    frames=None,
+    fmin=PITCH_FMIN,
+    fmax=PITCH_FMAX,
+    decimation=4
+):
+    """
+    Per-frame f0 (Hz) on librosa's centered frame grid of `y` (1 + len(y) // hop_length frames).
+
+    Backends:
+        "yin": librosa.yin at full frame rate (reference, slowest).
+        "yin_decimated": librosa.yin every `decimation` frames, linearly interpolated.
+        "autocorr": vectorized normalized-autocorrelation tracker, evaluated only on
+            `frames` (e.g. voiced frames) and interpolated in between.
+
+    Parameters:
+        frames (np.ndarray): Frame indices to evaluate (autocorr only; None = all).
+    """
+    n_frames = 1 + len(y) // hop_length
+
+    if backend == "yin":
+        return librosa.yin(
+            y=y, fmin=fmin, fmax=fmax, sr=sr,
+            frame_length=YIN_FRAME_LENGTH, hop_length=hop_length
+        )
+
+    if backend == "yin_decimated":
+        coarse_hop = hop_length * max(1, int(decimation))
+        coarse = librosa.yin(
+            y=y, fmin=fmin, fmax=fmax, sr=sr,
+            frame_length=YIN_FRAME_LENGTH, hop_length=coarse_hop
+        )
+        return np.interp(
+            np.arange(n_frames) * hop_length,
+            np.arange(len(coarse)) * coarse_hop,
+            coarse
+        )
+
+    if backend == "autocorr":
+        return autocorr_pitch(y, sr=sr, hop_length=hop_length, frames=frames, fmin=fmin, fmax=fmax)
+
+    raise ValueError(f"Unknown pitch backend: {backend!r} (use 'yin', 'yin_decimated' or 'autocorr')")
+
+
+def autocorr_pitch(
+    y,
+    sr=16000,
+    hop_length=160,
+    frames=None,
+    fmin=PITCH_FMIN,
+    fmax=PITCH_FMAX,
+    frame_length=1024,
+    peak_threshold=0.9,
+    block_frames=4096
+):
+    """
+    Normalized autocorrelation pitch tracker (window-corrected, Boersma-style).
+
+    For each evaluated frame, the lag is the first local autocorrelation peak in
+    [sr/fmax, sr/fmin] reaching `peak_threshold` × the best peak (guards against
+    octave-down errors), refined by parabolic interpolation. Frames are processed
+    in blocks with batched FFTs; frames not in `frames` (or silent) are interpolated.
+    """
+    n_frames = 1 + len(y) // hop_length
+    frames = np.arange(n_frames) if frames is None else np.asarray(frames, dtype=np.int64)
+
+    min_lag = max(1, int(np.floor(sr / fmax)))
+    max_lag = min(frame_length // 2, int(np.ceil(sr / fmin)))
+
+    # Same centered framing as librosa (constant padding)
+    framed = librosa.util.frame(
+        np.pad(y, frame_length // 2), frame_length=frame_length, hop_length=hop_length
+    )
+
+    window = np.hanning(frame_length)
+    n_fft = 2 * frame_length
+    window_ac = np.fft.irfft(np.abs(np.fft.rfft(window, n=n_fft)) ** 2)[:max_lag + 2]
+    window_ac /= window_ac[0]
+
+    f0 = np.full(len(frames), np.nan)
+    for start in range(0, len(frames), block_frames):
+        idx = frames[start:start + block_frames]
+        x = framed[:, idx].T.astype(np.float64)
+        x -= x.mean(axis=1, keepdims=True)
+        x *= window
+
+        ac = np.fft.irfft(np.abs(np.fft.rfft(x, n=n_fft, axis=1)) ** 2, axis=1)[:, :max_lag + 2]
+        energy = ac[:, :1]
+        voiced = energy[:, 0] > 1e-10
+        ac = np.divide(ac, energy, out=np.zeros_like(ac), where=energy > 1e-10) / window_ac
+
+        # Local peaks inside the lag search range
+        region = ac[:, min_lag - 1:max_lag + 2]
+        center = region[:, 1:-1]
+        peaks = (center > region[:, :-2]) & (center >= region[:, 2:])
+        best = np.where(peaks, center, -np.inf).max(axis=1, keepdims=True)
+        strong = peaks & (center >= peak_threshold * best)
+        has_peak = strong.any(axis=1) & voiced
+
+        lag = min_lag + strong.argmax(axis=1)
+        rows = np.arange(len(idx))
+        a, b, c = ac[rows, lag - 1], ac[rows, lag], ac[rows, lag + 1]
+        denom = a - 2 * b + c
+        shift = np.divide(0.5 * (a - c), denom, out=np.zeros_like(denom), where=np.abs(denom) > 1e-12)
+
+        f0[start:start + len(idx)] = np.where(has_peak, sr / (lag + np.clip(shift, -0.5, 0.5)), np.nan)
+
+    valid = ~np.isnan(f0)
+    if not valid.any():
+        return np.full(n_frames, fmin)
+    return np.interp(np.arange(n_frames), frames[valid], f0[valid])
+
+
+def span_delta(data, order=1, width=9):
+    """
+    librosa.feature.delta along frames, shrinking the filter for spans shorter
+    than `width` (zeros when fewer than 3 frames).
+    """
+    n = data.shape[1]
+    if n < width:
+        width = n if n % 2 else n - 1
+    if width < 3:
+        return np.zeros_like(data)
+    return librosa.feature.delta(data, width=width, order=order)
+
+
+def make_feature_table(features, feature_names, time, **columns):
+    """
+    Bundles a contiguous float32 (rows × features) matrix with per-row metadata
+    arrays (time, voiced mask, segment ids, ...). This is what the diarization
+    stages pass along instead of a wide DataFrame.
+
+    Returns:
+        dict: {"features", "feature_names", "time", **columns}
+    """
+    table = {
+        "features": np.ascontiguousarray(features, dtype=np.float32),
+        "feature_names": list(feature_names),
+        "time": np.asarray(time, dtype=np.float64),
+    }
+    for name, values in columns.items():
+        table[name] = np.asarray(values)
+    return table
+
+
+def table_row_keys(table):
+    """Names of the per-row metadata arrays in a feature table."""
+    return [key for key in table if key not in ("features", "feature_names")]
+
+
+def select_table_rows(table, rows):
+    """Returns a new feature table holding only `rows` (boolean mask or indices)."""
+    selected = {"features": table["features"][rows], "feature_names": table["feature_names"]}
+    for key in table_row_keys(table):
+        selected[key] = table[key][rows]
+    return selected
+
+
+def feature_table_to_df(table):
+    """Wide DataFrame view of a feature table — for debug export only."""
+    df = pd.DataFrame(table["features"], columns=table["feature_names"])
+    for position, key in enumerate(table_row_keys(table)):
+        df.insert(position, key, table[key])
+    return df
+
+
+def column_mean_std(X, block_rows=65536):
+    """
+    Per-column mean and population std of X, accumulated in float64 over row
+    blocks so no full-size float64 copy is made. Near-zero stds become 1
+    (StandardScaler convention).
+    """
+    total, total_sq = column_sums(X, block_rows)
+    return mean_std_from_sums(total, total_sq, len(X))
+
+
+def column_sums(X, block_rows=65536):
+    """Per-column float64 sum and sum of squares of X, over row blocks."""
+    total = np.zeros(X.shape[1], dtype=np.float64)
+    total_sq = np.zeros(X.shape[1], dtype=np.float64)
+    for start in range(0, len(X), block_rows):
+        block = X[start:start + block_rows].astype(np.float64)
+        total += block.sum(axis=0)
+        total_sq += np.square(block).sum(axis=0)
+    return total, total_sq
+
+
+def mean_std_from_sums(total, total_sq, n):
+    if n == 0:
+        return np.zeros(len(total)), np.ones(len(total))
+    mean = total / n
+    std = np.sqrt(np.maximum(total_sq / n - np.square(mean), 0.0))
+    std[std < 10 * np.finfo(np.float64).eps] = 1.0
+    return mean, std
+
+
+def replace_zero_rows(X, small_constant=1e-6):
+    """Sets all-zero feature rows to a small constant (in place) so they scale sanely."""
+    zero_mask = np.abs(X).sum(axis=1) < small_constant
+    X[zero_mask] = small_constant
+    return X
+
+
+def should_stream_diarization(audio, sr=None):
+    """True when the recording is longer than DIARIZATION_STREAMING['min_duration_s']."""
+    threshold = DIARIZATION_STREAMING.get("min_duration_s")
+    if threshold is None:
+        return False
+
+    if isinstance(audio, np.ndarray):
+        duration = len(audio) / (sr or 16000)
+    else:
+        try:
+            duration = librosa.get_duration(path=audio)
+        except Exception:
+            return False  # unknown length → in-memory path, as before
+    return duration > threshold
+
+
+def new_bin_accumulator(bin_size=1):
+    """
+    Running state for streaming time aggregation. Bin arrays are indexed by
+    floor(time / bin_size) and grow as later blocks arrive.
+    """
+    return {
+        "bin_size": bin_size,
+        "feature_names": None,
+        "count": np.zeros(0, dtype=np.int64),
+        "feature_sum": None,
+        "time_sum": np.zeros(0, dtype=np.float64),
+        "segment_counts": {},       # (bin, segment_id) -> frames
+        "new_segment_counts": {},   # (bin, new_segment_id) -> frames
+        "frames": 0,                # voiced frames seen (z-score statistics)
+        "frame_sum": None,
+        "frame_sumsq": None,
+    }
+
+
+def accumulate_frame_stats(accumulator, table):
+    """Adds a block's voiced frames to the global per-feature sum / sum of squares."""
+    total, total_sq = column_sums(table["features"])
+    if accumulator["frame_sum"] is None:
+        accumulator["feature_names"] = table["feature_names"]
+        accumulator["frame_sum"] = total
+        accumulator["frame_sumsq"] = total_sq
+    else:
+        accumulator["frame_sum"] += total
+        accumulator["frame_sumsq"] += total_sq
+    accumulator["frames"] += len(table["features"])
+
+
+def accumulate_bins(accumulator, table):
+    """Folds tagged frames into per-bin feature/time sums and segment-id counters."""
+    if len(table["time"]) == 0:
+        return
+
+    bin_index = np.floor(table["time"] / accumulator["bin_size"]).astype(np.int64)
+    order = np.argsort(bin_index, kind="stable")
+    bin_index = bin_index[order]
+
+    # Grow bin arrays (doubling) to cover the newest bin
+    n_needed = int(bin_index[-1]) + 1
+    n_features = table["features"].shape[1]
+    if accumulator["feature_sum"] is None:
+        accumulator["feature_sum"] = np.zeros((0, n_features), dtype=np.float64)
+    if n_needed > len(accumulator["count"]):
+        size = max(n_needed, 2 * len(accumulator["count"]))
+        grow = size - len(accumulator["count"])
+        accumulator["count"] = np.concatenate([accumulator["count"], np.zeros(grow, dtype=np.int64)])
+        accumulator["time_sum"] = np.concatenate([accumulator["time_sum"], np.zeros(grow)])
+        accumulator["feature_sum"] = np.concatenate([accumulator["feature_sum"], np.zeros((grow, n_features))])
+
+    bins, starts, counts = np.unique(bin_index, return_index=True, return_counts=True)
+    accumulator["count"][bins] += counts
+    accumulator["time_sum"][bins] += np.add.reduceat(table["time"][order], starts)
+    accumulator["feature_sum"][bins] += np.add.reduceat(table["features"][order], starts, axis=0, dtype=np.float64)
+
+    for key, counter_key in (("segment_id", "segment_counts"), ("new_segment_id", "new_segment_counts")):
+        pairs, pair_counts = np.unique(
+            np.stack([bin_index, table[key][order].astype(np.int64)]), axis=1, return_counts=True
+        )
+        counter = accumulator[counter_key]
+        for (bin_id, value), count in zip(pairs.T.tolist(), pair_counts.tolist()):
+            counter[(bin_id, value)] = counter.get((bin_id, value), 0) + count
+
+
+def finalize_bins(accumulator, min_bin_size=1):
+    """
+    Turns a bin accumulator into the binned, z-scored feature table that
+    apply_time_agg(normalize_audio_features(...)) would produce.
+    """
+    count = accumulator["count"]
+    valid_bins = np.flatnonzero(count >= max(1, min_bin_size))
+    if len(valid_bins) == 0:
+        raise ValueError("Aggregation failed: all bins under min_bin_size.")
+
+    mean, std = mean_std_from_sums(accumulator["frame_sum"], accumulator["frame_sumsq"], accumulator["frames"])
+    bin_means = accumulator["feature_sum"][valid_bins] / count[valid_bins, np.newaxis]
+
+    dominant = {}
+    for key, counter_key in (("segment_id", "segment_counts"), ("new_segment_id", "new_segment_counts")):
+        counter = accumulator[counter_key]
+        pairs = np.array(list(counter.keys()), dtype=np.int64).reshape(-1, 2)
+        counts = np.fromiter(counter.values(), dtype=np.int64, count=len(counter))
+        bins, values = dominant_value_per_bin(pairs[:, 0], pairs[:, 1], counts)
+        lookup = dict(zip(bins.tolist(), values.tolist()))
+        dominant[key] = np.array([lookup.get(b, -1) for b in valid_bins.tolist()])
+
+    return make_feature_table(
+        (bin_means - mean) / std,
+        accumulator["feature_names"],
+        time=np.round(valid_bins * accumulator["bin_size"], 6),
+        time_midpoint=accumulator["time_sum"][valid_bins] / count[valid_bins],
+        segment_id=dominant["segment_id"],
+        new_segment_id=dominant["new_segment_id"]
+    )
+
+
+def dominant_value_per_bin(bins, values, counts=None):
+    """
+    Most frequent value per bin, smallest value on ties (pandas .mode().iloc[0]).
+
+    Parameters:
+        bins (np.ndarray): Integer bin index per observation.
+        values (np.ndarray): Value per observation (any sortable dtype).
+        counts (np.ndarray): Optional weight (occurrences) per observation.
+
+    Returns:
+        (np.ndarray, np.ndarray): sorted unique bins and their dominant value.
+    """
+    bins = np.asarray(bins, dtype=np.int64)
+    values = np.asarray(values)
+    if len(bins) == 0:
+        return bins, values
+    counts = np.ones(len(bins), dtype=np.int64) if counts is None else np.asarray(counts)
+
+    # Factorize values (sorted → smaller code = smaller value), then one int64 key per (bin, value)
+    uniq_values, codes = np.unique(values, return_inverse=True)
+    base = bins.min()
+    keys = (bins - base) * len(uniq_values) + codes.ravel()
+    uniq_keys, inverse = np.unique(keys, return_inverse=True)
+    totals = np.bincount(inverse.ravel(), weights=counts)
+
+    key_bins, key_codes = np.divmod(uniq_keys, len(uniq_values))
+
+    # Per bin: highest total first, then smallest value → first row of each bin wins
+    order = np.lexsort((key_codes, -totals, key_bins))
+    sorted_bins = key_bins[order]
+    first = np.concatenate(([True], sorted_bins[1:] != sorted_bins[:-1]))
+    return sorted_bins[first] + base, uniq_values[key_codes[order][first]]
+
+
+def tag_frames_with_segments(table, segments):
     """
     Tags each frame with both:
     - the merged `new_segment_id` (post-merge)
     - the original Whisper `segment_id` (pre-merge)
 
     Drops frames that do not fall within any segment window.
+    Uses a sorted-interval lookup (np.searchsorted) instead of a per-frame scan.
     """
-    import pandas as pd
+    frame_times = np.asarray(table["time"], dtype=np.float64)
+    starts = np.array([seg["start"] for seg in segments], dtype=np.float64)
+    ends = np.array([seg["end"] for seg in segments], dtype=np.float64)
 
+    seg_idx = match_times_to_segments(frame_times, starts, ends)
 
-    new_segment_ids = []
-    original_segment_ids = []
+    new_ids = np.array([seg.get("new_segment_id") for seg in segments])
+    orig_ids = np.array([seg.get("id") for seg in segments])
 
-    for frame_time in frames_df[frame_time_col]:
-        match = next(
-            (seg for seg in segments if seg["start"] <= frame_time < seg["end"]),
-            None
-        )
-        if match:
-            new_segment_ids.append(match.get("new_segment_id"))
-            original_segment_ids.append(match.get("id"))
-        else:
-            new_segment_ids.append(None)
-            original_segment_ids.append(None)
+    # Frames inside a segment that carries a new_segment_id
+    matched = seg_idx >= 0
+    if len(new_ids):
+        matched &= pd.notna(new_ids)[np.where(matched, seg_idx, 0)]
+
+    tagged = select_table_rows(table, matched)
+    hits = seg_idx[matched]
+    # tolist() round-trip re-infers a compact dtype (int64 once None ids are dropped)
+    tagged["new_segment_id"] = np.array(new_ids[hits].tolist()) if len(new_ids) else np.array([])
+    tagged["segment_id"] = np.array(orig_ids[hits].tolist()) if len(orig_ids) else np.array([])
 
-    df_out = frames_df.copy()
-    df_out["new_segment_id"] = new_segment_ids
-    df_out["segment_id"] = original_segment_ids
+    return tagged
 
-    df_out = df_out[df_out["new_segment_id"].notna()].copy()
 
-    return df_out
+def match_times_to_segments(times, starts, ends):
+    """
+    Vectorized interval lookup: for each time t, the index of the first segment
+    (in list order) with start <= t < end, or -1 when no segment contains t.
+
+    Ordered, non-overlapping segments (the normal Whisper case) resolve in a
+    single np.searchsorted pass. Otherwise segments are painted over the
+    time-sorted frames in reverse list order so the earliest segment wins.
+    """
+    times = np.asarray(times, dtype=np.float64)
+    starts = np.asarray(starts, dtype=np.float64)
+    ends = np.asarray(ends, dtype=np.float64)
+
+    seg_idx = np.full(len(times), -1, dtype=np.int64)
+    if len(starts) == 0 or len(times) == 0:
+        return seg_idx
+
+    ordered_disjoint = np.all(starts[1:] >= starts[:-1]) and np.all(starts[1:] >= ends[:-1])
+
+    if ordered_disjoint:
+        candidate = np.searchsorted(starts, times, side="right") - 1
+        safe = np.clip(candidate, 0, None)
+        valid = (candidate >= 0) & (times < ends[safe])
+        seg_idx[valid] = candidate[valid]
+        return seg_idx
+
+    order = np.argsort(times, kind="stable")
+    sorted_times = times[order]
+    lo = np.searchsorted(sorted_times, starts, side="left")
+    hi = np.searchsorted(sorted_times, ends, side="left")
+
+    sorted_idx = np.full(len(times), -1, dtype=np.int64)
+    for k in range(len(starts) - 1, -1, -1):
+        sorted_idx[lo[k]:hi[k]] = k
+    seg_idx[order] = sorted_idx
+
+    return seg_idx
+
+def resolve_speaker_overlap(segments):
+    """
+    Detects when a speaker shift occurs between consecutive segments that share the same
+    new_segment_id. If the next row contains multiple sentences, splits off the last sentence.
+    """
+    resolved = []
+    i = 0
+
+    while i < len(segments):
+        current = deepcopy(segments[i])
+        next_row = segments[i + 1] if i + 1 < len(segments) else None
+
+        # Default: just keep current as-is
+        resolved.append(current)
+
+        if (
+            next_row and
+            current["new_segment_id"] == next_row["new_segment_id"] and
+            current["speaker"] != next_row["speaker"]
+        ):
+            text = next_row["text"].strip()
+            # Split into sentences (keep punctuation)
+            sentences = re.split(r'(?<=[.!?])\s+(?=[A-Z])', text)
+
+            if len(sentences) > 1:
+                total_chars = sum(len(s) for s in sentences)
+                first_chars = sum(len(s) for s in sentences[:-1])
+                duration = next_row["end"] - next_row["start"]
+                split_point = next_row["start"] + duration * (first_chars / total_chars)
+
+                # First part stays with original new_segment_id and previous speaker
+                main_row = deepcopy(next_row)
+                main_row["id"] = f"{next_row['id']}_a"
+                main_row["text"] = " ".join(sentences[:-1])
+                main_row["end"] = round(split_point, 3)
+                main_row["speaker"] = current["speaker"]  # Carry over previous speaker
+
+                # Second part goes to a new segment id and next speaker
+                split_row = {
+                    "id": f"{next_row['id']}_b",
+                    "seek": next_row.get("seek"),
+                    "start": round(split_point, 3),
+                    "end": next_row["end"],
+                    "text": sentences[-1].strip(),
+                    "tokens": [],
+                    "temperature": next_row.get("temperature"),
+                    "avg_logprob": next_row.get("avg_logprob"),
+                    "compression_ratio": next_row.get("compression_ratio"),
+                    "no_speech_prob": next_row.get("no_speech_prob"),
+                    "new_segment_id": next_row["new_segment_id"] + 1,  # bump segment
+                    "speaker": next_row["speaker"]
+                }
+
+                resolved.append(main_row)
+                resolved.append(split_row)
+                i += 2  # Skip next_row since we handled it
+                continue
+
+        i += 1
+
+    return resolved
 
 def split_whisper_segments(whisper_segments_df):
     """
@@ -1,19 +1,130 @@
 # File: transcribe_audio_service/services/utils_models.py
-import whisper
 import re
-from services.utils_device import get_device_status
+import os
+import socket
+import gc
+import time
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from services.utils_device import get_device_status, get_available_vram
 import pandas as pd
+from cfg.conf_main import WHISPER_MODELS, MODEL_VRAM_REQUIREMENTS, MODEL_CACHE_BUDGET_GB
+
+class WhisperModelCache:
+    """
+    Thread-safe LRU cache of loaded Whisper models bounded by a memory budget.
+
+    Model footprints are estimated from MODEL_VRAM_REQUIREMENTS. Each worker
+    process owns its own cache; checkpoint downloads are serialized across
+    processes with a lock file so parallel workers don't corrupt the download.
+    """
+
+    def __init__(self, budget_gb=None):
+        self._budget_gb = budget_gb
+        self._models = OrderedDict()   # model_name -> {"model", "device", "size_gb"}
+        self._lock = threading.RLock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "device_moves": 0, "load_time_sec": 0.0}
+
+    @property
+    def budget_gb(self):
+        if self._budget_gb is None:
+            self._budget_gb = MODEL_CACHE_BUDGET_GB or _default_cache_budget_gb()
+        return self._budget_gb
+
+    def get(self, model_name, device=None):
+        """
+        Returns the cached model on `device`, loading (and evicting LRU models) as needed.
+        device=None keeps whisper's default placement (CUDA when available).
+        """
+        with self._lock:
+            entry = self._models.get(model_name)
+
+            if entry is not None:
+                self._stats["hits"] += 1
+                self._models.move_to_end(model_name)
+            else:
+                self._stats["misses"] += 1
+                entry = self._load(model_name, device)
+
+            # Only move when the model isn't already resident on the target device
+            if device is not None and entry["device"] != device:
+                entry["model"] = entry["model"].to(device)
+                entry["device"] = device
+                self._stats["device_moves"] += 1
+
+            return entry["model"]
+
+    def stats(self):
+        """Returns hit/miss/eviction counters, load time and current residency."""
+        with self._lock:
+            return {
+                **self._stats,
+                "budget_gb": self.budget_gb,
+                "resident_gb": self._resident_gb(),
+                "resident": {name: e["device"] for name, e in self._models.items()},
+            }
+
+    def clear(self):
+        with self._lock:
+            while self._models:
+                self._evict_lru()
+
+    def _load(self, model_name, device):
+        size_gb = estimate_model_size_gb(model_name)
+        if size_gb > self.budget_gb:
+            print(f"⚠️ {model_name} (~{size_gb} GB) exceeds model cache budget ({self.budget_gb} GB)")
+
+        while self._models and self._resident_gb() + size_gb > self.budget_gb:
+            self._evict_lru()
+
+        import whisper  # deferred: pulls in torch
+
+        t0 = time.time()
+        model = None
+        if _checkpoint_needs_download(model_name):
+            # Serialize downloads only; the first process to get the lock downloads
+            with _download_lock(model_name):
+                if _checkpoint_needs_download(model_name, ignore_lock=True):
+                    model = whisper.load_model(model_name, device=device)
+        if model is None:
+            # Checkpoint on disk → processes load concurrently
+            model = whisper.load_model(model_name, device=device)
+        load_time = time.time() - t0
+        self._stats["load_time_sec"] += load_time
+
+        entry = {
+            "model": model,
+            "device": next(model.parameters()).device.type,
+            "size_gb": size_gb,
+        }
+        self._models[model_name] = entry
+        print(f"✅ Loaded Whisper '{model_name}' on {entry['device']} in {load_time:.2f}s")
+        return entry
+
+    def _evict_lru(self):
+        name, entry = self._models.popitem(last=False)
+        was_cuda = entry["device"] == "cuda"
+        del entry
+        gc.collect()
+        if was_cuda:
+            import torch
+            torch.cuda.empty_cache()
+        self._stats["evictions"] += 1
+        print(f"♻️ Evicted Whisper '{name}' from model cache")
+
+    def _resident_gb(self):
+        return sum(e["size_gb"] for e in self._models.values())
+
 
 # Internal model cache
-_model_cache = {}
+_model_cache = WhisperModelCache()
 
-def get_model(model_name):
+def get_model(model_name, device=None):
     """
     Retrieve a Whisper model from cache or load it if not already cached.
     """
-    if model_name not in _model_cache:
-        _model_cache[model_name] = whisper.load_model(model_name)
-    return _model_cache[model_name]
+    return _model_cache.get(model_name, device=device)
 
 def get_whisper_model(model_name="medium"):
     """
@@ -22,8 +133,45 @@ def get_whisper_model(model_name="medium"):
     _, cuda_available = get_device_status()
     device = "cuda" if cuda_available else "cpu"
 
-    model = get_model(model_name)
-    return model.to(device), device
+    model = get_model(model_name, device=device)
+    return model, device
+
+def warm_up_model_async(model_name):
+    """
+    Preloads a Whisper model on a background daemon thread (e.g. while the splash/UI
+    is shown). Later get_whisper_model calls wait on the cache lock instead of
+    loading twice. Returns the started thread.
+    """
+    def _warm():
+        try:
+            get_whisper_model(model_name)
+        except Exception as e:
+            print(f"⚠️ Model warm-up failed for {model_name}: {e}")
+
+    thread = threading.Thread(target=_warm, name=f"warmup-{model_name}", daemon=True)
+    thread.start()
+    return thread
+
+def get_model_cache_stats():
+    """Returns hits/misses/evictions/load times for the process-wide model cache."""
+    return _model_cache.stats()
+
+def estimate_model_size_gb(model_name):
+    """Memory hint for a checkpoint (e.g. 'medium.en' -> MODEL_VRAM_REQUIREMENTS['medium'])."""
+    base_model = model_name.split(".")[0]
+    return MODEL_VRAM_REQUIREMENTS.get(base_model, max(MODEL_VRAM_REQUIREMENTS.values()))
+
+def resolve_model_name(model_key, lang_code=None):
+    """
+    Resolves a base model key (e.g. 'medium') to the Whisper checkpoint name,
+    preferring the English-only variant (e.g. 'medium.en') when lang_code is 'en'.
+    """
+    variants = WHISPER_MODELS.get(model_key, {})
+
+    if lang_code == "en":
+        return variants.get("en", variants.get("default", model_key))
+
+    return variants.get("default", model_key)
 
 def find_new_seg_id(segments, punctuation_merge=True):
     """
@@ -67,3 +215,105 @@ def find_new_seg_id(segments, punctuation_merge=True):
     return updated_segments
 
 
+# ────────────────────────────────────────────────
+# Helper Methods
+# ────────────────────────────────────────────────
+
+def _default_cache_budget_gb():
+    vram_gb = get_available_vram()
+    if vram_gb:
+        return vram_gb
+
+    import psutil
+    return round(psutil.virtual_memory().total / (1024 ** 3) / 2, 1)
+
+
+def _whisper_cache_dir():
+    # Same default as whisper.load_model's download_root
+    cache_root = os.getenv("XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache"))
+    return os.path.join(cache_root, "whisper")
+
+
+def _lock_path(model_name):
+    return os.path.join(_whisper_cache_dir(), f".{model_name}.lock")
+
+
+def _checkpoint_needs_download(model_name, ignore_lock=False):
+    """
+    True if the checkpoint file is missing, or another process holds the download
+    lock (the file may be partially written). The file is checked before the lock:
+    a file that existed before any lock was taken is complete.
+    """
+    import whisper
+
+    url = whisper._MODELS.get(model_name)
+    if url is None:
+        return False  # local checkpoint path, nothing to download
+
+    if not os.path.isfile(os.path.join(_whisper_cache_dir(), os.path.basename(url))):
+        return True
+    return not ignore_lock and os.path.exists(_lock_path(model_name))
+
+
+@contextmanager
+def _download_lock(model_name, stale_after=1800, poll=0.5):
+    """
+    Cross-process lock around checkpoint downloads. The lock file records the
+    owner's host and PID; it is broken only when that process no longer exists
+    (same host), or — for owners on another host — when the file has not been
+    modified for `stale_after` seconds.
+    """
+    lock_dir = _whisper_cache_dir()
+    os.makedirs(lock_dir, exist_ok=True)
+    lock_path = _lock_path(model_name)
+
+    fd = None
+    while fd is None:
+        try:
+            fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            if _lock_is_stale(lock_path, stale_after):
+                try:
+                    os.remove(lock_path)
+                    print(f"🔓 Removed stale Whisper download lock → {lock_path}")
+                except OSError:
+                    pass
+                continue
+            time.sleep(poll)
+
+    try:
+        os.write(fd, f"{socket.gethostname()} {os.getpid()}".encode("utf-8"))
+        yield
+    finally:
+        os.close(fd)
+        try:
+            os.remove(lock_path)
+        except OSError:
+            pass
+
+
+def _lock_is_stale(lock_path, stale_after):
+    try:
+        with open(lock_path, "r", encoding="utf-8") as f:
+            owner = f.read().split()
+        mtime = os.path.getmtime(lock_path)
+    except OSError:
+        return False  # already released
+
+    if len(owner) != 2 or not owner[1].isdigit():
+        # Owner is still writing its PID, or died right after creating the file
+        return time.time() - mtime > 60
+
+    host, pid = owner[0], int(owner[1])
+    if host != socket.gethostname():
+        return time.time() - mtime > stale_after
+
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return True
+    except PermissionError:
+        return False  # alive, owned by another user
+    except OSError:
+        return time.time() - mtime > stale_after  # no signal support for this PID
+    return False
@@ -139,7 +139,8 @@ def save_cluster_data(df, filename, format="feather"):
     Save cluster data to a permanent /cluster_data directory for UI visualization.
 
     Parameters:
-        df (pd.DataFrame): Must contain 'x', 'y', 'speaker_id'
+        df (pd.DataFrame): 'speaker_id' plus 'x'/'y' or embedding columns 'emb_*'
+            (projected to 2D when displayed, see project_cluster_plot)
         filename (str): Original filename (e.g., "call1.wav")
         format (str): 'feather' (default), or 'csv' for fallback
     """
@@ -150,21 +151,99 @@ def save_cluster_data(df, filename, format="feather"):
     stem = Path(filename).stem
     save_path = cluster_dir / f"{stem}_umap.{format}"
 
-    required_cols = {"x", "y", "speaker_id"}
-    if not required_cols.issubset(df.columns):
-        print(f"⚠️ Skipped saving cluster data — missing columns: {required_cols - set(df.columns)}")
+    plot_cols = _cluster_plot_columns(df)
+    if "speaker_id" not in df.columns or not plot_cols:
+        print(f"⚠️ Skipped saving cluster data — expected 'speaker_id' and x/y or emb_* columns, got {list(df.columns)}")
         return
 
     try:
         if format == "feather":
-            df[["x", "y", "speaker_id"]].reset_index(drop=True).to_feather(save_path)
+            df[plot_cols + ["speaker_id"]].reset_index(drop=True).to_feather(save_path)
         elif format == "csv":
-            df[["x", "y", "speaker_id"]].to_csv(save_path, index=False)
+            df[plot_cols + ["speaker_id"]].to_csv(save_path, index=False)
         else:
             raise ValueError("Unsupported format: choose 'feather' or 'csv'")
         print(f"📁 Saved cluster data → {save_path}")
     except Exception as e:
         print(f"❌ Failed to save cluster data: {e}")
+
+
+def project_cluster_plot(df):
+    """
+    Adds 'x'/'y' plot coordinates to saved cluster data: PCA (via SVD) of the
+    'emb_*' embedding columns. Data that already has x/y is returned unchanged.
+
+    Parameters:
+        df (pd.DataFrame): Cluster data as written by save_cluster_data.
+
+    Returns:
+        pd.DataFrame: Data with 'x', 'y' and 'speaker_id'.
+    """
+    import numpy as np
+
+    if {"x", "y"}.issubset(df.columns):
+        return df
+
+    emb_cols = _cluster_plot_columns(df)
+    X = df[emb_cols].to_numpy(dtype=np.float64)
+    X = X - X.mean(axis=0)
+    if len(X) < 2 or X.shape[1] < 2:
+        coords = np.zeros((len(X), 2))
+        coords[:, :X.shape[1]] = X[:, :2]
+    else:
+        _, _, components = np.linalg.svd(X, full_matrices=False)
+        coords = X @ components[:2].T
+
+    projected = df[["speaker_id"]].copy()
+    projected["x"] = coords[:, 0]
+    projected["y"] = coords[:, 1]
+    return projected
+
+
+def save_transcript_record(path, record):
+    """
+    Writes a transcript record (utils_transcribe.make_transcript_record) as JSON.
+    Datetimes are stored as tagged ISO strings and restored by load_transcript_record,
+    so outputs rendered from a record get the same types as a fresh transcription.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(record, f, ensure_ascii=False, indent=1, default=_record_default)
+    os.replace(tmp_path, path)
+
+
+def load_transcript_record(path):
+    """Returns the transcript record at `path`, or None if missing/unreadable."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f, object_hook=_record_object_hook)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        print(f"⚠️ Ignoring unreadable transcript record {path}: {e}")
+        return None
+
+
+def _record_default(obj):
+    # numpy scalars / arrays from Whisper and diarization, datetimes from metadata
+    if isinstance(obj, datetime.datetime):
+        return {"__datetime__": obj.isoformat()}
+    if hasattr(obj, "tolist"):
+        return obj.tolist()
+    return str(obj)
+
+
+def _record_object_hook(obj):
+    if len(obj) == 1 and "__datetime__" in obj:
+        return datetime.datetime.fromisoformat(obj["__datetime__"])
+    return obj
+
+
+def _cluster_plot_columns(df):
+    if {"x", "y"}.issubset(df.columns):
+        return ["x", "y"]
+    return [col for col in df.columns if str(col).startswith("emb_")]
         
 
 def _expand_key(compact_key):
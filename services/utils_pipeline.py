@@ -0,0 +1,732 @@
+# File: transcribe_audio_service/services/utils_pipeline.py
+
+import os
+import queue
+import shutil
+import tempfile
+import threading
+from services.utils_audio import list_audio_files, prep_whisper_audio, load_whisper_pcm
+from services.utils_device import get_device_status, get_available_vram, get_optimal_batch_size
+from services.utils_models import find_new_seg_id
+from services.utils_transcribe import transcribe_file, transcribe_chunked, transcribe_batched, save_transcript, render_transcript, get_lang_name, qualifies_for_batch_processing
+from services.utils_output import save_cluster_data, save_transcript_record, load_transcript_record
+from services.template_manager import TemplateManager
+from cfg.conf_main import ARTIFACT_CACHE, TRANSCRIPT_RECORD_DIR, TRANSCRIPT_RECORD_VERSION
+
+
+DEFAULT_PIPELINE_SETTINGS = {
+    "model_name": "medium",
+    "language": "en",
+    "translate_to_english": False,
+    "use_diarization": False,
+    "output_format": "txt",
+    "save_cluster_data": True,
+    "diagnostics": False,
+    "decode_mode": "pcm",          # 'pcm' = decode once into memory, 'mp3' = legacy temp MP3
+    "chunk_seconds": None,         # None = single Whisper pass; else max VAD-bounded chunk length
+    "chunk_workers": 1,            # concurrent chunk workers (processes) in chunked mode
+    "batched_decoding": False,     # decode 30 s windows in batches sized by BATCH_SIZE_THRESHOLDS
+    "artifact_cache": ARTIFACT_CACHE["enabled"],  # reuse cached Whisper / diarization artifacts (utils_cache)
+}
+
+# Length of one Whisper window (whisper.audio.CHUNK_LENGTH); batched decoding groups
+# short files until their windows can fill one forward pass
+BATCH_WINDOW_SECONDS = 30
+
+
+# ────────────────────────────────────────────────
+# Core Methods
+# ────────────────────────────────────────────────
+
+def make_pipeline_settings(**overrides):
+    """
+    Builds a plain settings dict for the transcription engine.
+
+    Unknown keys raise, so typos in CLI/GUI wiring fail fast instead of
+    silently falling back to defaults.
+    """
+    unknown = set(overrides) - set(DEFAULT_PIPELINE_SETTINGS)
+    if unknown:
+        raise ValueError(f"Unknown pipeline setting(s): {sorted(unknown)}")
+
+    settings = {**DEFAULT_PIPELINE_SETTINGS, **overrides}
+    settings["output_format"] = settings["output_format"].lower().lstrip(".")
+    return settings
+
+
+def warm_up_pipeline(settings):
+    """
+    Preloads per-process models the settings will need so the first file
+    does not pay model-load latency.
+    """
+    if settings["use_diarization"]:
+        from services.utils_diarize import warm_up_vad
+        warm_up_vad()
+
+
+def create_job(filename, input_dir, output_dir, output_format):
+    """
+    Creates the per-file job dict that is threaded through every pipeline stage.
+    """
+    return {
+        "filename": filename,
+        "file_path": os.path.join(input_dir, filename),
+        "output_path": build_output_path(output_dir, filename, output_format),
+        "record_path": build_record_path(output_dir, filename),
+        "temp_dir": None,
+        "audio": None,
+        "whisper_audio": None,   # 16 kHz waveform for batched decoding (see get_whisper_audio)
+        "whisper_result": None,  # set by transcribe_job_group when decoded with other files
+        "result": None,
+        "cluster_data": None,
+        "diagnostics": {},
+        "batch_size": 1,
+        "error": None,
+    }
+
+
+def prepare_job_audio(job, decode_mode="pcm"):
+    """
+    Stage 1: Produces Whisper-ready audio for the job.
+
+    'pcm' decodes once into a 16 kHz float32 array shared by Whisper and
+    diarization. 'mp3' keeps the legacy 32 kbps MP3 in a private temp dir.
+    """
+    if decode_mode == "pcm":
+        job["audio"] = load_whisper_pcm(job["file_path"])
+    elif decode_mode == "mp3":
+        job["temp_dir"] = tempfile.mkdtemp(prefix="transcribe_job_")
+        job["audio"] = prep_whisper_audio(job["file_path"], job["temp_dir"])
+    else:
+        raise ValueError(f"Unsupported decode mode: {decode_mode}")
+    return job
+
+
+def transcribe_job(job, settings, ui_callback=None):
+    """
+    Stage 2: Whisper transcription, segment merging and (optional) diarization.
+
+    A Whisper failure is fatal for the job and raises. A diarization failure is
+    logged and the job continues with unlabeled segments so a transcript is
+    still produced.
+
+    With settings['artifact_cache'], the Whisper result and the diarization
+    features / labels are read from (or written to) the persistent artifact
+    cache, keyed by the audio content hash and the parameters that matter.
+    """
+    gpu_available = get_device_status()[1]
+    grouped_result = job["whisper_result"]  # already decoded by transcribe_job_group
+    if grouped_result is None:
+        job["batch_size"] = get_job_batch_size(job["file_path"], settings["use_diarization"], gpu_available)
+
+    whisper_key = audio_key = None
+    result = None
+    if settings["artifact_cache"]:
+        from services.utils_cache import file_content_hash, artifact_key, load_json_artifact
+        content_hash = file_content_hash(job["file_path"])
+        whisper_key = artifact_key("whisper", content_hash, get_whisper_cache_params(settings))
+        audio_key = artifact_key("audio", content_hash, settings["decode_mode"])
+        if grouped_result is None:
+            result = load_json_artifact(whisper_key)
+        if result is not None:
+            print(f"🗄️ Reusing cached Whisper result for {job['filename']}")
+            if settings["batched_decoding"]:
+                job["batch_size"] = get_optimal_batch_size(get_available_vram(), gpu_available)
+
+    if result is None:
+        result = grouped_result if grouped_result is not None else run_job_whisper(job, settings, gpu_available)
+        if whisper_key:
+            from services.utils_cache import save_json_artifact
+            save_json_artifact(whisper_key, result)
+
+    # Merge segments *before* passing to diarization pipeline
+    segments = result.get("segments", [])
+    if segments:
+        result["segments"] = find_new_seg_id(segments)
+
+    if settings["use_diarization"] and result.get("segments"):
+        # Deferred: the diarization stack (librosa, sklearn, hdbscan, umap, silero) is heavy
+        from services.utils_diarize import run_diarization_pipeline, resolve_speaker_overlap
+
+        try:
+            diarization_result = run_diarization_pipeline(
+                job["audio"],
+                result["segments"],
+                diagnostics=settings["diagnostics"],
+                ui_callback=ui_callback,
+                cluster_data=settings["save_cluster_data"],
+                cache_key=whisper_key,
+                audio_key=audio_key
+            )
+        except Exception as e:
+            print(f"❌ Diarization failed for {job['filename']}: {e}")
+        else:
+            # Speaker-labeled segments, then split sentences across speaker shifts
+            result["segments"] = resolve_speaker_overlap(diarization_result["segments"])
+            job["cluster_data"] = diarization_result.get("cluster_data")
+            job["diagnostics"] = diarization_result.get("diagnostics", {})
+
+    job["result"] = result
+    return job
+
+
+def get_whisper_cache_params(settings):
+    """Settings that change the Whisper output (artifact cache key component)."""
+    return {
+        name: settings[name]
+        for name in ("model_name", "language", "translate_to_english", "decode_mode", "chunk_seconds", "batched_decoding")
+    }
+
+
+def run_job_whisper(job, settings, gpu_available):
+    """
+    Runs Whisper for the job with the decoding mode the settings select
+    (batched windows, VAD-bounded chunks, or a single pass).
+    """
+    if settings["batched_decoding"]:
+        # Single-file path (process_job, worker processes); the batch runners decode
+        # short files together through transcribe_job_group instead
+        job["batch_size"] = get_optimal_batch_size(get_available_vram(), gpu_available)
+        result = transcribe_batched(
+            [get_whisper_audio(job)],
+            model_name=settings["model_name"],
+            language=settings["language"],
+            translate_to_english=settings["translate_to_english"],
+            batch_size=job["batch_size"]
+        )[0]
+    elif settings["chunk_seconds"]:
+        result = transcribe_chunked(
+            job["audio"],
+            model_name=settings["model_name"],
+            language=settings["language"],
+            translate_to_english=settings["translate_to_english"],
+            max_chunk_s=settings["chunk_seconds"],
+            workers=settings["chunk_workers"]
+        )
+    else:
+        result = transcribe_file(
+            job["audio"],
+            model_name=settings["model_name"],
+            language=settings["language"],
+            translate_to_english=settings["translate_to_english"]
+        )
+
+    if "error" in result:
+        raise RuntimeError(f"Whisper failed: {result['error']}")
+    return result
+
+
+def transcribe_job_group(jobs, settings):
+    """
+    Batched decoding across files: runs the Whisper pass of several prepared jobs
+    in one transcribe_batched call, so the windows of short files share forward
+    passes. Each result is stored on job["whisper_result"] for transcribe_job,
+    which still runs diarization per job. Jobs with an error or a cached Whisper
+    result are left out; a decoding failure is recorded on every job of the call.
+    """
+    gpu_available = get_device_status()[1]
+    batch_size = get_optimal_batch_size(get_available_vram(), gpu_available)
+
+    pending = [job for job in jobs if not job["error"] and not _has_cached_whisper(job, settings)]
+    if not pending:
+        return jobs
+
+    if len(pending) > 1:
+        print(f"🧮 Decoding {len(pending)} files together (batch size {batch_size})")
+    results = transcribe_batched(
+        [get_whisper_audio(job) for job in pending],
+        model_name=settings["model_name"],
+        language=settings["language"],
+        translate_to_english=settings["translate_to_english"],
+        batch_size=batch_size
+    )
+    for job, result in zip(pending, results):
+        job["batch_size"] = batch_size
+        if "error" in result:
+            job["error"] = f"Whisper failed: {result['error']}"
+        else:
+            job["whisper_result"] = result
+    return jobs
+
+
+def get_whisper_audio(job):
+    """16 kHz waveform for batched decoding (decodes the temp MP3 once in 'mp3' mode)."""
+    if job["whisper_audio"] is None:
+        audio = job["audio"]
+        job["whisper_audio"] = load_whisper_pcm(audio) if isinstance(audio, str) else audio
+    return job["whisper_audio"]
+
+
+def batch_group_is_full(jobs, group_seconds):
+    """True once the group's audio fills `group_seconds` (see get_batch_group_seconds)."""
+    total_samples = sum(len(get_whisper_audio(job)) for job in jobs if not job["error"])
+    return total_samples / 16000 >= group_seconds
+
+
+def get_batch_group_seconds(gpu_available):
+    """Audio per transcribe_job_group call: enough windows for one full forward pass."""
+    return get_optimal_batch_size(get_available_vram(), gpu_available) * BATCH_WINDOW_SECONDS
+
+
+def write_job_outputs(job, settings, template):
+    """
+    Stage 3: Renders the transcript in the requested format, stores its transcript
+    record (for re-rendering other formats later) and the cluster data.
+    """
+    language = settings["language"]
+    gpu_available = get_device_status()[1]
+
+    record = save_transcript(
+        job["output_path"],
+        job["result"],
+        template,
+        input_file=job["file_path"],
+        input_language=get_lang_name(language),
+        output_language="English" if settings["translate_to_english"] else get_lang_name(language),
+        model_used=settings["model_name"],
+        processing_device="GPU" if gpu_available else "CPU",
+        batch_size=job["batch_size"],
+        use_diarization=settings["use_diarization"],
+        output_format=settings["output_format"],
+    )
+    record["settings"] = get_record_settings(settings)
+    save_transcript_record(job["record_path"], record)
+
+    if settings["save_cluster_data"] and job["cluster_data"] is not None:
+        save_cluster_data(
+            df=job["cluster_data"],
+            filename=job["filename"]        # must be the original input file, not temp audio
+        )
+
+    if settings["diagnostics"]:
+        for stage, summary_df in job["diagnostics"].items():
+            print(f"\n📊 Speaker Summary at stage: {stage}")
+            print(summary_df)
+
+    return job
+
+
+def render_job_from_record(job, settings, template):
+    """
+    Writes the job's output from its transcript record instead of transcribing,
+    when a record exists for the same transcription settings.
+
+    Returns:
+        bool: True if the output was rendered from the record.
+    """
+    record = load_transcript_record(job["record_path"])
+    if record is None or record.get("settings") != get_record_settings(settings):
+        return False
+
+    render_transcript(job["output_path"], record, template, settings["output_format"])
+    print(f"♻️ Rendered {job['filename']} from its transcript record → {settings['output_format']}")
+    return True
+
+
+def get_record_settings(settings):
+    """Settings a transcript record depends on (renders must match all of them)."""
+    return {
+        **get_whisper_cache_params(settings),
+        "use_diarization": settings["use_diarization"],
+        "version": TRANSCRIPT_RECORD_VERSION,
+    }
+
+
+def cleanup_job(job):
+    """Releases the job's decoded audio and temp directory (safe to call more than once)."""
+    temp_dir = job.get("temp_dir")
+    if temp_dir and os.path.exists(temp_dir):
+        shutil.rmtree(temp_dir, ignore_errors=True)
+    job["temp_dir"] = None
+    job["audio"] = None
+    job["whisper_audio"] = None
+    job["whisper_result"] = None
+
+
+def process_job(job, settings, template, ui_callback=None):
+    """
+    Runs every stage for a single file. Errors are recorded on job["error"]
+    rather than raised so batch callers can keep going.
+    """
+    try:
+        prepare_job_audio(job, settings["decode_mode"])
+        transcribe_job(job, settings, ui_callback=ui_callback)
+        write_job_outputs(job, settings, template)
+    except Exception as e:
+        print(f"❌ Failed to process {job['filename']}: {e}")
+        job["error"] = str(e)
+    finally:
+        cleanup_job(job)
+
+    return job
+
+
+def process_job_group(jobs, settings, template):
+    """
+    process_job for prepared jobs decoded together (batched decoding): one shared
+    Whisper pass (transcribe_job_group), then diarization and outputs per job.
+    Errors are recorded per job and every job is cleaned up.
+    """
+    try:
+        transcribe_job_group(jobs, settings)
+    except Exception as e:
+        print(f"❌ Batched decoding failed: {e}")
+        for job in jobs:
+            job["error"] = job["error"] or str(e)
+
+    for job in jobs:
+        try:
+            if not job["error"]:
+                transcribe_job(job, settings)
+                write_job_outputs(job, settings, template)
+        except Exception as e:
+            print(f"❌ Failed to process {job['filename']}: {e}")
+            job["error"] = str(e)
+        finally:
+            cleanup_job(job)
+
+    return jobs
+
+
+def run_batch(input_dir, output_dir, settings, skip_completed=True, on_status=None, should_stop=None):
+    """
+    Transcribes every supported audio file in input_dir, one file at a time
+    (with batched decoding, consecutive short files are decoded together).
+
+    Parameters:
+        input_dir (str): Directory containing audio files.
+        output_dir (str): Directory where transcripts are written.
+        settings (dict): Engine settings from make_pipeline_settings().
+        skip_completed (bool): Skip files whose output already exists.
+        on_status (callable): Optional callback(filename, status, job).
+        should_stop (callable): Optional callback returning True to stop after the current file.
+
+    Returns:
+        dict: filename -> "Completed" | "Error" | "Skipped"
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    template = TemplateManager().get_template(settings["output_format"])
+    statuses = {}
+    group_seconds = get_batch_group_seconds(get_device_status()[1]) if settings["batched_decoding"] else None
+    group = []
+
+    def finish(job):
+        status = "Error" if job["error"] else "Completed"
+        statuses[job["filename"]] = status
+        _notify(on_status, job["filename"], status, job)
+
+    for filename in list_audio_files(input_dir):
+        if should_stop and should_stop():
+            break
+
+        job = create_job(filename, input_dir, output_dir, settings["output_format"])
+
+        if skip_completed and os.path.exists(job["output_path"]):
+            statuses[filename] = "Skipped"
+            _notify(on_status, filename, "Skipped", job)
+            continue
+
+        if skip_completed and render_from_record(job, settings, template):
+            statuses[filename] = "Error" if job["error"] else "Completed"
+            _notify(on_status, filename, statuses[filename], job)
+            continue
+
+        _notify(on_status, filename, "Processing...", job)
+        if group_seconds is None:
+            process_job(job, settings, template)
+            finish(job)
+            continue
+
+        # 🧮 Batched decoding: hold prepared files until their windows fill a forward pass
+        try:
+            prepare_job_audio(job, settings["decode_mode"])
+        except Exception as e:
+            print(f"❌ Audio preparation failed for {filename}: {e}")
+            job["error"] = str(e)
+        group.append(job)
+        if batch_group_is_full(group, group_seconds):
+            for done_job in process_job_group(group, settings, template):
+                finish(done_job)
+            group = []
+
+    for done_job in process_job_group(group, settings, template) if group else []:
+        finish(done_job)
+
+    return statuses
+
+
+def run_pipelined_batch(
+    input_dir,
+    output_dir,
+    settings,
+    skip_completed=True,
+    on_status=None,
+    should_stop=None,
+    queue_size=2,
+    filenames=None,
+    get_ui_callback=None
+):
+    """
+    Transcribes a directory with overlapped stages so the model never waits on I/O.
+
+    A background thread prepares audio for upcoming files while the calling
+    thread runs Whisper/diarization on the current one, and a second background
+    thread writes transcripts and cluster data for finished files. Bounded
+    queues between stages cap how many prepared files are held at once. With
+    batched decoding, the inference stage takes consecutive prepared files until
+    their windows fill a forward pass and decodes them together.
+
+    Parameters:
+        input_dir (str): Directory containing audio files.
+        output_dir (str): Directory where transcripts are written.
+        settings (dict): Engine settings from make_pipeline_settings().
+        skip_completed (bool): Skip files whose output already exists.
+        on_status (callable): Optional callback(filename, status, job). Called from worker threads.
+        should_stop (callable): Optional callback returning True to stop after the current
+            file; prepared files that were not started get no status.
+        queue_size (int): Max jobs buffered between consecutive stages.
+        filenames (list): Optional files (in order) to process instead of every audio file in input_dir.
+        get_ui_callback (callable): Optional callback(job) returning the stage-status
+            callback passed to transcribe_job (e.g. the GUI cluster status), or None.
+
+    Returns:
+        dict: filename -> "Completed" | "Error" | "Skipped"
+
+    If the inference stage itself fails (outside a single job), the jobs in hand and
+    every prepared job are marked "Error", both worker threads are joined and the
+    exception is re-raised.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    template = TemplateManager().get_template(settings["output_format"])
+    statuses = {}
+
+    jobs = []
+    for filename in (list_audio_files(input_dir) if filenames is None else filenames):
+        job = create_job(filename, input_dir, output_dir, settings["output_format"])
+        if skip_completed and os.path.exists(job["output_path"]):
+            statuses[filename] = "Skipped"
+            _notify(on_status, filename, "Skipped", job)
+            continue
+        if skip_completed and render_from_record(job, settings, template):
+            statuses[filename] = "Error" if job["error"] else "Completed"
+            _notify(on_status, filename, statuses[filename], job)
+            continue
+        jobs.append(job)
+
+    prepared_queue = queue.Queue(maxsize=queue_size)
+    finished_queue = queue.Queue(maxsize=queue_size)
+
+    abort = threading.Event()
+
+    def prepare_stage():
+        for job in jobs:
+            if abort.is_set() or (should_stop and should_stop()):
+                break
+            try:
+                prepare_job_audio(job, settings["decode_mode"])
+            except Exception as e:
+                print(f"❌ Audio preparation failed for {job['filename']}: {e}")
+                job["error"] = str(e)
+            prepared_queue.put(job)  # blocks while the inference stage is behind
+        prepared_queue.put(None)
+
+    def write_stage():
+        while True:
+            job = finished_queue.get()
+            if job is None:
+                break
+            try:
+                if not job["error"]:
+                    write_job_outputs(job, settings, template)
+            except Exception as e:
+                print(f"❌ Failed to save transcript for {job['filename']}: {e}")
+                job["error"] = str(e)
+            finally:
+                cleanup_job(job)
+
+            status = "Error" if job["error"] else "Completed"
+            statuses[job["filename"]] = status
+            _notify(on_status, job["filename"], status, job)
+
+    prep_thread = threading.Thread(target=prepare_stage, name="stage-prepare", daemon=True)
+    write_thread = threading.Thread(target=write_stage, name="stage-write", daemon=True)
+    prep_thread.start()
+    write_thread.start()
+
+    def fail_job(job, error):
+        cleanup_job(job)
+        job["error"] = job["error"] or error
+        statuses[job["filename"]] = "Error"
+        try:
+            _notify(on_status, job["filename"], "Error", job)
+        except Exception as e:
+            print(f"⚠️ Status callback failed for {job['filename']}: {e}")
+
+    # 🧠 Inference stage runs on the calling thread (keeps model/device state in one place)
+    group_seconds = get_batch_group_seconds(get_device_status()[1]) if settings["batched_decoding"] else None
+    in_hand = []
+    aborted = None
+    try:
+        exhausted = False
+        while not exhausted:
+            job = prepared_queue.get()
+            if job is None:
+                break
+            in_hand = [job]
+
+            # 🧮 Batched decoding: pull more prepared files until their windows fill a forward pass
+            while group_seconds and not batch_group_is_full(in_hand, group_seconds):
+                job = prepared_queue.get()
+                if job is None:
+                    exhausted = True
+                    break
+                in_hand.append(job)
+
+            if should_stop and should_stop():
+                for job in in_hand:
+                    cleanup_job(job)  # prepared but never started
+                in_hand = []
+                continue
+
+            startable = [job for job in in_hand if not job["error"]]
+            for job in startable:
+                _notify(on_status, job["filename"], "Processing...", job)
+            if group_seconds and startable:
+                try:
+                    transcribe_job_group(startable, settings)
+                except Exception as e:
+                    print(f"❌ Batched decoding failed: {e}")
+                    for job in startable:
+                        job["error"] = str(e)
+
+            while in_hand:
+                current = in_hand[0]
+                if not current["error"]:
+                    ui_callback = get_ui_callback(current) if get_ui_callback else None
+                    try:
+                        transcribe_job(current, settings, ui_callback=ui_callback)
+                    except Exception as e:
+                        print(f"❌ Failed to process {current['filename']}: {e}")
+                        current["error"] = str(e)
+                finished_queue.put(in_hand.pop(0))
+    except BaseException as e:
+        aborted = e
+        print(f"❌ Pipelined batch aborted: {e}")
+        raise
+    finally:
+        # Unblock the prep stage if inference bailed out early, discarding unused audio
+        abort.set()
+        if aborted is not None:
+            for job in in_hand:
+                fail_job(job, f"Batch aborted: {aborted}")
+        while prep_thread.is_alive() or not prepared_queue.empty():
+            try:
+                leftover = prepared_queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if leftover is None:
+                continue
+            if aborted is not None:
+                fail_job(leftover, f"Batch aborted: {aborted}")
+            else:
+                cleanup_job(leftover)
+
+        prep_thread.join()
+        finished_queue.put(None)
+        write_thread.join()
+
+    return statuses
+
+
+def export_transcripts(input_dir, output_dir, output_format, overwrite=False, on_status=None):
+    """
+    Renders every file's transcript record in `output_format` — writers only, no
+    audio decoding, Whisper or diarization.
+
+    Parameters:
+        input_dir (str): Directory containing the audio files (defines the file list).
+        output_dir (str): Directory holding the outputs and their .transcripts/ records.
+        output_format (str): Any SAVE_OUTPUT_FUNCTIONS format.
+        overwrite (bool): Re-render outputs that already exist.
+        on_status (callable): Optional callback(filename, status, job).
+
+    Returns:
+        dict: filename -> "Completed" | "Skipped" | "Missing" (no record) | "Error"
+    """
+    output_format = output_format.lower().lstrip(".")
+    template = TemplateManager().get_template(output_format)
+    statuses = {}
+
+    for filename in list_audio_files(input_dir):
+        job = create_job(filename, input_dir, output_dir, output_format)
+
+        if not overwrite and os.path.exists(job["output_path"]):
+            status = "Skipped"
+        else:
+            record = load_transcript_record(job["record_path"])
+            if record is None:
+                status = "Missing"
+            else:
+                try:
+                    render_transcript(job["output_path"], record, template, output_format)
+                    status = "Completed"
+                except Exception as e:
+                    print(f"❌ Failed to export {filename}: {e}")
+                    job["error"] = str(e)
+                    status = "Error"
+
+        statuses[filename] = status
+        _notify(on_status, filename, status, job)
+
+    return statuses
+
+
+# ────────────────────────────────────────────────
+# Helper Methods
+# ────────────────────────────────────────────────
+
+def build_output_path(output_dir, filename, output_format):
+    """Returns <output_dir>/<stem>.<output_format> for an input audio filename."""
+    return os.path.join(output_dir, f"{os.path.splitext(filename)[0]}.{output_format}")
+
+
+def build_record_path(output_dir, filename):
+    """Returns <output_dir>/.transcripts/<stem>.json (the file's transcript record)."""
+    return os.path.join(output_dir, TRANSCRIPT_RECORD_DIR, f"{os.path.splitext(filename)[0]}.json")
+
+
+def render_from_record(job, settings, template):
+    """
+    Re-render path for batch runners (render_job_from_record): a bad record is a
+    per-file error recorded in job['error'], not a crash.
+
+    Returns:
+        bool: True if the job needs no transcription (rendered, or failed to render).
+    """
+    try:
+        return render_job_from_record(job, settings, template)
+    except Exception as e:
+        print(f"❌ Failed to render {job['filename']} from its transcript record: {e}")
+        job["error"] = str(e)
+        return True
+
+
+def get_job_batch_size(file_path, use_diarization, gpu_available):
+    """Returns the Whisper batch size recorded in transcript metadata for this file."""
+    if qualifies_for_batch_processing(file_path, use_diarization):
+        return get_optimal_batch_size(get_available_vram(), gpu_available)
+    return 1
+
+
+def _has_cached_whisper(job, settings):
+    if not settings["artifact_cache"]:
+        return False
+    from services.utils_cache import file_content_hash, artifact_key, has_json_artifact
+    return has_json_artifact(
+        artifact_key("whisper", file_content_hash(job["file_path"]), get_whisper_cache_params(settings))
+    )
+
+
+def _notify(on_status, filename, status, job):
+    if on_status:
+        on_status(filename, status, job)
@@ -3,13 +3,15 @@ import os
 from services.utils_models import get_whisper_model
 import datetime
 from tinytag import TinyTag
-from cfg.conf_main import LANGUAGE_MAP
+from cfg.conf_main import LANGUAGE_MAP, TRANSCRIPT_RECORD_VERSION
 from services.utils_output import SAVE_OUTPUT_FUNCTIONS
 import pandas as pd
+import numpy as np
 import re
+from services.utils_debug import export_debug_csv
 
 def transcribe_file(
-    audio_mp3_path,
+    audio,
     model_name="medium",
     language="en",
     translate_to_english=False,
@@ -17,13 +19,16 @@ def transcribe_file(
     """
     Prepares audio and runs Whisper transcription.
 
+    Parameters:
+        audio (str | np.ndarray): Prepared MP3 path, or 16 kHz mono float32 waveform.
+
     Returns:
         dict: Whisper result with "text" and optional "segments"
     """
     model, device = get_whisper_model(model_name)
 
     return run_whisper_transcription(
-        audio_mp3_path=audio_mp3_path,
+        audio=audio,
         model=model,
         device=device,
         language=language,
@@ -32,14 +37,14 @@ def transcribe_file(
 
 
 def run_whisper_transcription(
-    audio_mp3_path,
+    audio,
     model,
     device,
     language="en",
     translate_to_english=False,
 ):
     """
-    Runs Whisper transcription on a prepared MP3 file.
+    Runs Whisper transcription on a prepared MP3 file or an in-memory 16 kHz waveform.
     """
     try:
         transcribe_args = {
@@ -50,8 +55,9 @@ def run_whisper_transcription(
         if translate_to_english and language != "en":
             transcribe_args["task"] = "translate"
 
-        result = model.transcribe(audio_mp3_path, **transcribe_args)
-        print(audio_mp3_path)
+        result = model.transcribe(audio, **transcribe_args)
+        if isinstance(audio, str):
+            print(audio)
 
         return result
 
@@ -62,6 +68,229 @@ def run_whisper_transcription(
 
 
 
+def transcribe_chunked(
+    audio,
+    model_name="medium",
+    language="en",
+    translate_to_english=False,
+    max_chunk_s=600,
+    min_silence_s=0.3,
+    workers=1,
+    sr=16000,
+):
+    """
+    Transcribes long audio as VAD-bounded chunks and stitches the results.
+
+    Split points are placed inside Silero-VAD silences so no chunk exceeds
+    max_chunk_s. Chunks run sequentially (workers=1) or concurrently on a
+    process pool where every worker holds its own model. Segment times,
+    word times, `seek` and `id` are shifted to the global timeline, so
+    find_new_seg_id and diarization see one continuous segment list.
+
+    Parameters:
+        audio (np.ndarray | str): 16 kHz mono waveform (paths are decoded in memory).
+        max_chunk_s (float): Upper bound on chunk length in seconds.
+        min_silence_s (float): Preferred minimum silence length for a split point.
+        workers (int): Concurrent chunk workers (processes).
+
+    Returns:
+        dict: Whisper-style result with "text", "segments" and "language".
+    """
+    if isinstance(audio, str):
+        from services.utils_audio import load_whisper_pcm
+        audio = load_whisper_pcm(audio, target_sr=sr)
+
+    duration = len(audio) / sr
+    if duration <= max_chunk_s:
+        return transcribe_file(audio, model_name, language, translate_to_english)
+
+    chunks = plan_vad_chunks(audio, sr=sr, max_chunk_s=max_chunk_s, min_silence_s=min_silence_s)
+    print(f"✂️ Chunked transcription → {len(chunks)} chunk(s) over {duration:.1f}s, workers={workers}")
+
+    chunk_audio = [audio[int(start * sr):int(end * sr)] for start, end in chunks]
+
+    if workers > 1:
+        from services.utils_workers import transcribe_chunks_in_pool
+        chunk_results = transcribe_chunks_in_pool(
+            chunk_audio, model_name, language, translate_to_english, workers=workers
+        )
+    else:
+        model, device = get_whisper_model(model_name)
+        chunk_results = [
+            run_whisper_transcription(
+                audio=chunk, model=model, device=device,
+                language=language, translate_to_english=translate_to_english
+            )
+            for chunk in chunk_audio
+        ]
+
+    for result in chunk_results:
+        if "error" in result:
+            return result
+
+    return stitch_chunk_results(chunk_results, [start for start, _ in chunks])
+
+
+def plan_vad_chunks(audio, sr=16000, max_chunk_s=600, min_silence_s=0.3):
+    """
+    Returns [(start_s, end_s), ...] covering the audio, split at VAD silences.
+
+    Each split is the midpoint of the latest silence gap that keeps the chunk
+    within max_chunk_s, preferring gaps of at least min_silence_s. When a
+    window contains no gap at all, the chunk is hard-split at max_chunk_s.
+    """
+    duration = len(audio) / sr
+    if duration <= max_chunk_s:
+        return [(0.0, duration)]
+
+    from services.utils_diarize import detect_voice_segments  # deferred: loads VAD stack
+
+    try:
+        speech = detect_voice_segments(audio, sr=sr, return_mask=False)
+    except ValueError:
+        speech = []  # No speech detected → plain fixed-length windows
+
+    gaps = [
+        (prev["end"], nxt["start"])
+        for prev, nxt in zip(speech, speech[1:])
+        if nxt["start"] > prev["end"]
+    ]
+    long_cuts = [(a + b) / 2 for a, b in gaps if b - a >= min_silence_s]
+    any_cuts = [(a + b) / 2 for a, b in gaps]
+
+    chunks = []
+    start = 0.0
+    while duration - start > max_chunk_s:
+        limit = start + max_chunk_s
+        cut = _latest_cut(long_cuts, start, limit) or _latest_cut(any_cuts, start, limit) or limit
+        chunks.append((start, cut))
+        start = cut
+    chunks.append((start, duration))
+
+    return chunks
+
+
+def stitch_chunk_results(chunk_results, offsets):
+    """
+    Merges per-chunk Whisper results into one, shifting timestamps by each
+    chunk's offset (seconds) and renumbering segment ids globally.
+    """
+    segments = []
+    texts = []
+
+    for result, offset in zip(chunk_results, offsets):
+        texts.append(result.get("text", "").strip())
+
+        for seg in result.get("segments", []):
+            seg = dict(seg)
+            seg["id"] = len(segments)
+            seg["start"] = seg["start"] + offset
+            seg["end"] = seg["end"] + offset
+            if "seek" in seg:
+                seg["seek"] = seg["seek"] + int(round(offset * 100))  # mel frames (10 ms)
+            if seg.get("words"):
+                seg["words"] = [
+                    {**w, "start": w["start"] + offset, "end": w["end"] + offset}
+                    for w in seg["words"]
+                ]
+            segments.append(seg)
+
+    return {
+        "text": " ".join(t for t in texts if t),
+        "segments": segments,
+        "language": chunk_results[0].get("language") if chunk_results else None,
+    }
+
+
+def transcribe_batched(
+    audios,
+    model_name="medium",
+    language="en",
+    translate_to_english=False,
+    batch_size=8,
+    sr=16000,
+):
+    """
+    Batched Whisper decoding: many 30-second windows per forward pass.
+
+    Each input (one long file, or several short files) is cut into ≤30 s
+    windows at VAD silences. Windows from all inputs are decoded together
+    in batches of `batch_size` with model.decode, then regrouped and
+    stitched per input with global timestamps. Windows that fail Whisper's
+    quality checks are re-decoded alone with temperature fallback; windows
+    the greedy pass marks as silent are dropped without fallback.
+
+    Unlike model.transcribe, windows are decoded independently: the previous
+    window's text is not used as a prompt, so wording/punctuation continuity
+    across window boundaries can differ slightly.
+
+    Parameters:
+        audios (list[np.ndarray]): 16 kHz mono waveforms.
+        batch_size (int): Windows per forward pass (see get_optimal_batch_size).
+
+    Returns:
+        list[dict]: One Whisper-style result per input audio, or {"error": ...} for
+            every input if decoding failed (as run_whisper_transcription does).
+    """
+    try:
+        return _decode_batched(audios, model_name, language, translate_to_english, batch_size, sr)
+    except Exception as e:
+        print(f"❌ Batched Whisper decoding failed with error: {e}")
+        return [{"error": str(e)} for _ in audios]
+
+
+def _decode_batched(audios, model_name, language, translate_to_english, batch_size, sr):
+    import torch
+    import whisper
+    from whisper.audio import CHUNK_LENGTH, log_mel_spectrogram, pad_or_trim
+
+    model, device = get_whisper_model(model_name)
+    tokenizer = _get_tokenizer(model, language, translate_to_english)
+    options = whisper.DecodingOptions(
+        language=language,
+        task="translate" if translate_to_english and language != "en" else "transcribe",
+        fp16=(device == "cuda"),
+        without_timestamps=False,
+    )
+    n_mels = getattr(model.dims, "n_mels", 80)
+
+    # 🔪 Flatten every input into (input_idx, offset_s, window) triples
+    windows = []
+    for input_idx, audio in enumerate(audios):
+        for start, end in plan_vad_chunks(audio, sr=sr, max_chunk_s=CHUNK_LENGTH):
+            windows.append((input_idx, start, audio[int(start * sr):int(end * sr)]))
+
+    decoded = []
+    with torch.no_grad():
+        for i in range(0, len(windows), batch_size):
+            batch = windows[i:i + batch_size]
+            mel = torch.stack([
+                log_mel_spectrogram(pad_or_trim(np.asarray(w, dtype=np.float32)), n_mels)
+                for _, _, w in batch
+            ]).to(model.device)
+            results = model.decode(mel, options)
+
+            for j, result in enumerate(results):
+                if _is_silent(result):
+                    result = None  # Whisper's own silence rule, on the greedy result
+                elif _needs_fallback(result):
+                    result = _decode_with_fallback(model, mel[j], options)
+                decoded.append(result)
+
+    # 🧩 Regroup per input and stitch onto each input's timeline
+    per_input = [[] for _ in audios]
+    for (input_idx, offset, window), result in zip(windows, decoded):
+        if result is None:
+            continue
+        per_input[input_idx].append((offset, _decoding_result_to_chunk(result, tokenizer, len(window) / sr)))
+
+    return [
+        stitch_chunk_results([chunk for _, chunk in items], [offset for offset, _ in items])
+        if items else {"text": "", "segments": [], "language": language}
+        for items in per_input
+    ]
+
+
 def save_transcript(
     output_path,
     result,
@@ -75,6 +304,38 @@ def save_transcript(
     use_diarization=False,
     output_format="txt",
 ):
+    """
+    Renders a transcript and returns its record (see make_transcript_record), so
+    callers can persist it and re-render other formats without re-transcribing.
+    """
+    record = make_transcript_record(
+        result,
+        input_file=input_file,
+        input_language=input_language,
+        output_language=output_language,
+        model_used=model_used,
+        processing_device=processing_device,
+        batch_size=batch_size,
+        use_diarization=use_diarization,
+    )
+    render_transcript(output_path, record, template, output_format)
+    return record
+
+
+def make_transcript_record(
+    result,
+    input_file=None,
+    input_language="en",
+    output_language="en",
+    model_used=None,
+    processing_device=None,
+    batch_size=8,
+    use_diarization=False,
+):
+    """
+    Canonical, format-independent transcript: text, (speaker-labeled) segments
+    and metadata. Every SAVE_OUTPUT_FUNCTIONS format is rendered from it.
+    """
     # Get metadata
     if input_file:
         metadata = get_transcription_metadata(
@@ -84,17 +345,36 @@ def save_transcript(
     else:
         metadata = {}
 
+    return {
+        "version": TRANSCRIPT_RECORD_VERSION,
+        "text": result.get("text", ""),
+        "segments": result.get("segments", []),
+        "language": result.get("language"),
+        "use_diarization": use_diarization,
+        "metadata": {
+            "Input": metadata.get("Input", {}),
+            "Output": metadata.get("Output", {})
+        },
+    }
+
+
+def render_transcript(output_path, record, template, output_format="txt"):
+    """
+    Writes one output format from a transcript record (fresh or loaded from disk).
+    """
+    metadata = record.get("metadata", {})
+    use_diarization = record.get("use_diarization", False)
+
     flat_metadata = {
         **metadata.get("Input", {}),
         **metadata.get("Output", {})
     }
 
-    pd.DataFrame(result).to_csv(r"C:\demo\save_trans_input.csv", index=False, float_format="%.8f")
-    #
-
     # Extract raw transcription  text
-    raw_text = result.get("text", "")
-    segments = result.get("segments", [])
+    raw_text = record.get("text", "")
+    segments = record.get("segments", [])
+
+    export_debug_csv(lambda: pd.DataFrame({"text": raw_text, "segments": segments}), "save_trans_input")
     
     df = apply_segment_timing(
         {"segments": segments, "text": raw_text},
@@ -237,4 +517,82 @@ def get_lang_name(code):
             return name
     return code  # fallback to code if no match found
 
+def _latest_cut(cuts, start, limit):
+    candidates = [c for c in cuts if start < c <= limit]
+    return max(candidates) if candidates else None
+
+
+def _get_tokenizer(model, language, translate_to_english):
+    from whisper.tokenizer import get_tokenizer
+
+    task = "translate" if translate_to_english and language != "en" else "transcribe"
+    kwargs = {"language": language, "task": task}
+    if hasattr(model, "num_languages"):
+        kwargs["num_languages"] = model.num_languages
+    return get_tokenizer(model.is_multilingual, **kwargs)
 
+
+def _needs_fallback(result, compression_ratio_threshold=2.4, logprob_threshold=-1.0, no_speech_threshold=0.6):
+    if result.no_speech_prob > no_speech_threshold:
+        return False  # likely silence: a hotter decode will not help (model.transcribe does the same)
+    return (
+        result.compression_ratio > compression_ratio_threshold
+        or result.avg_logprob < logprob_threshold
+    )
+
+
+def _is_silent(result, no_speech_threshold=0.6, logprob_threshold=-1.0):
+    return result.no_speech_prob > no_speech_threshold and result.avg_logprob < logprob_threshold
+
+
+def _decode_with_fallback(model, mel, options, temperatures=(0.2, 0.4, 0.6, 0.8, 1.0)):
+    """Re-decodes a single window with rising temperature, as model.transcribe does."""
+    import dataclasses
+
+    result = None
+    for temperature in temperatures:
+        result = model.decode(mel, dataclasses.replace(options, temperature=temperature))
+        if not _needs_fallback(result):
+            break
+    return result
+
+
+def _decoding_result_to_chunk(result, tokenizer, window_s):
+    """
+    Splits a DecodingResult into timestamped segments using Whisper's
+    <|t|> tokens (20 ms resolution), matching model.transcribe's segment shape.
+    """
+    segments = []
+    text_tokens = []
+    seg_start = 0.0
+
+    def close(end):
+        text = tokenizer.decode(text_tokens).strip()
+        if text:
+            segments.append({
+                "id": len(segments),
+                "seek": 0,
+                "start": seg_start,
+                "end": min(end, window_s),
+                "text": " " + text,
+                "tokens": list(text_tokens),
+                "temperature": result.temperature,
+                "avg_logprob": result.avg_logprob,
+                "compression_ratio": result.compression_ratio,
+                "no_speech_prob": result.no_speech_prob,
+            })
+
+    for token in result.tokens:
+        if token >= tokenizer.timestamp_begin:
+            timestamp = (token - tokenizer.timestamp_begin) * 0.02
+            if text_tokens:
+                close(timestamp)
+                text_tokens = []
+            seg_start = timestamp
+        elif token < tokenizer.eot:
+            text_tokens.append(token)
+
+    if text_tokens:
+        close(window_s)  # Trailing text without a closing timestamp
+
+    return {"text": result.text, "segments": segments, "language": result.language}
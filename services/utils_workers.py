@@ -0,0 +1,324 @@
+# File: transcribe_audio_service/services/utils_workers.py
+#
+# Process-pool execution mode for CPU-only nodes. Each worker process holds its
+# own Whisper model and a fixed slice of the machine's cores, and pulls files
+# from the executor's shared work queue.
+#
+# Heavy imports (torch, whisper, the pipeline) are deferred until the worker
+# initializer has pinned the thread counts, so the OpenMP/MKL pools are sized
+# correctly from the start.
+
+import os
+import atexit
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+_THREAD_ENV_VARS = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS", "NUMEXPR_NUM_THREADS")
+
+# Per-worker state (populated by init_worker inside each child process)
+_worker_state = {}
+
+# Long-lived pool for chunked transcription, reused across files (parent process)
+_chunk_pool = {"executor": None, "key": None}
+_chunk_pool_lock = threading.Lock()
+
+# Long-lived pool for sharded diarization feature extraction (parent process)
+_feature_pool = {"executor": None, "key": None}
+_feature_pool_lock = threading.Lock()
+
+
+def get_threads_per_worker(workers, threads_per_worker=None):
+    """
+    Partitions logical cores across workers so the pool never oversubscribes the CPU.
+    """
+    if threads_per_worker:
+        return max(1, int(threads_per_worker))
+    return max(1, (os.cpu_count() or 1) // max(1, workers))
+
+
+def init_worker(model_name, threads, warm_model=True, settings=None):
+    """
+    Process initializer: pins torch/BLAS thread pools and preloads the Whisper model
+    (plus any per-process pipeline models the settings require, e.g. Silero VAD).
+    """
+    _pin_threads(threads)
+
+    if warm_model:
+        from services.utils_models import get_whisper_model
+        get_whisper_model(model_name)
+
+    if settings:
+        from services.utils_pipeline import warm_up_pipeline
+        warm_up_pipeline(settings)
+
+    _worker_state["threads"] = threads
+    print(f"🧵 Worker {os.getpid()} ready → model={model_name}, torch threads={threads}")
+
+
+def init_feature_worker(threads):
+    """
+    Process initializer for feature-extraction workers: pins thread pools and
+    imports the diarization module once, so the first shard does not pay for it.
+    """
+    _pin_threads(threads)
+    import services.utils_diarize  # noqa: F401
+
+    _worker_state["threads"] = threads
+    print(f"🧵 Feature worker {os.getpid()} ready → threads={threads}")
+
+
+def _pin_threads(threads):
+    for var in _THREAD_ENV_VARS:
+        os.environ[var] = str(threads)
+
+    import torch
+    torch.set_num_threads(threads)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        pass  # Already set in this process
+
+
+def _process_file_in_worker(filename, input_dir, output_dir, settings):
+    from services.utils_pipeline import create_job, process_job
+    from services.template_manager import TemplateManager
+
+    if "template" not in _worker_state:
+        _worker_state["template"] = TemplateManager().get_template(settings["output_format"])
+
+    job = create_job(filename, input_dir, output_dir, settings["output_format"])
+    process_job(job, settings, _worker_state["template"])
+
+    # Only ship back a small summary — results stay on disk
+    return filename, job["error"]
+
+
+def run_parallel_batch(
+    input_dir,
+    output_dir,
+    settings,
+    workers=2,
+    threads_per_worker=None,
+    skip_completed=True,
+    on_status=None
+):
+    """
+    Transcribes a directory with a pool of worker processes.
+
+    Parameters:
+        input_dir (str): Directory containing audio files.
+        output_dir (str): Directory where transcripts are written.
+        settings (dict): Engine settings from make_pipeline_settings().
+        workers (int): Number of worker processes (each loads its own model).
+        threads_per_worker (int): Torch threads per worker (default: cores // workers).
+        skip_completed (bool): Skip files whose output already exists.
+        on_status (callable): Optional callback(filename, status, job). job is None for pool results.
+
+    Returns:
+        dict: filename -> "Completed" | "Error" | "Skipped"
+    """
+    from services.utils_audio import list_audio_files
+    from services.utils_pipeline import create_job, render_from_record
+    from services.template_manager import TemplateManager
+
+    os.makedirs(output_dir, exist_ok=True)
+    threads = get_threads_per_worker(workers, threads_per_worker)
+    template = TemplateManager().get_template(settings["output_format"])
+    statuses = {}
+
+    pending = []
+    for filename in list_audio_files(input_dir):
+        job = create_job(filename, input_dir, output_dir, settings["output_format"])
+        if skip_completed and os.path.exists(job["output_path"]):
+            statuses[filename] = "Skipped"
+            if on_status:
+                on_status(filename, "Skipped", None)
+            continue
+        # Transcribed before in another format → render in the parent, no worker needed
+        if skip_completed and render_from_record(job, settings, template):
+            statuses[filename] = "Error" if job["error"] else "Completed"
+            if on_status:
+                on_status(filename, statuses[filename], None)
+            continue
+        pending.append(filename)
+
+    if not pending:
+        return statuses
+
+    workers = min(workers, len(pending))
+    print(f"🚀 Starting pool → {workers} worker(s) × {threads} thread(s) for {len(pending)} file(s)")
+
+    # spawn: never fork a process that may already hold torch/CUDA state
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=context,
+        initializer=init_worker,
+        initargs=(settings["model_name"], threads, True, settings)
+    ) as executor:
+        futures = {
+            executor.submit(_process_file_in_worker, filename, input_dir, output_dir, settings): filename
+            for filename in pending
+        }
+
+        for future in as_completed(futures):
+            filename = futures[future]
+            try:
+                _, error = future.result()
+            except Exception as e:
+                print(f"❌ Worker crashed on {filename}: {e}")
+                error = str(e)
+
+            status = "Error" if error else "Completed"
+            statuses[filename] = status
+            if on_status:
+                on_status(filename, status, None)
+
+    return statuses
+
+
+def _transcribe_chunk_in_worker(chunk, model_name, language, translate_to_english):
+    from services.utils_models import get_whisper_model
+    from services.utils_transcribe import run_whisper_transcription
+
+    model, device = get_whisper_model(model_name)
+    return run_whisper_transcription(
+        audio=chunk, model=model, device=device,
+        language=language, translate_to_english=translate_to_english
+    )
+
+
+def transcribe_chunks_in_pool(chunks, model_name, language, translate_to_english, workers=2, threads_per_worker=None):
+    """
+    Transcribes audio chunks concurrently, one model per worker process.
+    Results are returned in chunk order. The pool is kept alive across files
+    so models are loaded once per worker, not once per file.
+    """
+    executor = _get_chunk_pool(model_name, workers, threads_per_worker)
+    futures = [
+        executor.submit(_transcribe_chunk_in_worker, chunk, model_name, language, translate_to_english)
+        for chunk in chunks
+    ]
+    return [future.result() for future in futures]
+
+
+def shutdown_chunk_pool():
+    with _chunk_pool_lock:
+        if _chunk_pool["executor"] is not None:
+            _chunk_pool["executor"].shutdown(wait=True)
+        _chunk_pool["executor"] = None
+        _chunk_pool["key"] = None
+
+
+def _get_chunk_pool(model_name, workers, threads_per_worker=None):
+    threads = get_threads_per_worker(workers, threads_per_worker)
+    key = (model_name, workers, threads)
+
+    with _chunk_pool_lock:
+        if _chunk_pool["key"] != key:
+            if _chunk_pool["executor"] is not None:
+                _chunk_pool["executor"].shutdown(wait=True)
+            print(f"🚀 Starting chunk pool → {workers} worker(s) × {threads} thread(s)")
+            _chunk_pool["executor"] = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=init_worker,
+                initargs=(model_name, threads)
+            )
+            _chunk_pool["key"] = key
+        return _chunk_pool["executor"]
+
+
+def _extract_shard_in_worker(audio_name, n_samples, out_name, out_shape, shard, frame_mask, extract_kwargs):
+    from multiprocessing import shared_memory
+    import numpy as np
+    from services.utils_diarize import extract_shard_features
+
+    audio_shm = shared_memory.SharedMemory(name=audio_name)
+    out_shm = shared_memory.SharedMemory(name=out_name)
+    y = out = None
+    try:
+        y = np.ndarray((n_samples,), dtype=np.float32, buffer=audio_shm.buf)
+        out = np.ndarray(out_shape, dtype=np.float32, buffer=out_shm.buf)
+        return extract_shard_features(y, shard, out, frame_mask, **extract_kwargs)
+    finally:
+        y = out = None  # release buffer views before closing
+        audio_shm.close()
+        out_shm.close()
+
+
+def extract_features_in_pool(y, shards, out_shape, grid_voiced, extract_kwargs, workers=2, threads_per_worker=None):
+    """
+    Runs feature-extraction shards across worker processes.
+
+    The waveform and the (rows × channels) output matrix live in shared memory:
+    tasks carry only names, shapes and frame ranges, and workers write their rows
+    in place, so no audio or feature arrays are pickled in either direction.
+    The waveform is copied into shared memory once per call (4 bytes per sample,
+    ~230 MB per hour at 16 kHz) and released on return; extraction runs once per
+    file (once per block when streaming), so the copy is not repeated per shard.
+
+    Returns:
+        np.ndarray: The filled float32 output matrix (copied out of shared memory).
+    """
+    from multiprocessing import shared_memory
+    import numpy as np
+
+    executor = _get_feature_pool(workers, threads_per_worker)
+
+    audio_shm = shared_memory.SharedMemory(create=True, size=max(1, len(y) * 4))
+    out_shm = shared_memory.SharedMemory(create=True, size=max(1, int(np.prod(out_shape)) * 4))
+    try:
+        # Casts straight into shared memory (no intermediate float32 copy)
+        np.ndarray((len(y),), dtype=np.float32, buffer=audio_shm.buf)[:] = y
+
+        futures = [
+            executor.submit(
+                _extract_shard_in_worker,
+                audio_shm.name, len(y), out_shm.name, out_shape, shard,
+                None if grid_voiced is None else grid_voiced[shard[0]:shard[1]],
+                extract_kwargs
+            )
+            for shard in shards
+        ]
+        for future in futures:
+            future.result()
+
+        return np.ndarray(out_shape, dtype=np.float32, buffer=out_shm.buf).copy()
+    finally:
+        audio_shm.close()
+        audio_shm.unlink()
+        out_shm.close()
+        out_shm.unlink()
+
+
+def shutdown_feature_pool():
+    with _feature_pool_lock:
+        if _feature_pool["executor"] is not None:
+            _feature_pool["executor"].shutdown(wait=True)
+        _feature_pool["executor"] = None
+        _feature_pool["key"] = None
+
+
+def _get_feature_pool(workers, threads_per_worker=None):
+    threads = get_threads_per_worker(workers, threads_per_worker)
+    key = (workers, threads)
+
+    with _feature_pool_lock:
+        if _feature_pool["key"] != key:
+            if _feature_pool["executor"] is not None:
+                _feature_pool["executor"].shutdown(wait=True)
+            print(f"🚀 Starting feature pool → {workers} worker(s) × {threads} thread(s)")
+            _feature_pool["executor"] = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=init_feature_worker,
+                initargs=(threads,)
+            )
+            _feature_pool["key"] = key
+        return _feature_pool["executor"]
+
+
+atexit.register(shutdown_chunk_pool)
+atexit.register(shutdown_feature_pool)